@@ -0,0 +1,149 @@
+"""Price rollups across leagues, maintained as picks commit and undo"""
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+from storage import LeagueRepository, mongo_database
+
+ALL_FORMATS = "all"
+# Curves bucket ranks by one 12-team round
+CURVE_BUCKET = 12
+CURVE_BUCKETS = 25
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def league_format(teams: int, budget: int) -> str:
+    return f"{teams}x{budget}"
+
+
+def normalize_pos_rank(pos_rank: str) -> str:
+    """'rb5', 'RB05' and 'RB 5' all roll up as 'RB05'"""
+    match = re.fullmatch(r"\s*([A-Za-z]+)\s*0*(\d+)\s*", pos_rank or "")
+    if not match:
+        return (pos_rank or "").strip().upper()
+    return f"{match.group(1).upper()}{int(match.group(2)):02d}"
+
+
+def player_key(name: str, position: str) -> str:
+    return f"{name.strip().lower()}|{position.strip().upper()}"
+
+
+def curve_bucket(rank: float) -> int:
+    return max(0, int((rank - 1) // CURVE_BUCKET))
+
+
+def rollup_keys(rollup_format: str, player: Dict[str, Any]) -> List[str]:
+    """Every rollup a pick of `player` in a `rollup_format` league counts towards, for its format and across formats"""
+    keys = []
+    for fmt in (rollup_format, ALL_FORMATS):
+        keys.append(f"player:{fmt}:{player_key(player['name'], player['position'])}")
+        if player.get("pos_rank"):
+            keys.append(f"pos_rank:{fmt}:{normalize_pos_rank(player['pos_rank'])}")
+        if player.get("etr_rank"):
+            keys.append(f"etr_rank:{fmt}:{curve_bucket(player['etr_rank'])}")
+        if player.get("adp"):
+            keys.append(f"adp:{fmt}:{curve_bucket(player['adp'])}")
+    return keys
+
+
+def summarize(count: int, total: float, total_sq: float, histogram: Dict[int, int]) -> Dict[str, Any]:
+    """Count, mean, standard deviation, range and quantiles of one rollup"""
+    if count <= 0:
+        return {"count": 0}
+    mean = total / count
+    prices = sorted((price, n) for price, n in histogram.items() if n > 0)
+    summary = {
+        "count": count,
+        "mean": round(mean, 2),
+        "stddev": round(math.sqrt(max(0.0, total_sq / count - mean * mean)), 2),
+        "min": prices[0][0],
+        "max": prices[-1][0],
+    }
+    seen = 0
+    wanted = list(QUANTILES)
+    for price, n in prices:
+        seen += n
+        while wanted and seen >= wanted[0] * count:
+            summary[f"p{int(wanted.pop(0) * 100)}"] = price
+    return summary
+
+
+class PriceRollups(ABC):
+    """count, sum, sum of squares and a price histogram per rollup key.
+
+    Auction prices are whole dollars no larger than a team's budget, so the
+    histogram is an exact quantile sketch of bounded size that, unlike
+    merge-only sketches, also supports removing an undone pick.
+    """
+
+    @abstractmethod
+    async def observe(self, keys: Iterable[str], amount: int, weight: int) -> None:
+        """Add (weight 1) or remove (weight -1) one price from every key"""
+
+    @abstractmethod
+    async def fetch(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Summaries of the given keys (missing keys have count 0)"""
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes rollup lookups rely on (idempotent); Mongo rollups are keyed by _id and need none"""
+
+    async def record(self, pick: Dict[str, Any], weight: int = 1) -> None:
+        """Count a pick (weight 1) or take it back out (weight -1) under the format stamped on it when it was
+        made; picks without one were never counted and are skipped"""
+        if pick.get("rollup_format"):
+            await self.observe(rollup_keys(pick["rollup_format"], pick["player"]), pick["amount"], weight)
+
+
+class InMemoryPriceRollups(PriceRollups):
+    """Rollups for the memory storage engine; lost on restart"""
+
+    def __init__(self):
+        self._rollups: Dict[str, List[Any]] = {}  # key -> [count, sum, sum of squares, Counter of prices]
+
+    async def observe(self, keys: Iterable[str], amount: int, weight: int) -> None:
+        for key in keys:
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                rollup = self._rollups[key] = [0, 0, 0, Counter()]
+            rollup[0] += weight
+            rollup[1] += weight * amount
+            rollup[2] += weight * amount * amount
+            rollup[3][amount] += weight
+
+    async def fetch(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        summaries = {}
+        for key in keys:
+            rollup = self._rollups.get(key)
+            summaries[key] = summarize(*rollup) if rollup else {"count": 0}
+        return summaries
+
+
+class MongoPriceRollups(PriceRollups):
+    """One `price_rollups` document per key, updated with $inc upserts"""
+
+    def __init__(self, db):
+        self.collection = db.price_rollups
+
+    async def observe(self, keys: Iterable[str], amount: int, weight: int) -> None:
+        from pymongo import UpdateOne
+
+        update = {"$inc": {"count": weight, "sum": weight * amount, "sum_sq": weight * amount * amount, f"hist.{amount}": weight}}
+        await self.collection.bulk_write([UpdateOne({"_id": key}, update, upsert=True) for key in keys], ordered=False)
+
+    async def fetch(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        summaries = {key: {"count": 0} for key in keys}
+        async for found in self.collection.find({"_id": {"$in": keys}}):
+            histogram = {int(price): n for price, n in found.get("hist", {}).items()}
+            summaries[found["_id"]] = summarize(found["count"], found["sum"], found["sum_sq"], histogram)
+        return summaries
+
+
+def create_price_rollups(repository: LeagueRepository) -> PriceRollups:
+    """Mongo-backed rollups when the league repository is (or writes behind to) MongoDB, else in memory"""
+    db = mongo_database(repository)
+    if db is not None:
+        return MongoPriceRollups(db)
+    return InMemoryPriceRollups()
+
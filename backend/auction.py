@@ -0,0 +1,344 @@
+"""Live auction engine: nomination rotation, high bids and countdowns on one shared timer"""
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Awards a lot: (league_id, team_id, player, amount) -> committed league document, None if the league is gone
+CommitWin = Callable[[str, str, Dict[str, Any], int], Awaitable[Optional[Dict[str, Any]]]]
+
+# Why a bid was turned away, and the HTTP status it maps to
+BID_REJECTIONS = {
+    "not_bidding": 409,
+    "stale_lot": 409,
+    "outbid": 409,
+    "unknown_team": 404,
+    "roster_full": 400,
+    "below_minimum": 400,
+    "over_max_bid": 400,
+}
+
+
+class TimerQueue:
+    """Deadlines for any number of keys behind a single event loop timer.
+
+    Deadlines live in a heap; only the earliest one is armed with
+    `loop.call_at`. Rescheduling or cancelling a key just supersedes its
+    heap entry, and stale entries are skipped when they surface (or
+    compacted away when they pile up), so every operation is O(log n)
+    and there is no task per key.
+    """
+
+    def __init__(self, on_expire: Callable[[str], None]):
+        self.on_expire = on_expire
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, Tuple[float, int]] = {}
+        self._tokens = itertools.count()
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._armed_for: Optional[float] = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, key: str, deadline: float) -> None:
+        """Expire `key` at `deadline` (event loop time), replacing any earlier deadline for it"""
+        entry = (deadline, next(self._tokens))
+        self._deadlines[key] = entry
+        heapq.heappush(self._heap, (*entry, key))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(d, t, k) for d, t, k in self._heap if self._deadlines.get(k) == (d, t)]
+            heapq.heapify(self._heap)
+        self._arm()
+
+    def cancel(self, key: str) -> None:
+        self._deadlines.pop(key, None)
+
+    def deadline(self, key: str) -> Optional[float]:
+        entry = self._deadlines.get(key)
+        return entry[0] if entry else None
+
+    def _arm(self) -> None:
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][:2]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        if self._handle is not None:
+            if self._armed_for <= when:
+                return
+            self._handle.cancel()
+        self._handle = asyncio.get_running_loop().call_at(when, self._fire)
+        self._armed_for = when
+
+    def _fire(self) -> None:
+        self._handle = None
+        now = asyncio.get_running_loop().time()
+        while self._heap and self._heap[0][0] <= now:
+            deadline, token, key = heapq.heappop(self._heap)
+            if self._deadlines.get(key) != (deadline, token):
+                continue
+            del self._deadlines[key]
+            self.fired += 1
+            try:
+                self.on_expire(key)
+            except Exception as e:
+                logger.error(f"Timer callback for {key} failed: {str(e)}")
+        self._arm()
+
+    def close(self) -> None:
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        self._heap.clear()
+        self._deadlines.clear()
+
+
+class AuctionClock:
+    """Auction state of one league: whose nomination it is and the lot under the hammer"""
+    __slots__ = (
+        "league_id", "bid_seconds", "status", "order", "max_bid", "remaining_spots", "nominator",
+        "lot", "player", "high_bid", "high_bidder", "high_bid_sequence", "sequence", "last_result",
+    )
+
+    def __init__(self, league_id: str, bid_seconds: float):
+        self.league_id = league_id
+        self.bid_seconds = bid_seconds
+        self.status = "nominating"  # nominating -> bidding -> committing -> nominating ... -> complete
+        self.order: List[str] = []
+        self.max_bid: Dict[str, int] = {}
+        self.remaining_spots: Dict[str, int] = {}
+        self.nominator = 0
+        self.lot = 0  # Numbers nominations, so a bid aimed at a finished lot can't land on the next one
+        self.player: Optional[Dict[str, Any]] = None
+        self.high_bid = 0
+        self.high_bidder: Optional[str] = None
+        self.high_bid_sequence = 0
+        self.sequence = 0  # Server receive order of bids in this league
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def sync(self, document: Dict[str, Any]) -> None:
+        """Refresh cached team metrics from a committed league document"""
+        current = self.order[self.nominator] if self.order else None
+        self.order = [team["id"] for team in document["teams"]]
+        self.max_bid = {team["id"]: team["max_bid"] for team in document["teams"]}
+        self.remaining_spots = {team["id"]: team["remaining_spots"] for team in document["teams"]}
+        self.nominator = self.order.index(current) if current in self.max_bid else 0
+
+    def next_nominator(self, start: int) -> Optional[int]:
+        """First team from `start` on (wrapping) that still has an open roster spot"""
+        for offset in range(len(self.order)):
+            index = (start + offset) % len(self.order)
+            if self.remaining_spots[self.order[index]] > 0:
+                return index
+        return None
+
+
+class AuctionEngine:
+    """Runs every live auction of this process on one `TimerQueue`.
+
+    When a lot's countdown runs out, the high bid is committed through
+    `commit` (the same path as a manually entered pick) and the nomination
+    moves to the next team with open roster spots. Clocks are in-memory and
+    owned by the process that started them; only committed picks are stored.
+    """
+
+    def __init__(self, commit: CommitWin, bid_seconds: float = 30.0):
+        self.commit = commit
+        self.bid_seconds = bid_seconds
+        self.timers = TimerQueue(self._expire)
+        self._clocks: Dict[str, AuctionClock] = {}
+        self._awarding: Set[asyncio.Task] = set()
+        self.awards = 0
+        self.bids_accepted = 0
+        self.bids_rejected: Dict[str, int] = dict.fromkeys(BID_REJECTIONS, 0)
+
+    def start(self, document: Dict[str, Any], bid_seconds: Optional[float] = None) -> AuctionClock:
+        """Start (or restart) the auction of a league from its committed document"""
+        self.stop(document["id"])
+        clock = AuctionClock(document["id"], bid_seconds or self.bid_seconds)
+        clock.sync(document)
+        self._advance(clock, 0)
+        self._clocks[clock.league_id] = clock
+        return clock
+
+    def stop(self, league_id: str) -> bool:
+        """Drop the league's auction; False if none was running"""
+        self.timers.cancel(league_id)
+        return self._clocks.pop(league_id, None) is not None
+
+    def sync(self, document: Dict[str, Any]) -> None:
+        """Pick up team changes committed outside the auction (manual picks, undos, settings)"""
+        clock = self._clocks.get(document["id"])
+        if clock is not None:
+            clock.sync(document)
+            if clock.status in ("nominating", "complete"):
+                self._advance(clock, clock.nominator)
+
+    def clock(self, league_id: str) -> AuctionClock:
+        clock = self._clocks.get(league_id)
+        if clock is None:
+            raise HTTPException(status_code=404, detail="No auction running for this league")
+        return clock
+
+    def nominate(self, league_id: str, team_id: str, player: Dict[str, Any], amount: int) -> AuctionClock:
+        """Put a player up with an opening bid from the team whose turn it is"""
+        clock = self.clock(league_id)
+        if clock.status != "nominating":
+            raise HTTPException(status_code=409, detail=f"Auction is {clock.status}")
+        if clock.order[clock.nominator] != team_id:
+            raise HTTPException(status_code=409, detail="Not this team's nomination")
+        reason = self._check_team(clock, team_id, amount)
+        if reason:
+            raise HTTPException(status_code=BID_REJECTIONS[reason], detail=reason)
+
+        clock.lot += 1
+        clock.sequence += 1
+        clock.player = player
+        self._take_bid(clock, team_id, amount)
+        clock.status = "bidding"
+        return clock
+
+    def bid(self, league_id: str, team_id: str, amount: int, lot: Optional[int] = None) -> Dict[str, Any]:
+        """Apply one live bid in server receive order; returns its receipt.
+
+        Validation is a handful of dict lookups against the cached team
+        metrics. A bid that doesn't beat the current high bid (or targets a
+        finished lot) is rejected here and never reaches storage; only the
+        bid standing when the clock runs out is committed.
+        """
+        clock = self.clock(league_id)
+        clock.sequence += 1
+        if clock.status != "bidding":
+            reason = "not_bidding"
+        elif lot is not None and lot != clock.lot:
+            reason = "stale_lot"
+        elif amount <= clock.high_bid:
+            reason = "outbid"
+        else:
+            reason = self._check_team(clock, team_id, amount)
+
+        if reason:
+            self.bids_rejected[reason] += 1
+        else:
+            self._take_bid(clock, team_id, amount)
+            self.bids_accepted += 1
+        return {
+            "accepted": reason is None,
+            "reason": reason,
+            "sequence": clock.sequence,
+            "lot": clock.lot,
+            "high_bid": clock.high_bid,
+            "high_bidder": clock.high_bidder,
+        }
+
+    def _check_team(self, clock: AuctionClock, team_id: str, amount: int) -> Optional[str]:
+        max_bid = clock.max_bid.get(team_id)
+        if max_bid is None:
+            return "unknown_team"
+        if clock.remaining_spots[team_id] <= 0:
+            return "roster_full"
+        if amount < 1:
+            return "below_minimum"
+        if amount > max_bid:
+            return "over_max_bid"
+        return None
+
+    def _take_bid(self, clock: AuctionClock, team_id: str, amount: int) -> None:
+        # Every new high bid resets the countdown
+        clock.high_bid = amount
+        clock.high_bidder = team_id
+        clock.high_bid_sequence = clock.sequence
+        self.timers.schedule(clock.league_id, asyncio.get_running_loop().time() + clock.bid_seconds)
+
+    def _expire(self, league_id: str) -> None:
+        clock = self._clocks.get(league_id)
+        if clock is None or clock.status != "bidding":
+            return
+        clock.status = "committing"
+        task = asyncio.get_running_loop().create_task(self._award(clock))
+        self._awarding.add(task)
+        task.add_done_callback(self._awarding.discard)
+
+    async def _award(self, clock: AuctionClock) -> None:
+        result = {
+            "lot": clock.lot,
+            "player": clock.player,
+            "team_id": clock.high_bidder,
+            "amount": clock.high_bid,
+            "sequence": clock.high_bid_sequence,
+        }
+        try:
+            document = await self.commit(clock.league_id, clock.high_bidder, clock.player, clock.high_bid)
+        except Exception as e:
+            # e.g. a manual pick spent the budget meanwhile: the lot is void, same team nominates again
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning(f"Auction award in league {clock.league_id} failed: {detail}")
+            clock.last_result = {**result, "error": detail}
+            self._clear_lot(clock)
+            return
+        if self._clocks.get(clock.league_id) is not clock:
+            return
+        if document is None:
+            self.stop(clock.league_id)
+            return
+
+        self.awards += 1
+        clock.last_result = result
+        clock.sync(document)
+        self._clear_lot(clock)
+        self._advance(clock, clock.nominator + 1)
+
+    def _clear_lot(self, clock: AuctionClock) -> None:
+        clock.player = None
+        clock.high_bid = 0
+        clock.high_bidder = None
+        clock.status = "nominating"
+
+    def _advance(self, clock: AuctionClock, start: int) -> None:
+        nominator = clock.next_nominator(start) if clock.order else None
+        if nominator is None:
+            clock.status = "complete"
+        else:
+            clock.nominator = nominator
+            clock.status = "nominating"
+
+    def state(self, league_id: str) -> Dict[str, Any]:
+        clock = self.clock(league_id)
+        deadline = self.timers.deadline(league_id)
+        return {
+            "league_id": league_id,
+            "status": clock.status,
+            "nominating_team_id": clock.order[clock.nominator] if clock.status != "complete" else None,
+            "lot": clock.lot,
+            "player": clock.player,
+            "high_bid": clock.high_bid,
+            "high_bidder": clock.high_bidder,
+            "high_bid_sequence": clock.high_bid_sequence,
+            "sequence": clock.sequence,
+            "seconds_remaining": (
+                max(0.0, round(deadline - asyncio.get_running_loop().time(), 3)) if deadline is not None else None
+            ),
+            "bid_seconds": clock.bid_seconds,
+            "last_result": clock.last_result,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clocks": len(self._clocks),
+            "running_timers": len(self.timers),
+            "awards": self.awards,
+            "bids_accepted": self.bids_accepted,
+            "bids_rejected": dict(self.bids_rejected),
+        }
+
+    async def close(self) -> None:
+        self.timers.close()
+        for task in list(self._awarding):
+            task.cancel()
+        self._clocks.clear()
@@ -0,0 +1,495 @@
+"""Player catalog: ranking CSV loading, search and compact columnar encoding"""
+import asyncio
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from starlette.concurrency import run_in_threadpool
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+RANKINGS_CSV_URL = "https://customer-assets.emergentagent.com/job_draft-wizard-2/artifacts/3gaj8jfg_ETR_New_Rankings_Redraft_PPR.csv"
+
+# Admin reloads may only read rankings files inside CATALOG_DIR (none when unset)
+CATALOG_DIR = os.environ.get('CATALOG_DIR', '')
+# ... and only download from URLs under one of these prefixes
+CATALOG_URL_ALLOWLIST = [
+    prefix for prefix in os.environ.get('CATALOG_URL_ALLOWLIST', RANKINGS_CSV_URL).split(",") if prefix
+]
+
+# Add headers to avoid blocking
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Column order of the compact catalog encoding
+CATALOG_COLUMNS = ["name", "position", "nfl_team", "etr_rank", "adp", "pos_rank"]
+
+# How long a fallback catalog is served before the CSV download is retried
+FALLBACK_RETRY_SECONDS = 300
+
+# Number of distinct searches whose encoded results are kept
+SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', '4096'))
+
+# Enhanced fallback data used when the rankings CSV can't be downloaded
+FALLBACK_PLAYERS = [
+    {"name": "Ja'Marr Chase", "position": "WR", "nfl_team": "CIN", "etr_rank": 1, "adp": 1.0, "pos_rank": "WR01"},
+    {"name": "Bijan Robinson", "position": "RB", "nfl_team": "ATL", "etr_rank": 2, "adp": 2.8, "pos_rank": "RB01"},
+    {"name": "CeeDee Lamb", "position": "WR", "nfl_team": "DAL", "etr_rank": 3, "adp": 5.2, "pos_rank": "WR02"},
+    {"name": "Saquon Barkley", "position": "RB", "nfl_team": "PHI", "etr_rank": 4, "adp": 2.8, "pos_rank": "RB02"},
+    {"name": "Justin Jefferson", "position": "WR", "nfl_team": "MIN", "etr_rank": 5, "adp": 4.6, "pos_rank": "WR03"},
+    {"name": "Jahmyr Gibbs", "position": "RB", "nfl_team": "DET", "etr_rank": 6, "adp": 4.6, "pos_rank": "RB03"},
+    {"name": "Christian McCaffrey", "position": "RB", "nfl_team": "SF", "etr_rank": 7, "adp": 9.4, "pos_rank": "RB04"},
+    {"name": "Puka Nacua", "position": "WR", "nfl_team": "LA", "etr_rank": 8, "adp": 9.0, "pos_rank": "WR04"},
+    {"name": "Amon-Ra St. Brown", "position": "WR", "nfl_team": "DET", "etr_rank": 9, "adp": 8.8, "pos_rank": "WR05"},
+    {"name": "Malik Nabers", "position": "WR", "nfl_team": "NYG", "etr_rank": 10, "adp": 9.2, "pos_rank": "WR06"},
+    {"name": "Nico Collins", "position": "WR", "nfl_team": "HOU", "etr_rank": 11, "adp": 14.4, "pos_rank": "WR07"},
+    {"name": "De'Von Achane", "position": "RB", "nfl_team": "MIA", "etr_rank": 12, "adp": 13.0, "pos_rank": "RB05"},
+    {"name": "Ashton Jeanty", "position": "RB", "nfl_team": "LV", "etr_rank": 13, "adp": 10.2, "pos_rank": "RB06"},
+    {"name": "Brian Thomas Jr.", "position": "WR", "nfl_team": "JAX", "etr_rank": 14, "adp": 14.6, "pos_rank": "WR08"},
+    {"name": "Brock Bowers", "position": "TE", "nfl_team": "LV", "etr_rank": 15, "adp": 18.6, "pos_rank": "TE01"},
+    {"name": "A.J. Brown", "position": "WR", "nfl_team": "PHI", "etr_rank": 16, "adp": 17.4, "pos_rank": "WR09"},
+    {"name": "Drake London", "position": "WR", "nfl_team": "ATL", "etr_rank": 17, "adp": 20.0, "pos_rank": "WR10"},
+    {"name": "Derrick Henry", "position": "RB", "nfl_team": "BAL", "etr_rank": 18, "adp": 11.4, "pos_rank": "RB07"},
+    {"name": "Chase Brown", "position": "RB", "nfl_team": "CIN", "etr_rank": 19, "adp": 27.4, "pos_rank": "RB08"},
+    {"name": "Bucky Irving", "position": "RB", "nfl_team": "TB", "etr_rank": 20, "adp": 21.6, "pos_rank": "RB09"},
+    {"name": "Ladd McConkey", "position": "WR", "nfl_team": "LAC", "etr_rank": 21, "adp": 24.8, "pos_rank": "WR11"},
+    {"name": "Tyreek Hill", "position": "WR", "nfl_team": "MIA", "etr_rank": 22, "adp": 28.2, "pos_rank": "WR12"},
+    {"name": "Trey McBride", "position": "TE", "nfl_team": "ARI", "etr_rank": 23, "adp": 26.0, "pos_rank": "TE02"},
+    {"name": "Josh Jacobs", "position": "RB", "nfl_team": "GB", "etr_rank": 24, "adp": 17.0, "pos_rank": "RB10"},
+    {"name": "Tee Higgins", "position": "WR", "nfl_team": "CIN", "etr_rank": 25, "adp": 31.0, "pos_rank": "WR13"},
+    {"name": "Jonathan Taylor", "position": "RB", "nfl_team": "IND", "etr_rank": 26, "adp": 20.2, "pos_rank": "RB11"},
+    {"name": "Breece Hall", "position": "RB", "nfl_team": "NYJ", "etr_rank": 27, "adp": 34.2, "pos_rank": "RB12"},
+    {"name": "Omarion Hampton", "position": "RB", "nfl_team": "LAC", "etr_rank": 28, "adp": 43.6, "pos_rank": "RB13"},
+    {"name": "Jaxon Smith-Njigba", "position": "WR", "nfl_team": "SEA", "etr_rank": 29, "adp": 33.4, "pos_rank": "WR14"},
+    {"name": "Davante Adams", "position": "WR", "nfl_team": "LA", "etr_rank": 30, "adp": 37.2, "pos_rank": "WR15"},
+    {"name": "Kyren Williams", "position": "RB", "nfl_team": "LA", "etr_rank": 31, "adp": 24.2, "pos_rank": "RB14"},
+    {"name": "George Kittle", "position": "TE", "nfl_team": "SF", "etr_rank": 32, "adp": 38.0, "pos_rank": "TE03"},
+    {"name": "Garrett Wilson", "position": "WR", "nfl_team": "NYJ", "etr_rank": 33, "adp": 35.6, "pos_rank": "WR16"},
+    {"name": "James Cook", "position": "RB", "nfl_team": "BUF", "etr_rank": 34, "adp": 31.8, "pos_rank": "RB15"},
+    {"name": "DJ Moore", "position": "WR", "nfl_team": "CHI", "etr_rank": 35, "adp": 48.6, "pos_rank": "WR17"},
+    {"name": "Xavier Worthy", "position": "WR", "nfl_team": "KC", "etr_rank": 36, "adp": 57.4, "pos_rank": "WR18"},
+    {"name": "Tet McMillan", "position": "WR", "nfl_team": "CAR", "etr_rank": 37, "adp": 67.2, "pos_rank": "WR19"},
+    {"name": "Devonta Smith", "position": "WR", "nfl_team": "PHI", "etr_rank": 38, "adp": 57.0, "pos_rank": "WR20"},
+    {"name": "Marvin Harrison Jr.", "position": "WR", "nfl_team": "ARI", "etr_rank": 39, "adp": 40.6, "pos_rank": "WR21"},
+    {"name": "Josh Allen", "position": "QB", "nfl_team": "BUF", "etr_rank": 40, "adp": 23.6, "pos_rank": "QB01"},
+    {"name": "Lamar Jackson", "position": "QB", "nfl_team": "BAL", "etr_rank": 41, "adp": 22.8, "pos_rank": "QB02"},
+    {"name": "Kenneth Walker III", "position": "RB", "nfl_team": "SEA", "etr_rank": 42, "adp": 38.2, "pos_rank": "RB16"},
+    {"name": "Terry McLaurin", "position": "WR", "nfl_team": "WAS", "etr_rank": 43, "adp": 37.6, "pos_rank": "WR22"},
+    {"name": "Alvin Kamara", "position": "RB", "nfl_team": "NO", "etr_rank": 44, "adp": 38.8, "pos_rank": "RB17"},
+    {"name": "Mike Evans", "position": "WR", "nfl_team": "TB", "etr_rank": 45, "adp": 40.2, "pos_rank": "WR23"},
+    {"name": "Courtland Sutton", "position": "WR", "nfl_team": "DEN", "etr_rank": 46, "adp": 53.6, "pos_rank": "WR24"},
+    {"name": "Zay Flowers", "position": "WR", "nfl_team": "BAL", "etr_rank": 47, "adp": 61.8, "pos_rank": "WR25"},
+    {"name": "Jayden Daniels", "position": "QB", "nfl_team": "WAS", "etr_rank": 48, "adp": 31.0, "pos_rank": "QB03"},
+    {"name": "Jaylen Waddle", "position": "WR", "nfl_team": "MIA", "etr_rank": 49, "adp": 74.8, "pos_rank": "WR26"},
+    {"name": "Chuba Hubbard", "position": "RB", "nfl_team": "CAR", "etr_rank": 50, "adp": 45.6, "pos_rank": "RB18"},
+    {"name": "Joe Burrow", "position": "QB", "nfl_team": "CIN", "etr_rank": 72, "adp": 36.4, "pos_rank": "QB05"},
+    {"name": "Patrick Mahomes", "position": "QB", "nfl_team": "KC", "etr_rank": 87, "adp": 54.6, "pos_rank": "QB07"},
+    {"name": "Brock Purdy", "position": "QB", "nfl_team": "SF", "etr_rank": 91, "adp": 105.6, "pos_rank": "QB08"},
+    {"name": "Baker Mayfield", "position": "QB", "nfl_team": "TB", "etr_rank": 93, "adp": 66.0, "pos_rank": "QB09"},
+    {"name": "Caleb Williams", "position": "QB", "nfl_team": "CHI", "etr_rank": 98, "adp": 115.0, "pos_rank": "QB10"},
+    {"name": "Sam LaPorta", "position": "TE", "nfl_team": "DET", "etr_rank": 62, "adp": 51.6, "pos_rank": "TE04"},
+    {"name": "T.J. Hockenson", "position": "TE", "nfl_team": "MIN", "etr_rank": 78, "adp": 62.0, "pos_rank": "TE05"},
+    {"name": "Travis Kelce", "position": "TE", "nfl_team": "KC", "etr_rank": 79, "adp": 62.8, "pos_rank": "TE06"},
+    {"name": "Mark Andrews", "position": "TE", "nfl_team": "BAL", "etr_rank": 95, "adp": 75.8, "pos_rank": "TE07"},
+    {"name": "Brandon Aubrey", "position": "K", "nfl_team": "DAL", "etr_rank": 151, "adp": 111.2, "pos_rank": "K01"},
+    {"name": "Matt Gay", "position": "K", "nfl_team": "WAS", "etr_rank": 157, "adp": 193.8, "pos_rank": "K02"},
+    {"name": "Will Reichard", "position": "K", "nfl_team": "MIN", "etr_rank": 160, "adp": 235.3, "pos_rank": "K03"},
+    {"name": "Younghoe Koo", "position": "K", "nfl_team": "ATL", "etr_rank": 166, "adp": 191.6, "pos_rank": "K04"},
+    {"name": "Cameron Dicker", "position": "K", "nfl_team": "LAC", "etr_rank": 172, "adp": 125.4, "pos_rank": "K05"},
+    {"name": "DEN DST", "position": "DST", "nfl_team": "DEN", "etr_rank": 150, "adp": 114.0, "pos_rank": "DST01"},
+    {"name": "SF DST", "position": "DST", "nfl_team": "SF", "etr_rank": 164, "adp": 170.6, "pos_rank": "DST02"},
+    {"name": "BAL DST", "position": "DST", "nfl_team": "BAL", "etr_rank": 165, "adp": 135.6, "pos_rank": "DST03"},
+    {"name": "PIT DST", "position": "DST", "nfl_team": "PIT", "etr_rank": 168, "adp": 135.0, "pos_rank": "DST04"},
+    {"name": "HOU DST", "position": "DST", "nfl_team": "HOU", "etr_rank": 169, "adp": 153.0, "pos_rank": "DST05"}
+]
+
+
+def parse_rankings_csv(csv_text: str) -> List[Dict[str, Any]]:
+    """Parse the ETR rankings CSV into player dicts"""
+    # Remove BOM if present
+    if csv_text.startswith('\ufeff'):
+        csv_text = csv_text[1:]
+    
+    players = []
+    csv_reader = csv.DictReader(StringIO(csv_text))
+    
+    for row in csv_reader:
+        # Clean and parse the data
+        try:
+            # Handle potential BOM in first column name
+            name_key = "Name" if "Name" in row else list(row.keys())[0]
+            
+            player = {
+                "name": row[name_key].strip('"'),
+                "position": row["Position"].strip('"'),
+                "nfl_team": row["Team"].strip('"'),
+                "etr_rank": int(row["ETR Rank"].strip('"')) if row["ETR Rank"].strip('"').isdigit() else 999,
+                "adp": float(row["ADP"].strip('"')) if row["ADP"].strip('"').replace('.','').isdigit() else 999.0,
+                "pos_rank": row["Pos Rank ETR"].strip('"')
+            }
+            
+            # Only add valid players
+            if player["name"] and player["position"]:
+                players.append(player)
+                
+        except (ValueError, KeyError):
+            # Skip malformed rows but continue processing
+            continue
+    
+    return players
+
+
+catalog_fetch_seconds = Histogram("catalog_fetch_duration_seconds", "Rankings CSV download time", ("outcome",))
+
+
+def fetch_rankings_csv(url: str = RANKINGS_CSV_URL) -> str:
+    """Download the rankings CSV (blocking - run it in a thread)"""
+    started = time.perf_counter()
+    try:
+        response = requests.get(url, headers=REQUEST_HEADERS, timeout=30)
+        response.raise_for_status()  # Raise exception for bad status codes
+    except requests.RequestException:
+        catalog_fetch_seconds.observe(time.perf_counter() - started, "error")
+        raise
+    catalog_fetch_seconds.observe(time.perf_counter() - started, "ok")
+    return response.text
+
+
+def normalize_query(q: str) -> str:
+    """Lowercase and collapse whitespace so equivalent typeahead queries share a cache entry"""
+    return " ".join(q.lower().split()) if q else ""
+
+
+def _etr_sort_key(player: Dict[str, Any]) -> int:
+    return player["etr_rank"] if player["etr_rank"] != 999 else 999
+
+
+class CatalogLoadError(ValueError):
+    """Raised when a replacement rankings source can't be read or parsed"""
+
+
+class PlayerCatalog:
+    """Immutable snapshot of the player rankings.
+
+    The columnar encoding, content hash and search index are all built once
+    per snapshot. Replacing the catalog swaps in a whole new snapshot, so a
+    search that already holds the old one never sees a half-built index.
+    """
+
+    def __init__(self, players: List[Dict[str, Any]], source: str = "csv"):
+        self.players = players
+        self.source = source
+        self.loaded_at = time.monotonic()
+        
+        # Column arrays (etr_rank, adp, ...) in catalog order
+        self.columns = {col: [player.get(col) for player in players] for col in CATALOG_COLUMNS}
+        data = [self.columns[col] for col in CATALOG_COLUMNS]
+        data_bytes = json.dumps(data, separators=(",", ":")).encode()
+        self.version = hashlib.sha256(data_bytes).hexdigest()[:16]
+        self.etag = f'W/"{self.version}"'
+        
+        # {"version", "count", "columns", "data"}: data[i] holds every value of columns[i]
+        self.body = json.dumps({
+            "version": self.version,
+            "count": len(players),
+            "columns": CATALOG_COLUMNS,
+            "data": data,
+        }, separators=(",", ":")).encode()
+        self.gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        
+        # Search index: (player, lowered name, lowered first name, lowered team) in ETR rank order,
+        # overall and per position
+        self._ranked = []
+        for player in sorted(players, key=_etr_sort_key):
+            name = player["name"].lower()
+            name_parts = name.split()
+            self._ranked.append((player, name, name_parts[0] if name_parts else "", player["nfl_team"].lower()))
+        self._ranked_by_position: Dict[str, list] = {}
+        for entry in self._ranked:
+            self._ranked_by_position.setdefault(entry[0]["position"], []).append(entry)
+
+    def search(self, q: str = "", position: str = "", limit: int = 500) -> List[Dict[str, Any]]:
+        """Search players by name, position, or team, ordered by ETR rank"""
+        search_query = normalize_query(q)
+        entries = self._ranked_by_position.get(position, []) if position else self._ranked
+        
+        # For single letter searches, prioritize players whose FIRST NAME starts with that letter
+        if len(search_query) == 1:
+            first_name_matches = []
+            other_matches = []
+            
+            for player, name, first_name, team in entries:
+                # Check if first name starts with search letter
+                if first_name.startswith(search_query):
+                    first_name_matches.append(player)
+                    if len(first_name_matches) >= limit:
+                        break
+                elif len(other_matches) < limit and (search_query in name or search_query in team):
+                    other_matches.append(player)
+            
+            return (first_name_matches + other_matches)[:limit]
+        
+        # For multi-character searches, use normal logic
+        filtered_players = []
+        for player, name, first_name, team in entries:
+            if not search_query or search_query in name or search_query in team:
+                filtered_players.append(player)
+                if len(filtered_players) >= limit:
+                    break
+        
+        return filtered_players
+
+
+class SearchCache:
+    """Bounded LRU of encoded search responses keyed by (catalog version, q, position, limit, tiers)"""
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str, str, int, str], bytes]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str, str, int, str]) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Tuple[str, str, str, int, str], body: bytes) -> None:
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+search_cache = SearchCache()
+
+
+def search_json(catalog: PlayerCatalog, q: str = "", position: str = "", limit: int = 500, tiers=None) -> bytes:
+    """JSON-encoded search results, served from the LRU when the same search was seen before.
+
+    With a tier table (see tiers.py) every result carries its player's tier.
+    """
+    key = (catalog.version, normalize_query(q), position, limit, tiers.key if tiers else "")
+    body = search_cache.get(key)
+    if body is None:
+        players = catalog.search(q, position, limit)
+        if tiers is not None:
+            players = [{**player, "tier": tiers.of(player)} for player in players]
+        body = json.dumps(players, separators=(",", ":")).encode()
+        search_cache.put(key, body)
+    return body
+
+
+def catalog_from_body(body: bytes, source: str) -> PlayerCatalog:
+    """Rebuild a catalog from another worker's columnar encoding (`PlayerCatalog.body`)"""
+    payload = json.loads(body)
+    players = [dict(zip(payload["columns"], values)) for values in zip(*payload["data"])]
+    catalog = PlayerCatalog(players, source=source)
+    if catalog.version != payload["version"]:
+        raise CatalogLoadError(f"Catalog body does not match version {payload['version']}")
+    return catalog
+
+
+def build_catalog(csv_text: str, source: str) -> PlayerCatalog:
+    """Parse a rankings CSV into a complete catalog snapshot (blocking - run it in a thread)"""
+    players = parse_rankings_csv(csv_text)
+    if not players:
+        raise CatalogLoadError("No players found in rankings CSV")
+    return PlayerCatalog(players, source=source)
+
+
+_catalog: Optional[PlayerCatalog] = None
+_catalog_lock = asyncio.Lock()
+# Background download replacing a fallback catalog that has been served for FALLBACK_RETRY_SECONDS
+_fallback_retry: Optional[asyncio.Task] = None
+# Background re-read of the live catalog's source after an event bus resync
+_refresh: Optional[asyncio.Task] = None
+
+
+def _catalog_is_fresh(catalog: Optional[PlayerCatalog]) -> bool:
+    if catalog is None:
+        return False
+    if catalog.source == "fallback":
+        return time.monotonic() - catalog.loaded_at < FALLBACK_RETRY_SECONDS
+    return True
+
+
+async def load_catalog() -> PlayerCatalog:
+    """Download and parse the rankings off the event loop, falling back to sample data"""
+    try:
+        csv_text = await run_in_threadpool(fetch_rankings_csv)
+        catalog = await run_in_threadpool(build_catalog, csv_text, "csv")
+        logger.info(f"Successfully loaded {len(catalog.players)} players from CSV")
+        return catalog
+    except (requests.RequestException, CatalogLoadError) as e:
+        logger.error(f"Failed to load CSV from URL: {str(e)}")
+        return PlayerCatalog(list(FALLBACK_PLAYERS), source="fallback")
+
+
+async def get_catalog() -> PlayerCatalog:
+    """Return the current catalog, loading it on first use.
+
+    Only the first load waits for the download. A fallback catalog keeps
+    serving while the download is retried in the background.
+    """
+    if _catalog is None:
+        async with _catalog_lock:
+            if _catalog is None:
+                set_catalog(await load_catalog())
+    elif not _catalog_is_fresh(_catalog):
+        _retry_download()
+    return _catalog
+
+
+def _retry_download() -> None:
+    global _fallback_retry
+    if _fallback_retry is None or _fallback_retry.done():
+        _fallback_retry = asyncio.get_running_loop().create_task(_replace_fallback())
+
+
+async def _replace_fallback() -> None:
+    catalog = await load_catalog()
+    # Unless something else (an admin reload, another worker) replaced the fallback meanwhile; a
+    # failed download installs a new fallback, restarting the retry clock
+    if _catalog is not None and _catalog.source == "fallback":
+        set_catalog(catalog)
+
+
+def set_catalog(catalog: PlayerCatalog) -> None:
+    """Atomically replace the live catalog"""
+    global _catalog
+    if _catalog is not None and _catalog.version != catalog.version:
+        # Entries for the old version can never hit again
+        search_cache.clear()
+    _catalog = catalog
+
+
+def catalog_path(path: str) -> Path:
+    """`path` resolved inside CATALOG_DIR; CatalogLoadError for anything outside it"""
+    if not CATALOG_DIR:
+        raise CatalogLoadError("Loading rankings from files is disabled: set CATALOG_DIR")
+    root = Path(CATALOG_DIR).resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise CatalogLoadError(f"Rankings files must be inside {CATALOG_DIR}")
+    return resolved
+
+
+def check_catalog_url(url: str) -> str:
+    """`url` if it falls under a CATALOG_URL_ALLOWLIST prefix, otherwise CatalogLoadError"""
+    parts = urlsplit(url)
+    for prefix in CATALOG_URL_ALLOWLIST:
+        allowed = urlsplit(prefix)
+        if (parts.scheme, parts.netloc) == (allowed.scheme, allowed.netloc) and parts.path.startswith(allowed.path):
+            return url
+    raise CatalogLoadError("Rankings URL is not in CATALOG_URL_ALLOWLIST")
+
+
+async def reload_catalog(
+    csv_text: Optional[str] = None,
+    path: Optional[str] = None,
+    url: Optional[str] = None,
+) -> PlayerCatalog:
+    """Build a new catalog from uploaded text, a local file or a URL and swap it in.
+
+    The live catalog keeps serving until the replacement is fully built. A
+    source that can't be read or yields no players leaves it untouched.
+    Files must be inside CATALOG_DIR and URLs under CATALOG_URL_ALLOWLIST.
+    """
+    if csv_text is not None:
+        source = "upload"
+    elif path:
+        source = f"file:{path}"
+    else:
+        source = check_catalog_url(url) if url else RANKINGS_CSV_URL
+    try:
+        if path and csv_text is None:
+            csv_text = await run_in_threadpool(catalog_path(path).read_text, encoding="utf-8")
+        elif csv_text is None:
+            csv_text = await run_in_threadpool(fetch_rankings_csv, source)
+            source = "csv" if source == RANKINGS_CSV_URL else source
+        catalog = await run_in_threadpool(build_catalog, csv_text, source)
+    except (OSError, UnicodeDecodeError, requests.RequestException) as e:
+        # The underlying error names server paths and hosts; keep it in the log
+        logger.error(f"Reading rankings from {source} failed: {str(e)}")
+        raise CatalogLoadError(f"Could not read rankings from {source}")
+    
+    return await swap_catalog(catalog)
+
+
+def refresh_catalog() -> None:
+    """Re-read the live catalog from its source in the background, e.g. after missing another worker's reload.
+
+    Uploads and merges can't be re-read; those catalogs are kept.
+    """
+    global _refresh
+    if _refresh is None or _refresh.done():
+        _refresh = asyncio.get_running_loop().create_task(_reload_from_source())
+
+
+async def _reload_from_source() -> None:
+    catalog = _catalog
+    if catalog is None:
+        return
+    source = catalog.source
+    try:
+        if source in ("csv", "fallback"):
+            await reload_catalog()
+        elif source.startswith("file:"):
+            await reload_catalog(path=source[len("file:"):])
+        elif source.startswith(("http://", "https://")):
+            await reload_catalog(url=source)
+        else:
+            logger.warning(f"Catalog from {source} can't be re-read; keeping version {catalog.version}")
+    except CatalogLoadError as e:
+        logger.error(f"Re-reading the catalog from {source} failed: {str(e)}")
+
+
+async def swap_catalog(catalog: PlayerCatalog) -> PlayerCatalog:
+    """Install a fully built catalog in place of the live one"""
+    async with _catalog_lock:
+        previous = _catalog
+        set_catalog(catalog)
+    logger.info(
+        f"Reloaded player catalog from {catalog.source}: {len(catalog.players)} players, "
+        f"version {previous.version if previous else None} -> {catalog.version}"
+    )
+    return catalog
+
+
+async def apply_remote_catalog(version: str, body: bytes, source: str) -> Optional[PlayerCatalog]:
+    """Install a catalog announced by another worker unless that version is already live"""
+    if _catalog is not None and _catalog.version == version:
+        return None
+    catalog = await run_in_threadpool(catalog_from_body, body, source)
+    return await swap_catalog(catalog)
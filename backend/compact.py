@@ -0,0 +1,301 @@
+"""Compact live draft state: integer indexes, typed arrays and interned player records"""
+import uuid
+import weakref
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from rules import budget_metrics
+
+EPOCH = datetime(1970, 1, 1)
+
+PLAYER_FIELDS = ("name", "position", "nfl_team", "etr_rank", "adp", "pos_rank")
+
+
+class PlayerRecord:
+    """One player's fields; iterates in PLAYER_FIELDS order. Slotted (tuples can't be weakly referenced)
+    so the intern table can drop players no live league holds any more."""
+    __slots__ = PLAYER_FIELDS + ("__weakref__",)
+
+    def __init__(self, values: Tuple[Any, ...]):
+        for field, value in zip(PLAYER_FIELDS, values):
+            setattr(self, field, value)
+
+    def __iter__(self) -> Iterator[Any]:
+        return (getattr(self, field) for field in PLAYER_FIELDS)
+
+
+# Entries go away with the last live league (or fork) holding the player
+_players: "weakref.WeakValueDictionary[Tuple[Any, ...], PlayerRecord]" = weakref.WeakValueDictionary()
+_roster_spots: Dict[Tuple[Tuple[str, int], ...], Dict[str, int]] = {}
+
+
+def intern_player(player: Dict[str, Any]) -> PlayerRecord:
+    """One shared tuple per distinct player across every live league"""
+    key = tuple(player.get(field) for field in PLAYER_FIELDS)
+    record = _players.get(key)
+    if record is None:
+        record = _players[key] = PlayerRecord(key)
+    return record
+
+
+def _intern_roster_spots(spots: Dict[str, int]) -> Dict[str, int]:
+    # Every team of every league normally carries the same position_requirements copy
+    return _roster_spots.setdefault(tuple(spots.items()), spots)
+
+
+class _Ids:
+    """Append-only-ish list of id strings stored as 16-byte UUIDs.
+
+    Ids that aren't UUIDs (e.g. hand-written test data) are kept verbatim in
+    a side table so they round-trip unchanged.
+    """
+    __slots__ = ("_bytes", "_other")
+
+    def __init__(self):
+        self._bytes = bytearray()
+        self._other: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._bytes) // 16
+
+    def append(self, value: str) -> None:
+        try:
+            parsed = uuid.UUID(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None and str(parsed) == value:
+            self._bytes += parsed.bytes
+        else:
+            self._other[len(self)] = value
+            self._bytes += bytes(16)
+
+    def __getitem__(self, index: int) -> str:
+        if index in self._other:
+            return self._other[index]
+        return str(uuid.UUID(bytes=bytes(self._bytes[index * 16:(index + 1) * 16])))
+
+    def index(self, value: str) -> Optional[int]:
+        for i, other in self._other.items():
+            if other == value:
+                return i
+        try:
+            needle = uuid.UUID(value).bytes
+        except ValueError:
+            return None
+        start = self._bytes.find(needle)
+        while start != -1:
+            if start % 16 == 0 and start // 16 not in self._other:
+                return start // 16
+            start = self._bytes.find(needle, start + 1)
+        return None
+
+    def pop(self, index: int) -> None:
+        del self._bytes[index * 16:(index + 1) * 16]
+        self._other = {(i - 1 if i > index else i): v for i, v in self._other.items() if i != index}
+
+    def prefix(self, count: int) -> "_Ids":
+        """Copy of the first `count` ids"""
+        ids = _Ids()
+        ids._bytes = self._bytes[:count * 16]
+        ids._other = {i: v for i, v in self._other.items() if i < count}
+        return ids
+
+
+class CompactLeague:
+    """Live state of one league without per-pick object trees.
+
+    Teams and picks are columns: team ids/budgets/spend, and per pick the
+    owning team index, price, timestamp and an interned player record.
+    Rosters are the picks of `all_picks` that belong to each team, and all
+    team metrics are derived from budget/spent/roster counts on the way out,
+    so `to_document()` yields exactly the `League.dict()` shape.
+    """
+    __slots__ = (
+        "id", "version", "log_length", "name", "total_teams", "budget_per_team", "roster_size", "position_requirements", "created_at",
+        "team_ids", "team_names", "team_budgets", "team_spent", "team_roster_spots", "team_counts",
+        "pick_ids", "pick_player_ids", "pick_team", "pick_amount", "pick_time", "pick_player", "pick_rollup_format",
+    )
+
+    def __init__(self):
+        self.team_ids = _Ids()
+        self.team_names: List[str] = []
+        self.team_budgets = array("i")
+        self.team_spent = array("i")
+        self.team_roster_spots: List[Dict[str, int]] = []
+        self.team_counts = array("i")
+        self.pick_ids = _Ids()
+        self.pick_player_ids = _Ids()
+        self.pick_team = array("H")
+        self.pick_amount = array("i")
+        self.pick_time = array("q")  # microseconds since the epoch
+        self.pick_player: List[PlayerRecord] = []
+        self.pick_rollup_format: List[Optional[str]] = []  # price rollup format each pick was counted under
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "CompactLeague":
+        state = cls()
+        state.load(document)
+        return state
+
+    def load(self, document: Dict[str, Any]) -> None:
+        """Replace this state with a `League.dict()`-shaped document"""
+        self.__init__()
+        self.id = document["id"]
+        self.version = document.get("version", 0)
+        self.log_length = document.get("log_length", 0)
+        self.name = document["name"]
+        self.total_teams = document["total_teams"]
+        self.budget_per_team = document["budget_per_team"]
+        self.roster_size = document["roster_size"]
+        self.position_requirements = document["position_requirements"]
+        self.created_at = document["created_at"]
+        for team in document["teams"]:
+            self.team_ids.append(team["id"])
+            self.team_names.append(team["name"])
+            self.team_budgets.append(team["budget"])
+            self.team_spent.append(team["spent"])
+            self.team_roster_spots.append(_intern_roster_spots(team.get("roster_spots", {})))
+            self.team_counts.append(0)
+        team_index = {team["id"]: i for i, team in enumerate(document["teams"])}
+        for pick in document["all_picks"]:
+            self._append_pick(
+                team_index[pick["team_id"]], pick["player"], pick["amount"],
+                pick["id"], pick["player"]["id"], pick["timestamp"], pick.get("rollup_format"),
+            )
+
+    def team_index(self, team_id: str) -> Optional[int]:
+        return self.team_ids.index(team_id)
+
+    def team_remaining(self, index: int) -> int:
+        return self.team_budgets[index] - self.team_spent[index]
+
+    def pick_index(self, pick_id: str) -> Optional[int]:
+        return self.pick_ids.index(pick_id)
+
+    def add_pick(self, team_index: int, player: Dict[str, Any], amount: int, rollup_format: Optional[str] = None) -> str:
+        """Record a validated pick; returns its id"""
+        pick_id = str(uuid.uuid4())
+        self._append_pick(
+            team_index, player, amount, pick_id, player.get("id") or str(uuid.uuid4()), datetime.utcnow(), rollup_format,
+        )
+        self.team_spent[team_index] += amount
+        return pick_id
+
+    def _append_pick(self, team_index, player, amount, pick_id, player_id, timestamp, rollup_format=None) -> None:
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        self.pick_ids.append(pick_id)
+        self.pick_player_ids.append(player_id)
+        self.pick_team.append(team_index)
+        self.pick_amount.append(amount)
+        self.pick_time.append((timestamp - EPOCH) // timedelta(microseconds=1))
+        self.pick_player.append(intern_player(player))
+        self.pick_rollup_format.append(rollup_format)
+        self.team_counts[team_index] += 1
+
+    def remove_pick(self, index: int) -> None:
+        """Undo a pick and refund its team"""
+        team_index = self.pick_team[index]
+        self.team_spent[team_index] -= self.pick_amount[index]
+        self.team_counts[team_index] -= 1
+        self.pick_ids.pop(index)
+        self.pick_player_ids.pop(index)
+        del self.pick_team[index]
+        del self.pick_amount[index]
+        del self.pick_time[index]
+        del self.pick_player[index]
+        del self.pick_rollup_format[index]
+
+    def update_model(self, model: type, change: Callable[[Any], None]) -> None:
+        """Apply a change written against the full `League` model (settings, renames)"""
+        league = model(**self.to_document())
+        change(league)
+        self.load(league.dict())
+
+    def prefix(self, count: int) -> "CompactLeague":
+        """Copy of this league as it stood after its first `count` picks (player records stay shared)"""
+        state = CompactLeague()
+        for name in (
+            "id", "version", "log_length", "name", "total_teams", "budget_per_team", "roster_size", "position_requirements", "created_at",
+        ):
+            setattr(state, name, getattr(self, name))
+        state.team_ids = self.team_ids.prefix(len(self.team_ids))
+        state.team_names = list(self.team_names)
+        state.team_budgets = array("i", self.team_budgets)
+        state.team_spent = array("i", self.team_spent)
+        state.team_roster_spots = list(self.team_roster_spots)
+        state.team_counts = array("i", self.team_counts)
+        for index in range(count, len(self.pick_amount)):
+            state.team_spent[self.pick_team[index]] -= self.pick_amount[index]
+            state.team_counts[self.pick_team[index]] -= 1
+        state.pick_ids = self.pick_ids.prefix(count)
+        state.pick_player_ids = self.pick_player_ids.prefix(count)
+        state.pick_team = self.pick_team[:count]
+        state.pick_amount = self.pick_amount[:count]
+        state.pick_time = self.pick_time[:count]
+        state.pick_player = self.pick_player[:count]
+        state.pick_rollup_format = self.pick_rollup_format[:count]
+        return state
+
+    def append_pick(self, pick: Dict[str, Any]) -> None:
+        """Replay a pick in its document shape (from `pick_document`) onto this state"""
+        team_index = self.team_ids.index(pick["team_id"])
+        if team_index is None:
+            raise ValueError(f"Pick {pick['id']} belongs to unknown team {pick['team_id']}")
+        self._append_pick(
+            team_index, pick["player"], pick["amount"], pick["id"], pick["player"]["id"], pick["timestamp"], pick.get("rollup_format"),
+        )
+        self.team_spent[team_index] += pick["amount"]
+
+    def pick_document(self, index: int) -> Dict[str, Any]:
+        return {
+            "id": self.pick_ids[index],
+            "player": {"id": self.pick_player_ids[index], **dict(zip(PLAYER_FIELDS, self.pick_player[index]))},
+            "team_id": self.team_ids[self.pick_team[index]],
+            "amount": self.pick_amount[index],
+            "timestamp": EPOCH + timedelta(microseconds=self.pick_time[index]),
+            "rollup_format": self.pick_rollup_format[index],
+        }
+
+    def to_document(self) -> Dict[str, Any]:
+        """Public `League.dict()` shape, built fresh for the API boundary or storage"""
+        picks = [self.pick_document(i) for i in range(len(self.pick_amount))]
+        rosters: List[List[Dict[str, Any]]] = [[] for _ in self.team_names]
+        for index, pick in enumerate(picks):
+            rosters[self.pick_team[index]].append(pick)
+
+        teams = []
+        for i, name in enumerate(self.team_names):
+            remaining, max_bid, remaining_spots, avg_per_spot, budget_utilization = budget_metrics(
+                self.team_budgets[i], self.team_spent[i], self.team_counts[i], self.roster_size
+            )
+            teams.append({
+                "id": self.team_ids[i],
+                "name": name,
+                "budget": self.team_budgets[i],
+                "spent": self.team_spent[i],
+                "remaining": remaining,
+                "roster": rosters[i],
+                "roster_spots": dict(self.team_roster_spots[i]),
+                "max_bid": max_bid,
+                "remaining_spots": remaining_spots,
+                "avg_per_spot": avg_per_spot,
+                "budget_utilization": budget_utilization,
+            })
+
+        return {
+            "id": self.id,
+            "version": self.version,
+            "log_length": self.log_length,
+            "name": self.name,
+            "total_teams": self.total_teams,
+            "budget_per_team": self.budget_per_team,
+            "roster_size": self.roster_size,
+            "position_requirements": dict(self.position_requirements),
+            "teams": teams,
+            "all_picks": picks,
+            "created_at": self.created_at,
+        }
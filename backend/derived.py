@@ -0,0 +1,49 @@
+"""Background writes of data derived from league commits (pick history, price rollups), in commit order"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class DerivedWriter:
+    """Runs jobs one at a time, in the order they were submitted, on a background task.
+
+    League actors hand a commit's derived writes here instead of awaiting
+    them, so a pick is acknowledged at the cost of the league write alone
+    (a journal append in write-behind mode). The derived data lags by
+    whatever is queued ahead; readers that need it current `flush()` first.
+    A failing job is logged and the queue moves on.
+    """
+
+    def __init__(self):
+        self._pending: Deque[Tuple[Job, str]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, job: Job, description: str) -> None:
+        self._pending.append((job, description))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            job, description = self._pending.popleft()
+            try:
+                await job()
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{description} failed: {str(e)}")
+            self.completed += 1
+
+    async def flush(self) -> None:
+        """Wait until every job submitted so far has run"""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "completed": self.completed, "failed": self.failed}
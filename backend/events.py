@@ -0,0 +1,244 @@
+"""Cross-worker invalidation bus: in-process and Redis (RESP) pub/sub implementations"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Channels
+LEAGUE_CHANNEL = "ff_auction:league"
+CATALOG_CHANNEL = "ff_auction:catalog"
+
+# Unique per worker process, so a worker ignores its own announcements
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class EventBus(ABC):
+    """Publish small JSON events to every other worker.
+
+    Handlers receive the published message dict. After a lost connection a
+    bus may have missed events, so it delivers `{"type": "resync"}` to every
+    handler; subscribers should then drop everything they cache.
+    """
+
+    def __init__(self, worker_id: str = WORKER_ID):
+        self.worker_id = worker_id
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers[channel].append(handler)
+
+    async def _dispatch(self, channel: str, message: Dict[str, Any]) -> None:
+        self.received += 1
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Event handler for {channel} failed: {str(e)}")
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        ...
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"published": self.published, "received": self.received}
+
+
+class InProcessBus(EventBus):
+    """Single-worker bus; the only subscribers are in this process.
+
+    Messages from this worker are not delivered back to it, matching the
+    Redis bus, so with one worker publishing is a no-op.
+    """
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self.published += 1
+        message = {**message, "origin": message.get("origin", self.worker_id)}
+        if message["origin"] != self.worker_id:
+            await self._dispatch(channel, message)
+
+
+def encode_command(*args: Any) -> bytes:
+    """RESP array of bulk strings"""
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RespError(Exception):
+    pass
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Read one RESP reply"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RespError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length == -1:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        length = int(body)
+        if length == -1:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Unexpected reply: {line!r}")
+
+
+class RedisBus(EventBus):
+    """Pub/sub over the Redis protocol with plain asyncio streams.
+
+    One connection is dedicated to SUBSCRIBE; publishes go over a second one.
+    The subscriber reconnects with backoff and delivers a resync event after
+    every reconnect.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        reconnect_delay: float = 0.5,
+        max_reconnect_delay: float = 10.0,
+        worker_id: str = WORKER_ID,
+    ):
+        super().__init__(worker_id)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._publisher: Optional[tuple] = None
+        self._publish_lock = asyncio.Lock()
+        self._subscriber_task: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+        self.reconnects = 0
+
+    async def _connect(self) -> tuple:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(encode_command("AUTH", self.password))
+            await writer.drain()
+            await read_reply(reader)
+        return reader, writer
+
+    async def start(self) -> None:
+        # Subscribe before starting; channels registered later aren't picked up
+        if not self._handlers:
+            return
+        self._subscriber_task = asyncio.get_running_loop().create_task(self._subscribe_loop())
+        try:
+            await asyncio.wait_for(self._subscribed.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.error(f"Event bus: could not subscribe at {self.host}:{self.port} yet, retrying in background")
+
+    async def _subscribe_loop(self) -> None:
+        delay = self.reconnect_delay
+        first = True
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._connect()
+                channels = list(self._handlers)
+                writer.write(encode_command("SUBSCRIBE", *channels))
+                await writer.drain()
+                for _ in channels:
+                    await read_reply(reader)
+                self._subscribed.set()
+                delay = self.reconnect_delay
+                if not first:
+                    self.reconnects += 1
+                    for channel in channels:
+                        await self._dispatch(channel, {"type": "resync"})
+                first = False
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        message = json.loads(reply[2])
+                        if message.get("origin") != self.worker_id:
+                            await self._dispatch(reply[1].decode(), message)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, RespError, ValueError) as e:
+                self._subscribed.clear()
+                logger.warning(f"Event bus subscriber disconnected ({str(e)}), reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        payload = json.dumps({**message, "origin": self.worker_id}, separators=(",", ":"))
+        async with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publisher is None:
+                        self._publisher = await self._connect()
+                    reader, writer = self._publisher
+                    writer.write(encode_command("PUBLISH", channel, payload))
+                    await writer.drain()
+                    await read_reply(reader)
+                    self.published += 1
+                    return
+                except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                    self._close_publisher()
+                    if attempt:
+                        logger.error(f"Event bus publish to {channel} failed: {str(e)}")
+
+    def _close_publisher(self) -> None:
+        if self._publisher is not None:
+            self._publisher[1].close()
+            self._publisher = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "connected": self._subscribed.is_set(), "reconnects": self.reconnects}
+
+    async def close(self) -> None:
+        if self._subscriber_task:
+            self._subscriber_task.cancel()
+            self._subscriber_task = None
+        self._close_publisher()
+
+
+def create_event_bus() -> EventBus:
+    """Redis bus when EVENT_BUS_URL (redis://host:port) is set, otherwise in-process.
+
+    The in-process bus cannot reach other workers, whose live leagues and
+    caches would then never be invalidated, so it refuses to start when
+    WEB_CONCURRENCY asks for more than one worker.
+    """
+    url = os.environ.get('EVENT_BUS_URL')
+    if url:
+        return RedisBus(url)
+    if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+        raise RuntimeError("Running several workers (WEB_CONCURRENCY > 1) needs EVENT_BUS_URL for cache invalidation")
+    return InProcessBus()
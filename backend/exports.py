@@ -0,0 +1,116 @@
+"""Streaming CSV / JSON Lines exports of draft results"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List
+
+from rules import budget_metrics
+
+EXPORT_FORMATS = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+PICK_COLUMNS = [
+    "league_id", "league_name", "pick_number", "pick_id", "team_id", "team_name",
+    "player_name", "position", "nfl_team", "etr_rank", "adp", "pos_rank", "amount", "timestamp",
+]
+ROSTER_COLUMNS = [
+    "league_id", "league_name", "team_id", "team_name", "budget", "spent", "remaining", "max_bid",
+    "players", "roster",
+]
+
+# Only what the rows need; skips teams.roster, which repeats every pick
+EXPORT_FIELDS = [
+    "id", "name", "roster_size", "all_picks",
+    "teams.id", "teams.name", "teams.budget", "teams.spent",
+]
+
+Rows = Callable[[Dict[str, Any]], Iterator[Dict[str, Any]]]
+
+
+def pick_rows(league: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    team_names = {team["id"]: team["name"] for team in league["teams"]}
+    for number, pick in enumerate(league["all_picks"], start=1):
+        player = pick["player"]
+        yield {
+            "league_id": league["id"],
+            "league_name": league["name"],
+            "pick_number": number,
+            "pick_id": pick["id"],
+            "team_id": pick["team_id"],
+            "team_name": team_names.get(pick["team_id"], ""),
+            "player_name": player["name"],
+            "position": player["position"],
+            "nfl_team": player["nfl_team"],
+            "etr_rank": player.get("etr_rank"),
+            "adp": player.get("adp"),
+            "pos_rank": player.get("pos_rank"),
+            "amount": pick["amount"],
+            "timestamp": pick["timestamp"],
+        }
+
+
+def roster_rows(league: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    rosters: Dict[str, List[Dict[str, Any]]] = {team["id"]: [] for team in league["teams"]}
+    for pick in league["all_picks"]:
+        rosters.setdefault(pick["team_id"], []).append(pick)
+    for team in league["teams"]:
+        roster = rosters[team["id"]]
+        remaining, max_bid, _, _, _ = budget_metrics(team["budget"], team["spent"], len(roster), league["roster_size"])
+        yield {
+            "league_id": league["id"],
+            "league_name": league["name"],
+            "team_id": team["id"],
+            "team_name": team["name"],
+            "budget": team["budget"],
+            "spent": team["spent"],
+            "remaining": remaining,
+            "max_bid": max_bid,
+            "players": len(roster),
+            "roster": [
+                {"name": pick["player"]["name"], "position": pick["player"]["position"], "amount": pick["amount"]}
+                for pick in roster
+            ],
+        }
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        # Rosters flatten to "Name (POS) $amount; ..."
+        return "; ".join(f"{item['name']} ({item['position']}) ${item['amount']}" for item in value)
+    return "" if value is None else value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], export_format: str, columns: List[str]) -> bytes:
+    if export_format == "jsonl":
+        return "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+    return buffer.getvalue().encode()
+
+
+def csv_header(columns: List[str]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+    batches: AsyncIterator[List[Dict[str, Any]]], rows: Rows, export_format: str, columns: List[str]
+) -> AsyncIterator[bytes]:
+    """One encoded chunk per batch of leagues, so only a batch is ever held in memory"""
+    if export_format == "csv":
+        yield csv_header(columns)
+    async for leagues in batches:
+        chunk = encode_rows((row for league in leagues for row in rows(league)), export_format, columns)
+        if chunk:
+            yield chunk
@@ -0,0 +1,157 @@
+"""Copy-on-write what-if forks of live leagues"""
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from compact import CompactLeague
+
+
+class LeagueFork:
+    """A child league that shares its parent's first `fork_point` picks and stores only its own.
+
+    Until the parent rewrites that shared prefix (an undo inside it, a
+    settings or team change), `base` is None and reads slice the parent's
+    live state. Just before such a rewrite the prefix is copied into `base`
+    and the fork stops following the parent.
+    """
+    __slots__ = ("id", "parent_id", "name", "fork_point", "base", "picks", "created_at", "last_access")
+
+    def __init__(self, parent_id: str, name: str, fork_point: int):
+        self.id = str(uuid.uuid4())
+        self.parent_id = parent_id
+        self.name = name
+        self.fork_point = fork_point
+        self.base: Optional[CompactLeague] = None
+        self.picks: List[Dict[str, Any]] = []  # Own picks in their document shape
+        self.created_at = datetime.utcnow()
+        self.last_access = time.monotonic()
+
+    def merged(self, parent: CompactLeague) -> CompactLeague:
+        """The fork's board: the shared prefix plus its own picks, in a state of its own"""
+        state = (self.base or parent).prefix(self.fork_point)
+        for pick in self.picks:
+            state.append_pick(pick)
+        state.id = self.id
+        state.name = self.name
+        state.version = len(self.picks)
+        return state
+
+    def undo(self, parent: CompactLeague, pick_id: str) -> None:
+        for index, pick in enumerate(self.picks):
+            if pick["id"] == pick_id:
+                del self.picks[index]
+                return
+        shared = (self.base or parent).pick_index(pick_id)
+        if shared is not None and shared < self.fork_point:
+            raise HTTPException(status_code=400, detail="Pick is shared with the parent league; undo it there")
+        raise HTTPException(status_code=404, detail="Pick not found")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "fork_point": self.fork_point,
+            "own_picks": len(self.picks),
+            "shares_parent": self.base is None,
+            "created_at": self.created_at,
+        }
+
+
+class ForkStore:
+    """Forks by parent league, in this worker's memory.
+
+    Forks untouched for `ttl` seconds are dropped lazily (a league's on its
+    next fork access, all of them whenever a fork is created), and each
+    league keeps at most `max_forks_per_league`, evicting the least
+    recently used. Forks of a deleted league go with `forget_league`.
+    """
+
+    def __init__(self, ttl: float = 7200.0, max_forks_per_league: int = 64):
+        self.ttl = ttl
+        self.max_forks_per_league = max_forks_per_league
+        self._forks: Dict[str, "OrderedDict[str, LeagueFork]"] = {}
+        self.created = 0
+        self.detached = 0
+        self.collected = 0
+
+    def create(self, parent: CompactLeague, at_pick: Optional[int] = None, name: Optional[str] = None) -> LeagueFork:
+        self.collect()
+        picks = len(parent.pick_amount)
+        fork_point = picks if at_pick is None else at_pick
+        if not 0 <= fork_point <= picks:
+            raise HTTPException(status_code=400, detail=f"at_pick must be between 0 and {picks}")
+        fork = LeagueFork(parent.id, name or f"{parent.name} (what-if @ {fork_point})", fork_point)
+        forks = self._forks.setdefault(parent.id, OrderedDict())
+        forks[fork.id] = fork
+        while len(forks) > self.max_forks_per_league:
+            forks.popitem(last=False)
+            self.collected += 1
+        self.created += 1
+        return fork
+
+    def get(self, parent_id: str, fork_id: str) -> LeagueFork:
+        self._collect(parent_id)
+        fork = self._forks.get(parent_id, {}).get(fork_id)
+        if fork is None:
+            raise HTTPException(status_code=404, detail="Fork not found")
+        fork.last_access = time.monotonic()
+        self._forks[parent_id].move_to_end(fork_id)
+        return fork
+
+    def list(self, parent_id: str) -> List[LeagueFork]:
+        self._collect(parent_id)
+        return list(self._forks.get(parent_id, {}).values())
+
+    def discard(self, parent_id: str, fork_id: str) -> bool:
+        forks = self._forks.get(parent_id, {})
+        if forks.pop(fork_id, None) is None:
+            return False
+        if not forks:
+            self._forks.pop(parent_id, None)
+        return True
+
+    def forget_league(self, parent_id: str) -> None:
+        self.collected += len(self._forks.pop(parent_id, {}))
+
+    def detach(self, parent: CompactLeague, from_index: int = -1) -> None:
+        """Called before the parent rewrites its picks from `from_index` on: forks sharing them take a copy.
+
+        The default covers changes to the parent's teams or settings, which every fork shares.
+        """
+        for fork in self._forks.get(parent.id, {}).values():
+            if fork.base is None and fork.fork_point > from_index:
+                fork.base = parent.prefix(fork.fork_point)
+                self.detached += 1
+
+    def collect(self) -> None:
+        """Drop forks idle for longer than the TTL"""
+        for parent_id in list(self._forks):
+            self._collect(parent_id)
+
+    def _collect(self, parent_id: str) -> None:
+        forks = self._forks.get(parent_id)
+        if forks is None:
+            return
+        cutoff = time.monotonic() - self.ttl
+        # Kept in access order, so idle forks are at the front
+        while forks and next(iter(forks.values())).last_access < cutoff:
+            forks.popitem(last=False)
+            self.collected += 1
+        if not forks:
+            del self._forks[parent_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leagues": len(self._forks),
+            "forks": sum(len(forks) for forks in self._forks.values()),
+            "sharing_parent": sum(fork.base is None for forks in self._forks.values() for fork in forks.values()),
+            "own_picks": sum(len(fork.picks) for forks in self._forks.values() for fork in forks.values()),
+            "created": self.created,
+            "detached": self.detached,
+            "collected": self.collected,
+        }
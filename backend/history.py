@@ -0,0 +1,186 @@
+"""Pick event log with periodic checkpoints, for rebuilding a league as it stood after any pick"""
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from compact import CompactLeague
+from storage import LeagueRepository, mongo_database
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_EVERY = 16
+
+
+class PickHistory(ABC):
+    """Per-league log of picks and undos, numbered by the league's `log_length`.
+
+    Event `seq` is the league's `log_length` right after that pick or undo;
+    a checkpoint at `seq` is the whole league document at that point. The
+    league as created is checkpoint 0, every `CHECKPOINT_EVERY`-th event
+    writes one, and settings/team changes rewrite the one at the current
+    position, so replay never has to cross them.
+    """
+
+    def __init__(self, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.checkpoint_every = checkpoint_every
+        # Leagues whose log is missing an event and that still need a checkpoint past it
+        self._gaps: Set[str] = set()
+
+    @abstractmethod
+    async def append(self, league_id: str, seq: int, event: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def checkpoint(self, league_id: str, seq: int, document: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def nearest_checkpoint(self, league_id: str, seq: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Latest checkpoint at or before `seq`"""
+
+    @abstractmethod
+    async def events(self, league_id: str, after: int, upto: int) -> List[Dict[str, Any]]:
+        """Events with after < seq <= upto, in order"""
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes history lookups rely on (idempotent)"""
+
+    async def checkpoint_many(self, documents: List[Dict[str, Any]]) -> None:
+        """Checkpoint several leagues where their histories stand; engines override this with a batched write"""
+        for document in documents:
+            await self.checkpoint(document["id"], document["log_length"], document)
+
+    async def record(self, document: Dict[str, Any], event: Dict[str, Any]) -> None:
+        """Log a committed pick or undo; `document` is the league right after it.
+
+        An event that can't be stored is replaced by a checkpoint at its
+        position, so replay to later picks never crosses the hole. If that
+        fails too, the league's next event checkpoints as well.
+        """
+        league_id, seq = document["id"], document["log_length"]
+        needs_checkpoint = seq % self.checkpoint_every == 0 or league_id in self._gaps
+        try:
+            await self.append(league_id, seq, event)
+        except Exception as e:
+            logger.error(f"Logging event {seq} of league {league_id} failed, checkpointing instead: {str(e)}")
+            needs_checkpoint = True
+        if needs_checkpoint:
+            self._gaps.add(league_id)
+            await self.checkpoint(league_id, seq, document)
+            self._gaps.discard(league_id)
+
+    async def state_at(self, league_id: str, seq: int) -> Optional[CompactLeague]:
+        """The league after its first `seq` events, None if the log doesn't cover that far back"""
+        nearest = await self.nearest_checkpoint(league_id, seq)
+        if nearest is None:
+            return None
+        start, document = nearest
+        events = await self.events(league_id, start, seq)
+        if len(events) != seq - start:
+            return None
+        state = CompactLeague.from_document(document)
+        for event in events:
+            replay(state, event)
+        state.log_length = seq
+        return state
+
+
+def replay(state: CompactLeague, event: Dict[str, Any]) -> None:
+    if event["type"] == "pick":
+        state.append_pick(event["pick"])
+    elif event["type"] == "undo":
+        index = state.pick_index(event["pick_id"])
+        if index is not None:
+            state.remove_pick(index)
+
+
+class InMemoryPickHistory(PickHistory):
+    """History for the memory storage engine; lost on restart"""
+
+    def __init__(self, checkpoint_every: int = CHECKPOINT_EVERY):
+        super().__init__(checkpoint_every)
+        self._events: Dict[str, Dict[int, Dict[str, Any]]] = defaultdict(dict)
+        self._checkpoints: Dict[str, Dict[int, Dict[str, Any]]] = defaultdict(dict)
+        self._checkpoint_seqs: Dict[str, List[int]] = defaultdict(list)
+
+    async def append(self, league_id: str, seq: int, event: Dict[str, Any]) -> None:
+        self._events[league_id][seq] = event
+
+    async def checkpoint(self, league_id: str, seq: int, document: Dict[str, Any]) -> None:
+        if seq not in self._checkpoints[league_id]:
+            bisect.insort(self._checkpoint_seqs[league_id], seq)
+        self._checkpoints[league_id][seq] = document
+
+    async def nearest_checkpoint(self, league_id: str, seq: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        seqs = self._checkpoint_seqs.get(league_id, [])
+        index = bisect.bisect_right(seqs, seq)
+        if index == 0:
+            return None
+        return seqs[index - 1], self._checkpoints[league_id][seqs[index - 1]]
+
+    async def events(self, league_id: str, after: int, upto: int) -> List[Dict[str, Any]]:
+        events = self._events.get(league_id, {})
+        return [events[seq] for seq in range(after + 1, upto + 1) if seq in events]
+
+
+class MongoPickHistory(PickHistory):
+    """`pick_events` and `league_checkpoints` collections next to `leagues`"""
+
+    def __init__(self, db, checkpoint_every: int = CHECKPOINT_EVERY):
+        super().__init__(checkpoint_every)
+        self.events_collection = db.pick_events
+        self.checkpoints_collection = db.league_checkpoints
+
+    async def ensure_indexes(self) -> None:
+        from pymongo.errors import OperationFailure
+
+        try:
+            await self.events_collection.create_index([("league_id", 1), ("seq", 1)], unique=True)
+            await self.checkpoints_collection.create_index([("league_id", 1), ("seq", -1)], unique=True)
+        except OperationFailure as e:
+            logger.error(f"Could not create pick history indexes: {str(e)}")
+
+    async def append(self, league_id: str, seq: int, event: Dict[str, Any]) -> None:
+        await self.events_collection.replace_one(
+            {"league_id": league_id, "seq": seq}, {"league_id": league_id, "seq": seq, "event": event}, upsert=True
+        )
+
+    async def checkpoint(self, league_id: str, seq: int, document: Dict[str, Any]) -> None:
+        await self.checkpoints_collection.replace_one(
+            {"league_id": league_id, "seq": seq}, {"league_id": league_id, "seq": seq, "league": document}, upsert=True
+        )
+
+    async def checkpoint_many(self, documents: List[Dict[str, Any]]) -> None:
+        from pymongo import ReplaceOne
+
+        if documents:
+            await self.checkpoints_collection.bulk_write([
+                ReplaceOne(
+                    {"league_id": document["id"], "seq": document["log_length"]},
+                    {"league_id": document["id"], "seq": document["log_length"], "league": document},
+                    upsert=True,
+                )
+                for document in documents
+            ], ordered=False)
+
+    async def nearest_checkpoint(self, league_id: str, seq: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        found = await self.checkpoints_collection.find_one(
+            {"league_id": league_id, "seq": {"$lte": seq}}, {"_id": 0}, sort=[("seq", -1)]
+        )
+        return (found["seq"], found["league"]) if found else None
+
+    async def events(self, league_id: str, after: int, upto: int) -> List[Dict[str, Any]]:
+        cursor = self.events_collection.find(
+            {"league_id": league_id, "seq": {"$gt": after, "$lte": upto}}, {"_id": 0, "event": 1}
+        ).sort("seq", 1)
+        return [found["event"] async for found in cursor]
+
+
+def create_pick_history(repository: LeagueRepository) -> PickHistory:
+    """Mongo-backed history when the league repository is (or writes behind to) MongoDB, else in memory"""
+    db = mongo_database(repository)
+    if db is not None:
+        return MongoPickHistory(db)
+    return InMemoryPickHistory()
@@ -0,0 +1,162 @@
+"""Idempotency-Key support for mutating league endpoints"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Statuses below 500 that tell the client to retry (409: another worker won the league write)
+RETRYABLE_STATUSES = (409,)
+
+# (status, headers, body) of a finished response
+StoredResponse = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "response")
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.response: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class IdempotencyStore:
+    """Responses by (league, Idempotency-Key), bounded per league and expired after `ttl` seconds.
+
+    A key is claimed when its first request starts; a retry that arrives
+    while that request is still running waits for its response instead of
+    running the work a second time.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_keys_per_league: int = 256, max_leagues: int = 10000):
+        self.ttl = ttl
+        self.max_keys_per_league = max_keys_per_league
+        self.max_leagues = max_leagues
+        self._leagues: "OrderedDict[str, OrderedDict[str, _Entry]]" = OrderedDict()
+        self.replays = 0
+
+    def claim(self, league_id: str, key: str, fingerprint: str) -> Tuple[_Entry, bool]:
+        """Entry for the key, and whether this caller is the one that has to produce its response"""
+        now = time.monotonic()
+        entries = self._leagues.get(league_id)
+        if entries is None:
+            entries = self._leagues[league_id] = OrderedDict()
+            while len(self._leagues) > self.max_leagues:
+                self._leagues.popitem(last=False)
+        else:
+            self._leagues.move_to_end(league_id)
+            # Keys are kept in claim order, so expired ones are at the front
+            while entries and next(iter(entries.values())).expires_at <= now:
+                entries.popitem(last=False)
+
+        entry = entries.get(key)
+        if entry is not None:
+            self.replays += 1
+            return entry, False
+        entry = entries[key] = _Entry(fingerprint, now + self.ttl)
+        while len(entries) > self.max_keys_per_league:
+            entries.popitem(last=False)
+        return entry, True
+
+    def release(self, league_id: str, key: str) -> None:
+        """Forget a key whose request failed, so a retry runs it again"""
+        entries = self._leagues.get(league_id)
+        if entries is not None:
+            entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "leagues": len(self._leagues),
+            "keys": sum(len(entries) for entries in self._leagues.values()),
+            "replays": self.replays,
+        }
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated `Idempotency-Key` on mutating league requests.
+
+    Keys are scoped to the league in the path (`/api/leagues/{id}/...`;
+    league creation shares one scope). Reusing a key for a different
+    method, path or body is a 422. Server errors and other retryable
+    statuses aren't stored, so the client's next retry gets a fresh attempt.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, paths: Tuple[str, ...] = ("/api/leagues", "/api/demo-league")):
+        self.app = app
+        self.store = store
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS or not scope["path"].startswith(self.paths):
+            return await self.app(scope, receive, send)
+        key = dict(scope["headers"]).get(b"idempotency-key")
+        if not key:
+            return await self.app(scope, receive, send)
+
+        # Buffer the body so it can be fingerprinted and then handed to the route unchanged
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(
+            b"\n".join([scope["method"].encode(), scope["path"].encode(), scope["query_string"], body])
+        ).hexdigest()
+        league_id = scope["path"].split("/")[3] if scope["path"].startswith("/api/leagues/") else ""
+        key = key.decode("latin-1")
+
+        entry, owner = self.store.claim(league_id, key, fingerprint)
+        if not owner:
+            if entry.fingerprint != fingerprint:
+                return await self._send(send, (422, [(b"content-type", b"application/json")], json.dumps(
+                    {"detail": "Idempotency-Key was already used for a different request"}
+                ).encode()))
+            status, headers, response_body = await asyncio.shield(entry.response)
+            return await self._send(send, (status, headers + [(b"idempotent-replayed", b"true")], response_body))
+
+        sent = False
+
+        async def replay_body():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        start: Dict[str, Any] = {}
+        response_chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except Exception as e:
+            self.store.release(league_id, key)
+            entry.response.set_exception(e)
+            entry.response.exception()  # Mark retrieved in case no retry was waiting
+            raise
+        except asyncio.CancelledError:
+            self.store.release(league_id, key)
+            entry.response.cancel()
+            raise
+
+        response = (start.get("status", 500), list(start.get("headers", [])), b"".join(response_chunks))
+        if response[0] >= 500 or response[0] in RETRYABLE_STATUSES:
+            self.store.release(league_id, key)
+        entry.response.set_result(response)
+
+    @staticmethod
+    async def _send(send, response: StoredResponse) -> None:
+        status, headers, body = response
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,261 @@
+"""Streaming ingestion and consensus merge of several ranking/ADP/projection files"""
+import argparse
+import csv
+import json
+import logging
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from catalog import CATALOG_COLUMNS, CatalogLoadError, PlayerCatalog
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnMapping(BaseModel):
+    """Which CSV columns hold each field. rank/adp may be absent from a source."""
+    name: str = "Name"
+    position: str = "Position"
+    team: str = "Team"
+    rank: Optional[str] = "ETR Rank"
+    adp: Optional[str] = "ADP"
+
+
+# Built-in layouts, referenced by name from RankingSource.mapping
+COLUMN_MAPPINGS: Dict[str, ColumnMapping] = {
+    "etr": ColumnMapping(),
+    "fantasypros_adp": ColumnMapping(name="Player", position="POS", team="Team", rank=None, adp="AVG"),
+    "projections": ColumnMapping(name="Player", position="Pos", team="Team", rank="Rank", adp=None),
+}
+
+
+class RankingSource(BaseModel):
+    path: str
+    mapping: Union[str, ColumnMapping] = "etr"
+    weight: float = 1.0
+
+
+class CatalogMerge(BaseModel):
+    sources: List[RankingSource]
+    aliases: Dict[str, str] = {}  # Name as a source spells it -> name to merge it under
+
+
+class IngestStats(BaseModel):
+    rows: int = 0
+    skipped_rows: int = 0
+    players: int = 0
+    rows_per_source: Dict[str, int] = {}
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+POSITION_ALIASES = {"DEF": "DST", "D/ST": "DST", "D": "DST", "PK": "K"}
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_position(position: str) -> str:
+    """'RB12' -> 'RB', 'DEF' -> 'DST'"""
+    position = position.strip().strip('"').upper().rstrip("0123456789")
+    return POSITION_ALIASES.get(position, position)
+
+
+def player_key(name: str, position: str, team: str) -> Tuple[str, str]:
+    """Identity of a player across sources: normalized name + position (team for defenses)"""
+    if position == "DST":
+        return ("dst", team.strip().upper())
+    words = _NON_ALNUM.sub("", name.lower().replace("-", " ")).split()
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return (" ".join(words), position)
+
+
+def _to_number(value: str) -> Optional[float]:
+    value = value.strip().strip('"')
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    # ETR uses 999 for "unranked"
+    return None if number >= 999 else number
+
+
+def resolve_mapping(mapping: Union[str, ColumnMapping]) -> ColumnMapping:
+    if isinstance(mapping, ColumnMapping):
+        return mapping
+    if mapping not in COLUMN_MAPPINGS:
+        raise CatalogLoadError(f"Unknown column mapping: {mapping}")
+    return COLUMN_MAPPINGS[mapping]
+
+
+def iter_source_rows(
+    source: RankingSource, stats: IngestStats
+) -> Iterator[Tuple[Tuple[str, str], str, str, str, Optional[float], Optional[float]]]:
+    """Yield (key, name, position, team, rank, adp) one CSV row at a time"""
+    mapping = resolve_mapping(source.mapping)
+    with open(source.path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [column.strip().strip('"') for column in next(reader, [])]
+        try:
+            name_i = header.index(mapping.name)
+            position_i = header.index(mapping.position)
+            team_i = header.index(mapping.team)
+            rank_i = header.index(mapping.rank) if mapping.rank else None
+            adp_i = header.index(mapping.adp) if mapping.adp else None
+        except ValueError as e:
+            raise CatalogLoadError(f"{source.path}: missing column ({str(e)})")
+
+        count = skipped = 0
+        keys: Dict[Tuple[str, str, str], Tuple[str, str]] = {}
+        for row in reader:
+            try:
+                name = row[name_i].strip().strip('"')
+                position = normalize_position(row[position_i])
+                team = row[team_i].strip().strip('"')
+                rank = _to_number(row[rank_i]) if rank_i is not None else None
+                adp = _to_number(row[adp_i]) if adp_i is not None else None
+            except IndexError:
+                skipped += 1
+                continue
+            if not name or not position:
+                skipped += 1
+                continue
+            count += 1
+            # Projection files repeat each player many times; resolve each identity once per file
+            key = keys.get((name, position, team))
+            if key is None:
+                key = keys[(name, position, team)] = player_key(name, position, team)
+            yield key, name, position, team, rank, adp
+        stats.rows_per_source[source.path] = count
+        stats.rows += count
+        stats.skipped_rows += skipped
+
+
+class _Consensus:
+    """Running weighted sums for one resolved player"""
+    __slots__ = ("name", "position", "team", "rank_sum", "rank_weight", "adp_sum", "adp_weight")
+
+    def __init__(self, name: str, position: str, team: str):
+        self.name = name
+        self.position = position
+        self.team = team
+        self.rank_sum = 0.0
+        self.rank_weight = 0.0
+        self.adp_sum = 0.0
+        self.adp_weight = 0.0
+
+
+def merge_sources(
+    sources: List[RankingSource], aliases: Optional[Dict[str, str]] = None
+) -> Tuple[List[Dict], IngestStats]:
+    """Stream every source and merge them into consensus catalog players.
+
+    Memory is bounded by the number of distinct players, not by file size:
+    only the running sums (and a resolved-identity memo) per player are
+    kept while rows stream through.
+
+    Consensus rank is the order of the weighted mean source rank (falling
+    back to ADP for players no source ranks); ADP is the weighted mean ADP.
+    """
+    stats = IngestStats()
+    started = time.perf_counter()
+    aliases = {player_key(k, "", "")[0]: player_key(v, "", "")[0] for k, v in (aliases or {}).items()}
+    merged: Dict[Tuple[str, str], _Consensus] = {}
+
+    for source in sources:
+        for key, name, position, team, rank, adp in iter_source_rows(source, stats):
+            if key[0] in aliases:
+                key = (aliases[key[0]], key[1])
+            entry = merged.get(key)
+            if entry is None:
+                entry = merged[key] = _Consensus(name, position, team)
+            elif not entry.team and team:
+                entry.team = team
+            if rank is not None:
+                entry.rank_sum += rank * source.weight
+                entry.rank_weight += source.weight
+            if adp is not None:
+                entry.adp_sum += adp * source.weight
+                entry.adp_weight += source.weight
+
+    def sort_key(entry: _Consensus):
+        rank = entry.rank_sum / entry.rank_weight if entry.rank_weight else None
+        adp = entry.adp_sum / entry.adp_weight if entry.adp_weight else None
+        return (rank is None, rank if rank is not None else adp if adp is not None else 999.0, entry.name)
+
+    players = []
+    position_counts: Dict[str, int] = {}
+    for overall, entry in enumerate(sorted(merged.values(), key=sort_key), start=1):
+        position_counts[entry.position] = position_counts.get(entry.position, 0) + 1
+        players.append({
+            "name": entry.name,
+            "position": entry.position,
+            "nfl_team": entry.team,
+            "etr_rank": overall,
+            "adp": round(entry.adp_sum / entry.adp_weight, 1) if entry.adp_weight else 999.0,
+            "pos_rank": f"{entry.position}{position_counts[entry.position]:02d}",
+        })
+
+    stats.players = len(players)
+    stats.seconds = time.perf_counter() - started
+    return players, stats
+
+
+def build_merged_catalog(
+    sources: List[RankingSource], aliases: Optional[Dict[str, str]] = None
+) -> Tuple[PlayerCatalog, IngestStats]:
+    """Merge sources into a catalog snapshot (blocking - run it in a thread)"""
+    try:
+        players, stats = merge_sources(sources, aliases)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        logger.error(f"Reading ranking sources failed: {str(e)}")
+        raise CatalogLoadError("Could not read ranking sources")
+    if not players:
+        raise CatalogLoadError("No players found in ranking sources")
+    logger.info(f"Merged {stats.rows} rows from {len(sources)} sources into {stats.players} players "
+                f"({stats.rows_per_second:.0f} rows/sec)")
+    return PlayerCatalog(players, source="merge"), stats
+
+
+def write_catalog_csv(players: List[Dict], path: str) -> None:
+    """Write merged players in the ETR column layout so the catalog reload path can load them"""
+    headers = ["Name", "Position", "Team", "ETR Rank", "ADP", "Pos Rank ETR"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for player in players:
+            writer.writerow([player[col] for col in CATALOG_COLUMNS])
+
+
+def _parse_source_arg(arg: str) -> RankingSource:
+    # path[:mapping[:weight]]
+    parts = arg.split(":")
+    return RankingSource(
+        path=parts[0],
+        mapping=parts[1] if len(parts) > 1 and parts[1] else "etr",
+        weight=float(parts[2]) if len(parts) > 2 else 1.0,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge ranking files into one consensus rankings CSV")
+    parser.add_argument("sources", nargs="+", help="path[:mapping[:weight]], mappings: " + ", ".join(COLUMN_MAPPINGS))
+    parser.add_argument("-o", "--output", required=True, help="merged CSV (ETR layout)")
+    parser.add_argument("--aliases", help='JSON file of {"name as spelled in a source": "name to merge it under"}')
+    args = parser.parse_args()
+
+    name_aliases = None
+    if args.aliases:
+        with open(args.aliases, encoding="utf-8") as f:
+            name_aliases = json.load(f)
+    merged_players, merge_stats = merge_sources([_parse_source_arg(arg) for arg in args.sources], name_aliases)
+    write_catalog_csv(merged_players, args.output)
+    print(f"{merge_stats.rows} rows -> {merge_stats.players} players in {merge_stats.seconds:.2f}s "
+          f"({merge_stats.rows_per_second:.0f} rows/sec)")
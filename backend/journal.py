@@ -0,0 +1,337 @@
+"""Write-behind league storage backed by a durable local journal"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from storage import LeagueRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    """One journal line; datetimes are tagged so replay restores them as datetimes"""
+    return json.dumps(record, default=_encode_value, separators=(",", ":")).encode() + b"\n"
+
+
+def decode_record(line: bytes) -> Dict[str, Any]:
+    return json.loads(line, object_hook=_decode_object)
+
+
+class Journal:
+    """Append-only, fsync'd record log split into numbered segment files.
+
+    Appends from concurrent requests are group-committed: whatever queued up
+    while the previous write was syncing goes out in one write and one fsync.
+    `on_commit` is called with each record, in order, as soon as it is
+    durable and before its appender resumes, so a segment sealed by
+    `rotate` never holds a record whose effect hasn't been applied yet.
+    """
+
+    def __init__(self, directory: str, on_commit: Callable[[Dict[str, Any]], None]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.on_commit = on_commit
+        self._file = None
+        self._segment: Optional[Path] = None
+        self._pending: List[Tuple[Dict[str, Any], bytes, asyncio.Future]] = []
+        self._writer: Optional[asyncio.Task] = None
+        self.appends = 0
+        self.syncs = 0
+
+    def segments(self) -> List[Path]:
+        return sorted(self.directory.glob("segment-*.log"), key=lambda p: int(p.stem.split("-")[1]))
+
+    def read_records(self, segments: List[Path]) -> List[Dict[str, Any]]:
+        records = []
+        for segment in segments:
+            with open(segment, "rb") as f:
+                for line in f:
+                    try:
+                        records.append(decode_record(line))
+                    except ValueError:
+                        # Torn final write from a crash: nothing after it was acknowledged
+                        logger.warning(f"Skipping unreadable journal entry in {segment.name}")
+                        break
+        return records
+
+    def open_segment(self) -> Path:
+        """Start a new segment; returns the segment that was active before it"""
+        previous = self._segment
+        if self._file:
+            self._file.close()
+        existing = self.segments()
+        number = int(existing[-1].stem.split("-")[1]) + 1 if existing else 1
+        self._segment = self.directory / f"segment-{number}.log"
+        self._file = open(self._segment, "ab")
+        return previous
+
+    async def append(self, record: Dict[str, Any]) -> None:
+        """Durably append a record; returns once it has been fsync'd"""
+        if self._file is None:
+            raise RuntimeError("Journal is not open")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, encode_record(record), future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._write_pending())
+        await future
+
+    async def _write_pending(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await run_in_threadpool(self._write_and_sync, b"".join(line for _, line, _ in batch))
+            except Exception as e:
+                # Whatever went wrong, every appender in the batch hears about it instead of waiting forever
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.appends += len(batch)
+            self.syncs += 1
+            for record, _, future in batch:
+                self.on_commit(record)
+                future.set_result(None)
+
+    def _write_and_sync(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def rotate(self) -> Optional[Path]:
+        """Seal the active segment once no write is in flight and open a fresh one"""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+        return self.open_segment()
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class WriteBehindLeagueRepository(LeagueRepository):
+    """Authoritative league state in memory, journaled locally, flushed to `backing` in the background.
+
+    A write is acknowledged as soon as its journal record is fsync'd. Every
+    `flush_interval` seconds the latest version of each changed league is
+    written to the backing store in one batch (so many picks to one league
+    coalesce into a single write), after which the journal segments those
+    changes came from are deleted. On start, whatever the journal still
+    holds is replayed into the backing store, so a crash loses no
+    acknowledged write.
+
+    The in-memory copy is the truth, so version checks (`replace_if_version`)
+    and reads are answered from it: this engine serves exactly one worker,
+    which `create_repository` enforces.
+    """
+
+    def __init__(
+        self,
+        backing: LeagueRepository,
+        journal_dir: str,
+        flush_interval: float = 1.0,
+        max_cached: int = 1000,
+    ):
+        self.backing = backing
+        self.journal = Journal(journal_dir, on_commit=self._apply)
+        self.flush_interval = flush_interval
+        self.max_cached = max_cached
+        self._leagues: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        self._flushing: Set[str] = set()  # Being written by the flush in progress; not safe to evict yet
+        self._deleted: Set[str] = set()
+        self._deleted_names: List[str] = []
+        self._sealed: List[Path] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.flushed_writes = 0
+
+    async def start(self) -> None:
+        await self.backing.start()
+        segments = self.journal.segments()
+        if segments:
+            records = await run_in_threadpool(self.journal.read_records, segments)
+            for record in records:
+                self._apply(record)
+            logger.info(f"Replaying {len(records)} journal records into storage")
+            self._sealed = segments
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep serving from memory; the flush loop retries and the segments stay until it succeeds
+                logger.error(f"Journal replay flush failed, will retry: {str(e)}")
+        self.journal.open_segment()
+        self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record["op"]
+        if op == "put":
+            league_id = record["id"]
+            self._leagues[league_id] = record["doc"]
+            self._leagues.move_to_end(league_id)
+            self._dirty.add(league_id)
+            self._deleted.discard(league_id)
+        elif op == "delete":
+            self._leagues.pop(record["id"], None)
+            self._dirty.discard(record["id"])
+            self._deleted.add(record["id"])
+        elif op == "delete_name":
+            for league_id in [i for i, league in self._leagues.items() if league["name"] == record["name"]]:
+                self._leagues.pop(league_id)
+                self._dirty.discard(league_id)
+            self._deleted_names.append(record["name"])
+
+    async def get(self, league_id: str) -> Optional[Dict[str, Any]]:
+        league = self._leagues.get(league_id)
+        if league is not None:
+            self._leagues.move_to_end(league_id)
+            return league
+        if league_id in self._deleted:
+            return None
+        league = await self.backing.get(league_id)
+        if league is not None and league["name"] in self._deleted_names:
+            # Not cached, so not rewritten since; a pending delete_by_name removes it
+            return None
+        if league is not None and league_id not in self._leagues:
+            self._leagues[league_id] = league
+            self._evict()
+        return league
+
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        leagues = {league["id"]: league for league in await self.backing.list(limit)}
+        for league_id in self._deleted:
+            leagues.pop(league_id, None)
+        for name in self._deleted_names:
+            leagues = {i: league for i, league in leagues.items() if league["name"] != name or i in self._dirty}
+        for league_id in self._dirty:
+            leagues[league_id] = self._leagues[league_id]
+        return list(leagues.values())[:limit]
+
+    async def iter_batches(self, batch_size: int = 100, fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        # Push pending changes first so the backing store's cursor sees them
+        await self.flush()
+        async for batch in self.backing.iter_batches(batch_size, fields):
+            yield batch
+
+    async def insert(self, league: Dict[str, Any]) -> None:
+        await self._put(league["id"], league)
+
+    async def insert_many(self, leagues: List[Dict[str, Any]]) -> Dict[str, str]:
+        # Appended together, so the whole batch shares one journal fsync
+        await asyncio.gather(*(self.journal.append({"op": "put", "id": league["id"], "doc": league}) for league in leagues))
+        self._evict()
+        return {}
+
+    async def replace(self, league_id: str, league: Dict[str, Any], upsert: bool = False) -> None:
+        if not upsert and await self.get(league_id) is None:
+            return
+        await self._put(league_id, league)
+
+    async def _put(self, league_id: str, league: Dict[str, Any]) -> None:
+        await self.journal.append({"op": "put", "id": league_id, "doc": league})
+        self._evict()
+
+    async def delete(self, league_id: str) -> int:
+        existed = await self.get(league_id) is not None
+        await self.journal.append({"op": "delete", "id": league_id})
+        return int(existed)
+
+    async def delete_by_name(self, name: str) -> int:
+        # The backing store may hold unloaded leagues with this name too; report what we know of
+        count = len([league for league in await self.list(10000) if league["name"] == name])
+        await self.journal.append({"op": "delete_name", "name": name})
+        return count
+
+    def _evict(self) -> None:
+        # Only clean leagues can be dropped; dirty ones are the unflushed truth
+        if len(self._leagues) <= self.max_cached:
+            return
+        for league_id in list(self._leagues):
+            if len(self._leagues) <= self.max_cached:
+                break
+            if league_id not in self._dirty and league_id not in self._flushing:
+                del self._leagues[league_id]
+
+    async def flush(self) -> None:
+        """Write every pending change to the backing store and drop the journal segments it covered"""
+        async with self._flush_lock:
+            if not (self._dirty or self._deleted or self._deleted_names or self._sealed):
+                return
+            if self.journal._file is not None:
+                sealed = await self.journal.rotate()
+                if sealed:
+                    self._sealed.append(sealed)
+            dirty, self._dirty = self._dirty, set()
+            # Deletes stay pending until the backing store has them, so reads keep hiding those leagues
+            deleted, deleted_names = set(self._deleted), list(self._deleted_names)
+            # Every dirty league is still cached (eviction skips dirty and in-flight ones)
+            documents = [self._leagues[i] for i in dirty]
+            self._flushing = dirty
+            started = time.perf_counter()
+            try:
+                for name in deleted_names:
+                    await self.backing.delete_by_name(name)
+                for league_id in deleted:
+                    await self.backing.delete(league_id)
+                await self.backing.replace_many(documents)
+            except Exception:
+                # Keep everything pending (newer changes win) and retry on the next flush
+                self._dirty |= {i for i in dirty if i in self._leagues}
+                raise
+            finally:
+                self._flushing = set()
+                self._evict()
+            self._deleted -= deleted
+            del self._deleted_names[:len(deleted_names)]
+            sealed, self._sealed = self._sealed, []
+            for segment in sealed:
+                segment.unlink(missing_ok=True)
+            self.flushes += 1
+            self.flushed_writes += len(dirty) + len(deleted) + len(deleted_names)
+            if dirty or deleted or deleted_names:
+                logger.debug(f"Flushed {len(dirty)} leagues in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed, will retry: {str(e)}")
+
+    async def ping(self) -> None:
+        await self.backing.ping()
+
+    async def ensure_indexes(self) -> None:
+        await self.backing.ensure_indexes()
+
+    async def close(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        try:
+            await self.flush()
+        finally:
+            self.journal.close()
+            await self.backing.close()
@@ -0,0 +1,376 @@
+"""In-process league actors: one mailbox-driven task owns each active league"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import tracing
+from compact import CompactLeague
+from storage import LeagueRepository
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Attempts at a command whose write lost a race with another worker before it fails with VersionConflict
+MAX_CONFLICT_RETRIES = 3
+
+
+class VersionConflict(RuntimeError):
+    """Other workers kept committing to the league first; the command was not applied"""
+
+
+class ActorStopped(RuntimeError):
+    """The league's actor stopped (eviction, deletion, shutdown) before it acknowledged the command"""
+
+
+# A command validates, then mutates the live CompactLeague in place. Raising before
+# mutating rejects it; commands never raise after they have started changing state.
+# Whatever the command returns is handed to the commit hook.
+Command = Callable[[CompactLeague], Any]
+
+# Called with the committed document and the command's result after each change is stored and
+# before it is acknowledged, one commit at a time in commit order (e.g. to log it or announce it)
+CommitHook = Callable[[Dict[str, Any], Any], Awaitable[None]]
+
+# Called with a live state just before the actor drops it for a reloaded one (or is stopped), e.g. so
+# what-if forks sharing its picks take a copy first
+ReplaceHook = Callable[[CompactLeague], None]
+
+
+class LeagueActor:
+    """Applies commands to one live league strictly in arrival order.
+
+    The live state is a `CompactLeague`; the public document is only built
+    for readers and for the write-through to storage. If that write fails
+    the state is reloaded from storage, so an unpersisted change is never
+    left visible. Every stored change bumps the league's `version`.
+    """
+
+    def __init__(
+        self,
+        league_id: str,
+        document: Dict[str, Any],
+        repository: LeagueRepository,
+        on_commit: Optional[CommitHook] = None,
+        on_replace: Optional[ReplaceHook] = None,
+    ):
+        self.league_id = league_id
+        self.repository = repository
+        self.on_commit = on_commit
+        self.on_replace = on_replace
+        self.state = CompactLeague.from_document(document)
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+        self.busy = False
+        # Set when the live state may hold a change that never reached storage; cleared by a reload
+        self.stale: Optional[Exception] = None
+        self._stopping = False
+        # Future of the command being run, failed if the actor is stopped mid-command
+        self._current: Optional[asyncio.Future] = None
+        self.last_active = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def idle(self) -> bool:
+        return not self.busy and self.mailbox.empty()
+
+    @property
+    def document(self) -> Dict[str, Any]:
+        return self.state.to_document()
+
+    async def submit(self, command: Command) -> Dict[str, Any]:
+        if self.stopped:
+            raise ActorStopped(f"League {self.league_id} actor has stopped")
+        future = asyncio.get_running_loop().create_future()
+        # The actor's task runs the command, so hand it the caller's trace explicitly
+        self.mailbox.put_nowait((command, future, tracing.current()))
+        return await future
+
+    def reload(self) -> None:
+        """Re-read the league from storage once the commands queued ahead of this have run"""
+        self.mailbox.put_nowait((None, None, None))
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                command, future, trace = await self.mailbox.get()
+                self.busy = True
+                if command is None:
+                    await self._reload()
+                    continue
+                if self.stale is not None and not await self._refresh():
+                    if not future.done():
+                        future.set_exception(self.stale)
+                    self._idle()
+                    continue
+                token = tracing.activate(trace)
+                self._current = future
+                try:
+                    await self._apply(command, future)
+                finally:
+                    self._current = None
+                    tracing.deactivate(token)
+        finally:
+            self._fail_pending()
+
+    async def _apply(self, command: Command, future: asyncio.Future) -> None:
+        try:
+            for attempt in range(MAX_CONFLICT_RETRIES + 1):
+                try:
+                    with span("logic"):
+                        result = command(self.state)
+                    self.state.version += 1
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                try:
+                    with span("document"):
+                        document = self.state.to_document()
+                    with span("storage_write"):
+                        # Compare-and-set on the version this change was made against
+                        stored = await self.repository.replace_if_version(self.league_id, document, self.state.version - 1)
+                except Exception as e:
+                    stored, error = False, e
+                else:
+                    error = None if stored else VersionConflict(
+                        f"League {self.league_id} kept changing in another worker; try again"
+                    )
+                if stored:
+                    break
+                # The change is in memory but not stored: rebuild from storage. If that fails the actor
+                # stays stale and retries before its next command (or is replaced when idle).
+                self.stale = error
+                refreshed = await self._refresh()
+                if isinstance(error, VersionConflict) and refreshed and attempt < MAX_CONFLICT_RETRIES:
+                    logger.info(f"League {self.league_id} changed in another worker; retrying the command on its version")
+                    continue
+                if not future.done():
+                    future.set_exception(error)
+                return
+            if self.on_commit:
+                try:
+                    await self.on_commit(document, result)
+                except Exception as e:
+                    logger.error(f"Commit hook for league {self.league_id} failed: {str(e)}")
+            if not future.done():
+                future.set_result(document)
+        finally:
+            self._idle()
+
+    async def _reload(self) -> None:
+        try:
+            await self._refresh()
+        finally:
+            self._idle()
+
+    async def _refresh(self) -> bool:
+        """Replace the live state with the stored league; on failure stay stale and return False"""
+        try:
+            document = await self.repository.get(self.league_id)
+            if document is None:
+                raise LookupError(f"League {self.league_id} no longer exists")
+            state = CompactLeague.from_document(document)
+            self.replaced()
+            self.state = state
+        except Exception as e:
+            logger.error(f"Reloading league {self.league_id} failed: {str(e)}")
+            self.stale = e
+            return False
+        self.stale = None
+        return True
+
+    def _idle(self) -> None:
+        self.busy = False
+        self.last_active = time.monotonic()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopping or self._task.done()
+
+    def replaced(self) -> None:
+        """The live state is about to be dropped"""
+        if self.on_replace:
+            try:
+                self.on_replace(self.state)
+            except Exception as e:
+                logger.error(f"Replace hook for league {self.league_id} failed: {str(e)}")
+
+    def stop(self) -> None:
+        self.replaced()
+        self._stopping = True
+        self._task.cancel()
+        # The task may never get to run its own cleanup (cancelled before it started)
+        self._fail_pending()
+
+    def _fail_pending(self) -> None:
+        """Fail the running command and every one still queued, so no caller waits on an actor that is gone"""
+        if self._current is not None and not self._current.done():
+            # It may or may not have been stored; the caller can re-read the league
+            self._current.set_exception(
+                ActorStopped(f"League {self.league_id} actor stopped before acknowledging the command")
+            )
+        while not self.mailbox.empty():
+            _, future, _ = self.mailbox.get_nowait()
+            if future is not None and not future.done():
+                future.set_exception(ActorStopped(f"League {self.league_id} actor has stopped"))
+
+
+class LeagueManager:
+    """Keeps hot leagues live in memory, one actor each, with LRU eviction of idle ones.
+
+    Every command is written through to the repository before it is
+    acknowledged, so evicting an actor only drops memory.
+    """
+
+    def __init__(
+        self,
+        repository: LeagueRepository,
+        max_active: int = 5000,
+        idle_timeout: float = 900.0,
+        on_commit: Optional[CommitHook] = None,
+        on_replace: Optional[ReplaceHook] = None,
+    ):
+        self.repository = repository
+        self.on_commit = on_commit
+        self.on_replace = on_replace
+        self.max_active = max_active
+        self.idle_timeout = idle_timeout
+        self._actors: "OrderedDict[str, LeagueActor]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, league_id: str) -> Optional[Dict[str, Any]]:
+        """Last committed document of a league, or None if it doesn't exist"""
+        actor = await self._actor(league_id)
+        if actor is None:
+            return None
+        with span("document"):
+            return actor.document
+
+    async def version(self, league_id: str) -> Optional[int]:
+        """Version of a league's live state without building its document, None if it doesn't exist"""
+        actor = await self._actor(league_id)
+        return actor.state.version if actor else None
+
+    async def state(self, league_id: str) -> Optional[CompactLeague]:
+        """Live state of a league for read-only use until the caller next awaits, None if it doesn't exist"""
+        actor = await self._actor(league_id)
+        return actor.state if actor else None
+
+    async def execute(self, league_id: str, command: Command) -> Optional[Dict[str, Any]]:
+        """Run a command in the league's mailbox; returns the committed document, None if the league doesn't exist"""
+        actor = await self._actor(league_id)
+        if actor is None:
+            return None
+        return await actor.submit(command)
+
+    def adopt(self, document: Dict[str, Any]) -> None:
+        """Start an actor for a league that was just created"""
+        if document["id"] not in self._actors:
+            self._add(LeagueActor(document["id"], document, self.repository, self.on_commit, self.on_replace))
+
+    def forget(self, league_id: str) -> None:
+        actor = self._actors.pop(league_id, None)
+        if actor:
+            actor.stop()
+
+    def forget_name(self, name: str) -> None:
+        for league_id in [i for i, actor in self._actors.items() if actor.state.name == name]:
+            self.forget(league_id)
+
+    def invalidate(self, league_id: str, version: Optional[int] = None) -> None:
+        """Another worker changed a league: drop or refresh our copy if it is older than `version`"""
+        actor = self._actors.get(league_id)
+        if actor is None or (version is not None and actor.state.version >= version):
+            return
+        self.invalidations += 1
+        if actor.idle:
+            self.forget(league_id)
+        else:
+            # Commands are queued on it; refresh in line rather than strand them
+            actor.reload()
+
+    def invalidate_all(self) -> None:
+        for league_id in list(self._actors):
+            self.invalidate(league_id)
+
+    async def _actor(self, league_id: str) -> Optional[LeagueActor]:
+        actor = self._actors.get(league_id)
+        if actor is not None and (actor.stopped or (actor.stale is not None and actor.idle)):
+            # A stale idle actor may show a change that never reached storage: load afresh
+            self.forget(league_id)
+            actor = None
+        if actor is not None:
+            self._actors.move_to_end(league_id)
+            self.hits += 1
+            return actor
+
+        # Concurrent first requests for a cold league share one load
+        loading = self._loading.get(league_id)
+        if loading is not None:
+            if await asyncio.shield(loading) is None:
+                return None
+            # Look it up again: it may have been evicted while this waiter was being resumed
+            return await self._actor(league_id)
+        loading = self._loading[league_id] = asyncio.get_running_loop().create_future()
+        try:
+            with span("storage_read"):
+                document = await self.repository.get(league_id)
+            actor = None
+            if document is not None:
+                with span("hydrate"):
+                    actor = LeagueActor(league_id, document, self.repository, self.on_commit, self.on_replace)
+                self._add(actor)
+                self.loads += 1
+            loading.set_result(actor)
+            return actor
+        except Exception as e:
+            loading.set_exception(e)
+            loading.exception()  # Mark retrieved in case nobody else was waiting
+            raise
+        finally:
+            del self._loading[league_id]
+
+    def _add(self, actor: LeagueActor) -> None:
+        self._actors[actor.league_id] = actor
+        self._start_sweeper()
+        if len(self._actors) > self.max_active:
+            for league_id in list(self._actors):
+                if len(self._actors) <= self.max_active:
+                    break
+                if self._actors[league_id].idle and league_id != actor.league_id:
+                    self.forget(league_id)
+                    self.evictions += 1
+
+    def _start_sweeper(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_idle())
+
+    async def _sweep_idle(self) -> None:
+        while True:
+            await asyncio.sleep(min(60.0, self.idle_timeout))
+            cutoff = time.monotonic() - self.idle_timeout
+            for league_id in [i for i, actor in self._actors.items() if actor.idle and actor.last_active < cutoff]:
+                self.forget(league_id)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "active": len(self._actors),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    async def close(self) -> None:
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for league_id in list(self._actors):
+            self.forget(league_id)
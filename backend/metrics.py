@@ -0,0 +1,223 @@
+"""Prometheus text-format metrics: counters, gauges, histograms, HTTP middleware and a Mongo command listener"""
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (4096, 16384, 65536, 262144, 1048576, 4194304, 8388608, 16777216)
+
+LabelValues = Tuple[str, ...]
+
+# Every metric registers itself here; `render()` walks it at scrape time
+REGISTRY: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        # Observations also come from Motor's worker threads
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self) -> List[Tuple[str, LabelValues, Sequence[str], float]]:
+        """(suffix, label values, extra label names/values, value) rows"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self.samples():
+            names = self.labels + tuple(extra[::2])
+            all_values = tuple(values) + tuple(extra[1::2])
+            lines.append(f"{self.name}{suffix}{_format_labels(names, all_values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        return [("", labels, (), value) for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by `collect` returning {label values: value}"""
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        values = self.collect() if self.collect else self._values
+        return [("", labels, (), value) for labels, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._values.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        rows = []
+        for labels, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                rows.append(("_bucket", labels, ("le", _format_value(bound)), cumulative))
+            rows.append(("_sum", labels, (), series[-1]))
+            rows.append(("_count", labels, (), cumulative))
+        return rows
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template", ("method", "route", "status")
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being served", ("method",))
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and labels it with its route template (not the raw path)"""
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+        self._templates: Dict[Any, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            self._templates = {
+                route.endpoint: route.path for route in self.router.routes if getattr(route, "endpoint", None)
+            }
+            template = self._templates.get(endpoint, "unmatched")
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method = scope["method"]
+        status = 500
+
+        async def record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, record_status)
+        finally:
+            http_in_flight.dec(method)
+            http_request_seconds.observe(time.perf_counter() - started, method, self._route(scope), str(status))
+
+
+mongo_command_seconds = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round trips, by collection and command", ("collection", "command")
+)
+mongo_command_failures = Counter("mongo_command_failures_total", "Failed MongoDB commands", ("collection", "command"))
+
+
+def mongo_command_listener():
+    """pymongo CommandListener feeding the mongo_command_* metrics (pass via `event_listeners`)"""
+    from pymongo import monitoring
+
+    class MongoCommandMetrics(monitoring.CommandListener):
+        def __init__(self):
+            self._collections: Dict[Tuple[Any, int], str] = {}
+
+        def started(self, event):
+            collection = event.command.get(event.command_name)
+            self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+        def succeeded(self, event):
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+            mongo_command_seconds.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+        def failed(self, event):
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+            mongo_command_seconds.observe(event.duration_micros / 1e6, collection, event.command_name)
+            mongo_command_failures.inc(collection, event.command_name)
+
+    return MongoCommandMetrics()
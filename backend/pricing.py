@@ -0,0 +1,241 @@
+"""Auction price model: offline least-squares fit over historical picks, vectorized catalog scoring"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from storage import LeagueRepository
+
+logger = logging.getLogger(__name__)
+
+PRICE_MODEL_PATH = os.environ.get('PRICE_MODEL_PATH', str(Path(__file__).parent / 'price_model.json'))
+
+PRICE_POSITIONS = ("QB", "RB", "WR", "TE", "K", "DST")
+# Ranks past this (and the catalog's 999 "unranked") all count as undraftable
+MAX_RANK = 300
+
+# Player columns depend only on the catalog, league columns only on the league's state
+PLAYER_FEATURES = ["log_pos_rank", "log_etr_rank", "log_adp", *[f"is_{position}" for position in PRICE_POSITIONS]]
+LEAGUE_FEATURES = ["intercept", "log_budget_per_team", "log_total_teams", "nomination", "remaining_dollars"]
+FEATURES = PLAYER_FEATURES + LEAGUE_FEATURES
+
+TRAINING_FIELDS = ["total_teams", "budget_per_team", "roster_size", "all_picks.player", "all_picks.amount"]
+
+
+def rank_number(pos_rank: Optional[str]) -> float:
+    """'RB05' -> 5.0; missing ranks count as MAX_RANK"""
+    match = re.search(r"\d+", pos_rank or "")
+    return float(match.group()) if match else float(MAX_RANK)
+
+
+def _log_rank(values: Sequence[Optional[float]]) -> np.ndarray:
+    ranks = np.array([MAX_RANK if value is None else value for value in values], dtype=np.float64)
+    return np.log(np.clip(ranks, 1, MAX_RANK))
+
+
+def player_features(players: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """(len(players), len(PLAYER_FEATURES)) matrix"""
+    matrix = np.zeros((len(players), len(PLAYER_FEATURES)))
+    matrix[:, 0] = _log_rank([rank_number(player.get("pos_rank")) for player in players])
+    matrix[:, 1] = _log_rank([player.get("etr_rank") for player in players])
+    matrix[:, 2] = _log_rank([player.get("adp") for player in players])
+    positions = np.array([player.get("position", "").upper().replace("DEF", "DST") for player in players])
+    for column, position in enumerate(PRICE_POSITIONS, start=3):
+        matrix[:, column] = positions == position
+    return matrix
+
+
+def league_features(total_teams: int, budget_per_team: int, roster_size: int, picks_made, league_remaining) -> np.ndarray:
+    """League state before each pick; `picks_made` and `league_remaining` may be arrays (one row per pick)"""
+    picks_made = np.atleast_1d(np.asarray(picks_made, dtype=np.float64))
+    league_remaining = np.atleast_1d(np.asarray(league_remaining, dtype=np.float64))
+    matrix = np.empty((len(picks_made), len(LEAGUE_FEATURES)))
+    matrix[:, 0] = 1.0
+    matrix[:, 1] = math.log(max(1, budget_per_team))
+    matrix[:, 2] = math.log(max(1, total_teams))
+    matrix[:, 3] = picks_made / max(1, total_teams * roster_size)
+    matrix[:, 4] = league_remaining / max(1, total_teams * budget_per_team)
+    return matrix
+
+
+def training_rows(league: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature rows and log prices of every pick in a league, in nomination order"""
+    picks = [pick for pick in league.get("all_picks", []) if pick["amount"] > 0]
+    if not picks:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    amounts = np.array([pick["amount"] for pick in picks], dtype=np.float64)
+    spent_before = np.concatenate(([0.0], np.cumsum(amounts)[:-1]))
+    league_budget = league["total_teams"] * league["budget_per_team"]
+    features = np.hstack([
+        player_features([pick["player"] for pick in picks]),
+        league_features(
+            league["total_teams"], league["budget_per_team"], league["roster_size"],
+            np.arange(len(picks)), league_budget - spent_before,
+        ),
+    ])
+    return features, np.log(amounts)
+
+
+class NormalEquations:
+    """XᵀX, Xᵀy and yᵀy accumulated batch by batch, so training memory doesn't grow with history"""
+
+    def __init__(self):
+        self.gram = np.zeros((len(FEATURES), len(FEATURES)))
+        self.moment = np.zeros(len(FEATURES))
+        self.sum_sq = 0.0
+        self.rows = 0
+        self.leagues = 0
+
+    def add(self, features: np.ndarray, targets: np.ndarray) -> None:
+        self.gram += features.T @ features
+        self.moment += features.T @ targets
+        self.sum_sq += float(targets @ targets)
+        self.rows += len(targets)
+
+    def solve(self, ridge: float = 1e-3) -> Tuple[np.ndarray, float]:
+        """Ridge coefficients and the training RMSE of log price"""
+        coefficients = np.linalg.solve(self.gram + ridge * np.eye(len(FEATURES)), self.moment)
+        sse = self.sum_sq - 2 * coefficients @ self.moment + coefficients @ self.gram @ coefficients
+        return coefficients, math.sqrt(max(0.0, sse) / max(1, self.rows))
+
+
+class PriceModel:
+    """Log-linear price model: price = exp(player features · w_player + league features · w_league)"""
+
+    def __init__(self, coefficients: Dict[str, float], picks: int = 0, leagues: int = 0, rmse: float = 0.0, trained_at: str = ""):
+        self.coefficients = coefficients
+        self.picks = picks
+        self.leagues = leagues
+        self.rmse = rmse
+        self.trained_at = trained_at
+        self.player_weights = np.array([coefficients.get(name, 0.0) for name in PLAYER_FEATURES])
+        self.league_weights = np.array([coefficients.get(name, 0.0) for name in LEAGUE_FEATURES])
+        self._player_scores: Tuple[Optional[str], Optional[np.ndarray]] = (None, None)
+
+    def player_scores(self, catalog) -> np.ndarray:
+        """Player part of every catalog player's log price, one matrix multiply per catalog version"""
+        version, scores = self._player_scores
+        if version != catalog.version:
+            scores = player_features(catalog.players) @ self.player_weights
+            self._player_scores = (catalog.version, scores)
+        return scores
+
+    def score(self, catalog, league: Dict[str, Any]) -> np.ndarray:
+        """Predicted whole-dollar price of every catalog player in `league` as it stands now"""
+        league_budget = sum(team["budget"] for team in league["teams"])
+        spent = sum(team["spent"] for team in league["teams"])
+        league_score = league_features(
+            league["total_teams"], league["budget_per_team"], league["roster_size"],
+            len(league["all_picks"]), league_budget - spent,
+        )[0] @ self.league_weights
+        prices = np.exp(self.player_scores(catalog) + league_score)
+        return np.clip(np.rint(prices), 1, league["budget_per_team"]).astype(int)
+
+    def opening_prices(self, catalog, total_teams: int, budget_per_team: int, roster_size: int) -> np.ndarray:
+        """Unrounded prices of every catalog player before the first pick of a league format"""
+        league_score = league_features(
+            total_teams, budget_per_team, roster_size, 0, total_teams * budget_per_team
+        )[0] @ self.league_weights
+        return np.exp(self.player_scores(catalog) + league_score)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "picks": self.picks,
+            "leagues": self.leagues,
+            "rmse_log_price": round(self.rmse, 4),
+            "trained_at": self.trained_at,
+            "coefficients": self.coefficients,
+        }
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PriceModel":
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        return cls(saved["coefficients"], saved["picks"], saved["leagues"], saved["rmse_log_price"], saved["trained_at"])
+
+
+async def train(repository: LeagueRepository, batch_size: int = 100, ridge: float = 1e-3) -> PriceModel:
+    """Fit a price model to every pick in every stored league"""
+    equations = NormalEquations()
+    async for leagues in repository.iter_batches(batch_size, TRAINING_FIELDS):
+        for league in leagues:
+            features, targets = training_rows(league)
+            if len(targets):
+                equations.add(features, targets)
+                equations.leagues += 1
+    if not equations.rows:
+        raise ValueError("No historical picks to train on")
+    coefficients, rmse = equations.solve(ridge)
+    return PriceModel(
+        {name: float(weight) for name, weight in zip(FEATURES, coefficients)},
+        picks=equations.rows,
+        leagues=equations.leagues,
+        rmse=rmse,
+        trained_at=datetime.utcnow().isoformat(),
+    )
+
+
+_model: Optional[PriceModel] = None
+_model_loaded = False
+
+
+def get_price_model() -> Optional[PriceModel]:
+    """The model saved at PRICE_MODEL_PATH, loaded on first use; None until one has been trained"""
+    global _model_loaded
+    if not _model_loaded:
+        _model_loaded = True
+        reload_price_model()
+    return _model
+
+
+def reload_price_model(path: str = PRICE_MODEL_PATH) -> Optional[PriceModel]:
+    """Swap in the model saved at `path`, keeping the live one if it can't be read"""
+    global _model
+    try:
+        _model = PriceModel.load(path)
+        logger.info(f"Loaded price model trained on {_model.picks} picks from {path}")
+    except FileNotFoundError:
+        logger.info(f"No price model at {path}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load price model from {path}: {str(e)}")
+    return _model
+
+
+async def _train_command(args: argparse.Namespace) -> None:
+    from storage import create_repository
+
+    repository = create_repository()
+    try:
+        started = time.perf_counter()
+        try:
+            model = await train(repository, args.batch_size, args.ridge)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        model.save(args.output)
+    finally:
+        await repository.close()
+    print(f"Trained on {model.picks} picks from {model.leagues} leagues in {time.perf_counter() - started:.2f}s "
+          f"(RMSE {model.rmse:.3f} log dollars) -> {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit the auction price model to every stored league (STORAGE_ENGINE, MONGO_URL, DB_NAME)")
+    parser.add_argument("-o", "--output", default=PRICE_MODEL_PATH, help="coefficients JSON (default PRICE_MODEL_PATH)")
+    parser.add_argument("--batch-size", type=int, default=500, help="leagues read per batch")
+    parser.add_argument("--ridge", type=float, default=1e-3, help="L2 penalty keeping unseen positions at zero")
+    asyncio.run(_train_command(parser.parse_args()))
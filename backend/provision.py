@@ -0,0 +1,98 @@
+"""Bulk league provisioning: many identical leagues cloned from one template and inserted in batches"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from storage import LeagueRepository
+
+PROVISION_BATCH_SIZE = int(os.environ.get('PROVISION_BATCH_SIZE', '100'))
+MAX_PROVISION_COUNT = int(os.environ.get('MAX_PROVISION_COUNT', '5000'))
+
+# Replaced by each league's number in a template name
+NUMBER_PLACEHOLDER = "{n}"
+
+
+def league_names(pattern: str, count: int, first_number: int = 1) -> List[str]:
+    """'Tournament {n}' -> 'Tournament 1', 'Tournament 2', ...; a pattern without {n} gets ' {n}' appended"""
+    if NUMBER_PLACEHOLDER not in pattern:
+        pattern = f"{pattern} {NUMBER_PLACEHOLDER}"
+    return [pattern.replace(NUMBER_PLACEHOLDER, str(number)) for number in range(first_number, first_number + count)]
+
+
+def clone_league(template: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """A new, empty league document with the template's settings and precomputed team metrics"""
+    return {
+        **template,
+        "id": str(uuid.uuid4()),
+        "name": name,
+        "created_at": datetime.utcnow(),
+        "position_requirements": dict(template["position_requirements"]),
+        "teams": [
+            {**team, "id": str(uuid.uuid4()), "roster": [], "roster_spots": dict(team["roster_spots"])}
+            for team in template["teams"]
+        ],
+        "all_picks": [],
+    }
+
+
+async def provision(
+    repository: LeagueRepository,
+    template: Dict[str, Any],
+    names: List[str],
+    batch_size: int = PROVISION_BATCH_SIZE,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Insert one league per name, `batch_size` at a time, yielding each league's outcome as its batch lands.
+
+    `on_batch` gets the documents of every batch that were stored.
+    """
+    for start in range(0, len(names), batch_size):
+        leagues = [clone_league(template, name) for name in names[start:start + batch_size]]
+        failures = await repository.insert_many(leagues)
+        if on_batch is not None:
+            await on_batch([league for league in leagues if league["id"] not in failures])
+        for offset, league in enumerate(leagues):
+            result = {"index": start + offset, "id": league["id"], "name": league["name"], "ok": league["id"] not in failures}
+            if not result["ok"]:
+                result["error"] = failures[league["id"]]
+            yield result
+
+
+if __name__ == "__main__":
+    import requests
+
+    parser = argparse.ArgumentParser(description="Create many identical leagues through POST /api/leagues/bulk")
+    parser.add_argument("count", type=int, help="number of leagues")
+    parser.add_argument("--name", default="League {n}", help="league name, {n} is replaced by the league number")
+    parser.add_argument("--first-number", type=int, default=1)
+    parser.add_argument("--template", help="JSON file with league settings (total_teams, budget_per_team, ...)")
+    parser.add_argument("--url", default="http://localhost:8001", help="backend base URL")
+    parser.add_argument("--admin-token", default=os.environ.get('ADMIN_TOKEN'))
+    args = parser.parse_args()
+
+    settings = {}
+    if args.template:
+        with open(args.template, encoding="utf-8") as f:
+            settings = json.load(f)
+    payload = {"template": {**settings, "name": args.name}, "count": args.count, "first_number": args.first_number}
+    headers = {"X-Admin-Token": args.admin_token} if args.admin_token else {}
+
+    started = time.perf_counter()
+    created = 0
+    with requests.post(f"{args.url}/api/leagues/bulk", json=payload, headers=headers, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if "index" in result:
+                # League ids on stdout, one JSON object per line
+                print(line.decode(), flush=True)
+                created += result["ok"]
+    print(f"Provisioned {created}/{args.count} leagues in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    sys.exit(0 if created == args.count else 1)
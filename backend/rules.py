@@ -0,0 +1,21 @@
+"""Auction budget rules shared by every league representation"""
+from typing import Tuple
+
+
+def budget_metrics(budget: int, spent: int, roster_count: int, roster_size: int) -> Tuple[int, int, int, float, float]:
+    """(remaining, max_bid, remaining_spots, avg_per_spot, budget_utilization) for one team"""
+    remaining = budget - spent
+    
+    # Calculate remaining roster spots
+    remaining_roster_spots = roster_size - roster_count
+    
+    # CRITICAL: Max bid calculation
+    # Formula: Remaining Budget - (Remaining Roster Spots - 1)
+    # This ensures $1 minimum for each remaining spot after this pick
+    max_bid = max(0, remaining - max(0, remaining_roster_spots - 1))
+    
+    # Additional metrics
+    avg_per_spot = round(remaining / max(1, remaining_roster_spots), 1) if remaining_roster_spots > 0 else 0
+    budget_utilization = round((spent / budget) * 100, 1) if budget > 0 else 0
+    
+    return remaining, max_bid, remaining_roster_spots, avg_per_spot, budget_utilization
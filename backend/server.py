@@ -1,31 +1,80 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Depends, File, Header, Query, UploadFile
 from dotenv import load_dotenv
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.concurrency import run_in_threadpool
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
+import json
+import secrets
+import time
 import uuid
-import csv
-import requests
-from io import StringIO
 from datetime import datetime
 
+from catalog import (
+    CatalogLoadError, PlayerCatalog, apply_remote_catalog, catalog_path, get_catalog, refresh_catalog, reload_catalog,
+    search_cache, search_json, swap_catalog,
+)
+from events import CATALOG_CHANNEL, LEAGUE_CHANNEL, create_event_bus
+from ingest import CatalogMerge, RankingSource, build_merged_catalog
+from storage import create_repository
+from league_manager import ActorStopped, LeagueManager, VersionConflict
+from rules import budget_metrics
+from compact import CompactLeague
+from auction import BID_REJECTIONS, AuctionEngine
+from forks import ForkStore
+from history import create_pick_history
+from derived import DerivedWriter
+from provision import MAX_PROVISION_COUNT, PROVISION_BATCH_SIZE, league_names, provision
+from pricing import PRICE_MODEL_PATH, get_price_model, reload_price_model
+from tiers import tier_cache
+from analytics import (
+    ALL_FORMATS, CURVE_BUCKET, CURVE_BUCKETS, create_price_rollups, league_format, normalize_pos_rank, player_key,
+)
+from exports import (
+    EXPORT_FIELDS, EXPORT_FORMATS, PICK_COLUMNS, ROSTER_COLUMNS, pick_rows, roster_rows, stream_export,
+)
+from idempotency import IdempotencyMiddleware, IdempotencyStore
+from metrics import SIZE_BUCKETS, Gauge, Histogram, MetricsMiddleware, render as render_metrics
+from tracing import TracedRoute, Tracer, TracingMiddleware, span
+from warmup import Warmup
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# League storage (MongoDB unless STORAGE_ENGINE=memory)
+repository = create_repository()
+
+# Pick/undo event log with a checkpoint every 16 events, for GET /leagues/{id}/state?at_pick=N
+pick_history = create_pick_history(repository)
+
+# Price rollups across leagues, kept current as picks commit and undo
+price_rollups = create_price_rollups(repository)
+
+# Pick history and price rollups of each commit, written in commit order off the acknowledgement path
+derived_writes = DerivedWriter()
+
+# Invalidation bus shared by all workers (in-process unless EVENT_BUS_URL is set)
+event_bus = create_event_bus()
 
 # Create the main app without a prefix
 app = FastAPI()
 
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    """Another worker kept winning the write; nothing was applied, so the client can retry"""
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+@app.exception_handler(ActorStopped)
+async def actor_stopped_handler(request: Request, exc: ActorStopped):
+    """The league was evicted, deleted or the worker is shutting down mid-command"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TracedRoute)
 
 # Data Models
 class Player(BaseModel):
@@ -43,6 +92,7 @@ class DraftPick(BaseModel):
     team_id: str
     amount: int
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    rollup_format: Optional[str] = None  # Price rollup format the pick counts under (teams x budget when made)
 
 class Team(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -59,6 +109,8 @@ class Team(BaseModel):
 
 class League(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    version: int = 0  # Bumped by every committed change
+    log_length: int = 0  # Picks and undos recorded in the league's pick history
     name: str
     total_teams: int
     budget_per_team: int
@@ -78,6 +130,11 @@ class LeagueCreate(BaseModel):
         "FLEX": 1, "K": 1, "DEF": 1
     }
 
+class LeagueBulkCreate(BaseModel):
+    template: LeagueCreate  # name may contain {n}, the league's number
+    count: int = Field(..., ge=1, le=MAX_PROVISION_COUNT)
+    first_number: int = 1
+
 class PlayerCreate(BaseModel):
     name: str
     position: str
@@ -91,47 +148,299 @@ class DraftPickCreate(BaseModel):
     team_id: str
     amount: int
 
+class AuctionStart(BaseModel):
+    bid_seconds: Optional[float] = None
+
+class Nomination(BaseModel):
+    team_id: str
+    player: PlayerCreate
+    amount: int = 1
+
+class Bid(BaseModel):
+    team_id: str
+    amount: int
+    lot: Optional[int] = None  # Lot the bidder saw; bids for an earlier lot are rejected
+
+class ForkCreate(BaseModel):
+    at_pick: Optional[int] = None  # Number of the parent's picks to keep; defaults to all of them
+    name: Optional[str] = None
+
+class TracingSettings(BaseModel):
+    trace_all: Optional[bool] = None
+    sample_every: Optional[int] = Field(None, ge=0)  # Profile 1 in N requests, 0 turns profiling off
+
+# Metrics
+pick_commit_seconds = Histogram("pick_commit_duration_seconds", "Time to validate, apply and store a draft pick")
+league_document_bytes = Histogram(
+    "league_document_bytes", "BSON size of committed league documents (sampled by version)", buckets=SIZE_BUCKETS
+)
+LEAGUE_SIZE_SAMPLE_EVERY = int(os.environ.get('LEAGUE_SIZE_SAMPLE_EVERY', '10'))
+
+def league_document_size(document: Dict[str, Any]) -> int:
+    from bson import encode
+    
+    return len(encode(document))
+
+async def on_league_commit(document: Dict[str, Any], event: Optional[Dict[str, Any]]) -> None:
+    """Queue the change for pick history and price rollups, keep live auction metrics current and tell
+    other workers about the new version.
+
+    Runs on the league's actor in commit order, before the change is acknowledged; `event` is what
+    the command returned (a pick or undo event, None for settings and team changes). History and
+    rollups are only queued here, so the acknowledgement doesn't wait on them.
+    """
+    derived_writes.submit(lambda: record_history(document, event), f"Recording pick history for league {document['id']}")
+    if event is not None:
+        weight = 1 if event["type"] == "pick" else -1
+        derived_writes.submit(lambda: record_prices(document, event["pick"], weight), f"Updating price rollups for league {document['id']}")
+    auction_engine.sync(document)
+    if document["version"] % LEAGUE_SIZE_SAMPLE_EVERY == 0:
+        league_document_bytes.observe(league_document_size(document))
+    await event_bus.publish(LEAGUE_CHANNEL, {"type": "commit", "league_id": document["id"], "version": document["version"]})
+
+# Live leagues, one actor per active league
+league_manager = LeagueManager(
+    repository,
+    max_active=int(os.environ.get('LEAGUE_MANAGER_MAX_ACTIVE', '5000')),
+    idle_timeout=float(os.environ.get('LEAGUE_IDLE_TIMEOUT', '900')),
+    on_commit=on_league_commit,
+    # Forks keep the board they were taken from when an actor reloads or drops its league
+    on_replace=lambda state: league_forks.detach(state),
+)
+
+# What-if forks share their parent's picks up to the fork point and store only their own
+league_forks = ForkStore(
+    ttl=float(os.environ.get('FORK_TTL', '7200')),
+    max_forks_per_league=int(os.environ.get('MAX_FORKS_PER_LEAGUE', '64')),
+)
+
+async def commit_draft_pick(league_id: str, pick_data: DraftPickCreate) -> Optional[Dict[str, Any]]:
+    """Record a pick in a league; None if the league doesn't exist"""
+    started = time.perf_counter()
+    try:
+        document = await league_manager.execute(league_id, lambda state: apply_draft_pick(state, pick_data))
+    finally:
+        pick_commit_seconds.observe(time.perf_counter() - started)
+    return document
+
+async def record_prices(document: Dict[str, Any], pick: Dict[str, Any], weight: int) -> None:
+    """Add a committed pick to the price rollups (weight 1) or take an undone one out (weight -1)"""
+    try:
+        with span("storage_write"):
+            await price_rollups.record(pick, weight)
+    except Exception as e:
+        logger.error(f"Updating price rollups for league {document['id']} failed: {str(e)}")
+
+async def record_history(document: Dict[str, Any], event: Optional[Dict[str, Any]] = None) -> None:
+    """Log a committed pick or undo, or with no event checkpoint the league where its history stands"""
+    try:
+        with span("storage_write"):
+            if event is None:
+                await pick_history.checkpoint(document["id"], document["log_length"], document)
+            else:
+                await pick_history.record(document, event)
+    except Exception as e:
+        logger.error(f"Recording pick history for league {document['id']} failed: {str(e)}")
+
+async def checkpoint_leagues(documents: List[Dict[str, Any]]) -> None:
+    """Checkpoint freshly provisioned leagues at pick 0 in one batch"""
+    try:
+        await pick_history.checkpoint_many(documents)
+    except Exception as e:
+        logger.error(f"Checkpointing {len(documents)} provisioned leagues failed: {str(e)}")
+
+def cache_hit_ratios() -> Dict[tuple, float]:
+    leagues = league_manager.stats()
+    return {
+        ("search",): search_cache.stats()["hit_ratio"],
+        ("league_actors",): leagues["hits"] / max(1, leagues["hits"] + leagues["loads"]),
+    }
+
+Gauge("cache_hit_ratio", "Hit ratio of in-process caches since startup", ("cache",), collect=cache_hit_ratios)
+Gauge("live_leagues", "Leagues held in memory by league actors", collect=lambda: {(): league_manager.stats()["active"]})
+Gauge("derived_writes_pending", "Pick history and rollup writes queued behind commits", collect=lambda: {(): derived_writes.stats()["pending"]})
+
+async def commit_auction_win(league_id: str, team_id: str, player: Dict[str, Any], amount: int) -> Optional[Dict[str, Any]]:
+    return await commit_draft_pick(league_id, DraftPickCreate(player=PlayerCreate(**player), team_id=team_id, amount=amount))
+
+# Live auctions; one shared timer drives every league's countdown
+auction_engine = AuctionEngine(commit_auction_win, bid_seconds=float(os.environ.get('AUCTION_BID_SECONDS', '30')))
+
+async def on_league_event(message: Dict[str, Any]) -> None:
+    """Drop or refresh the live copy of a league another worker changed"""
+    if message["type"] == "commit":
+        league_manager.invalidate(message["league_id"], message["version"])
+    elif message["type"] == "delete_name":
+        league_manager.forget_name(message["name"])
+    elif message["type"] == "resync":
+        league_manager.invalidate_all()
+
+async def on_catalog_event(message: Dict[str, Any]) -> None:
+    """Install a catalog another worker swapped in, or re-read ours if reloads may have been missed"""
+    if message["type"] == "reload":
+        await apply_remote_catalog(message["version"], message["body"].encode(), message["source"])
+    elif message["type"] == "resync":
+        refresh_catalog()
+
+event_bus.subscribe(LEAGUE_CHANNEL, on_league_event)
+event_bus.subscribe(CATALOG_CHANNEL, on_catalog_event)
+
+async def announce_catalog(catalog: PlayerCatalog) -> None:
+    await event_bus.publish(CATALOG_CHANNEL, {
+        "type": "reload",
+        "version": catalog.version,
+        "source": catalog.source,
+        "body": catalog.body.decode(),
+    })
+
 # Helper functions
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with ADMIN_TOKEN; without one configured they are disabled"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: set ADMIN_TOKEN")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names `etag` (or is `*`)"""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+def league_etag(version: int) -> str:
+    return f'W/"{version}"'
+
 def calculate_team_metrics(team: Team, position_requirements: Dict[str, int], roster_size: int) -> Team:
     """Calculate remaining budget, max bid, and other critical metrics for a team"""
-    team.remaining = team.budget - team.spent
+    (
+        team.remaining,
+        team.max_bid,
+        team.remaining_spots,
+        team.avg_per_spot,
+        team.budget_utilization,
+    ) = budget_metrics(team.budget, team.spent, len(team.roster), roster_size)
     
-    # Calculate remaining roster spots
-    current_roster_size = len(team.roster)
-    remaining_roster_spots = roster_size - current_roster_size
+    return team
+
+def apply_draft_pick(state: CompactLeague, pick_data: DraftPickCreate) -> Dict[str, Any]:
+    """Add a pick to a live league; returns its pick history event"""
+    # Find team
+    team_index = state.team_index(pick_data.team_id)
+    if team_index is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    
+    # Validate pick
+    if pick_data.amount > state.team_remaining(team_index):
+        raise HTTPException(status_code=400, detail="Insufficient budget")
+    
+    # Record the pick; team metrics are derived from spent/roster counts
+    state.add_pick(
+        team_index, pick_data.player.dict(), pick_data.amount, league_format(state.total_teams, state.budget_per_team),
+    )
+    state.log_length += 1
+    return {"type": "pick", "pick": state.pick_document(len(state.pick_amount) - 1)}
+
+def apply_undo_pick(state: CompactLeague, pick_id: str) -> Dict[str, Any]:
+    """Remove a pick from a live league and refund the team; returns its pick history event"""
+    pick_index = state.pick_index(pick_id)
+    if pick_index is None:
+        raise HTTPException(status_code=404, detail="Pick not found")
     
-    # CRITICAL: Max bid calculation
-    # Formula: Remaining Budget - (Remaining Roster Spots - 1)
-    # This ensures $1 minimum for each remaining spot after this pick
-    team.max_bid = max(0, team.remaining - max(0, remaining_roster_spots - 1))
+    removed = state.pick_document(pick_index)
+    league_forks.detach(state, pick_index)
+    state.remove_pick(pick_index)
+    state.log_length += 1
+    return {"type": "undo", "pick_id": pick_id, "pick": removed}
+
+def apply_model_change(state: CompactLeague, change) -> None:
+    """Apply a change written against the full League model; forks keep the board they were taken from"""
+    league_forks.detach(state)
+    state.update_model(League, change)
+
+def apply_league_settings(league: League, settings: LeagueCreate) -> None:
+    """Apply new settings to a live league, adding or removing teams as needed"""
+    old_budget = league.budget_per_team
     
-    # Additional metrics
-    team.remaining_spots = remaining_roster_spots
-    team.avg_per_spot = round(team.remaining / max(1, remaining_roster_spots), 1) if remaining_roster_spots > 0 else 0
-    team.budget_utilization = round((team.spent / team.budget) * 100, 1) if team.budget > 0 else 0
+    # Update basic settings
+    league.name = settings.name
+    league.total_teams = settings.total_teams
+    league.budget_per_team = settings.budget_per_team
+    league.roster_size = settings.roster_size
+    league.position_requirements = settings.position_requirements
     
-    return team
+    # Update team budgets and recalculate metrics if budget changed
+    if league.budget_per_team != old_budget:
+        for i, team in enumerate(league.teams):
+            team.budget = settings.budget_per_team
+            team.remaining = team.budget - team.spent
+            team = calculate_team_metrics(team, league.position_requirements, league.roster_size)
+            league.teams[i] = team
+    
+    # Adjust number of teams if changed
+    current_team_count = len(league.teams)
+    if settings.total_teams > current_team_count:
+        # Add new teams
+        for i in range(current_team_count, settings.total_teams):
+            new_team = Team(
+                name=f"Team {i + 1}",
+                budget=settings.budget_per_team,
+                remaining=settings.budget_per_team,
+                roster_spots=settings.position_requirements.copy()
+            )
+            new_team = calculate_team_metrics(new_team, settings.position_requirements, settings.roster_size)
+            league.teams.append(new_team)
+    elif settings.total_teams < current_team_count:
+        # Remove teams (only if they have no players)
+        teams_to_remove = []
+        for i in range(settings.total_teams, current_team_count):
+            if len(league.teams[i].roster) == 0:
+                teams_to_remove.append(i)
+            else:
+                raise HTTPException(status_code=400, detail=f"Cannot remove Team {i+1} - they have drafted players")
+        
+        # Remove teams in reverse order to maintain indices
+        for i in reversed(teams_to_remove):
+            league.teams.pop(i)
+
+def apply_team_update(league: League, team_id: str, team_data: dict) -> None:
+    """Rename a team in a live league"""
+    # Find and update team
+    team_found = False
+    for i, team in enumerate(league.teams):
+        if team.id == team_id:
+            if 'name' in team_data:
+                team.name = team_data['name']
+            league.teams[i] = team
+            team_found = True
+            break
+    
+    if not team_found:
+        raise HTTPException(status_code=404, detail="Team not found")
 
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "Fantasy Football Auction Draft Tracker API"}
 
-@api_router.post("/leagues", response_model=League)
-async def create_league(league_data: LeagueCreate):
-    # Create teams
-    teams = []
-    for i in range(league_data.total_teams):
-        team = Team(
-            name=f"Team {i + 1}",
-            budget=league_data.budget_per_team,
-            remaining=league_data.budget_per_team,
-            roster_spots=league_data.position_requirements.copy()
-        )
-        team = calculate_team_metrics(team, league_data.position_requirements, league_data.roster_size)
-        teams.append(team)
+def build_league(league_data: LeagueCreate) -> League:
+    """A new league with empty teams; every team starts identical, so their metrics are computed once"""
+    prototype = calculate_team_metrics(
+        Team(name="", budget=league_data.budget_per_team, remaining=league_data.budget_per_team),
+        league_data.position_requirements,
+        league_data.roster_size,
+    )
+    teams = [
+        prototype.copy(update={
+            "id": str(uuid.uuid4()),
+            "name": f"Team {i + 1}",
+            "roster": [],
+            "roster_spots": league_data.position_requirements.copy(),
+        })
+        for i in range(league_data.total_teams)
+    ]
     
-    league = League(
+    return League(
         name=league_data.name,
         total_teams=league_data.total_teams,
         budget_per_team=league_data.budget_per_team,
@@ -139,106 +448,278 @@ async def create_league(league_data: LeagueCreate):
         position_requirements=league_data.position_requirements,
         teams=teams
     )
-    
-    await db.leagues.insert_one(league.dict())
+
+@api_router.post("/leagues", response_model=League)
+async def create_league(league_data: LeagueCreate):
+    league = build_league(league_data)
+    document = league.dict()
+    with span("storage_write"):
+        await repository.insert(document)
+    league_manager.adopt(document)
+    await record_history(document)
     return league
 
+@api_router.post("/leagues/bulk", dependencies=[Depends(require_admin)])
+async def create_leagues_in_bulk(bulk: LeagueBulkCreate):
+    """Create `count` identical leagues, streaming one JSON line per league as each batch is stored"""
+    template = build_league(bulk.template).dict()
+    names = league_names(bulk.template.name, bulk.count, bulk.first_number)
+    
+    async def results():
+        started = time.perf_counter()
+        created = 0
+        async for result in provision(repository, template, names, PROVISION_BATCH_SIZE, on_batch=checkpoint_leagues):
+            created += result["ok"]
+            yield json.dumps(result) + "\n"
+        seconds = time.perf_counter() - started
+        logger.info(f"Provisioned {created}/{len(names)} leagues in {seconds:.2f}s")
+        yield json.dumps({"done": True, "created": created, "failed": len(names) - created, "seconds": round(seconds, 3)}) + "\n"
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @api_router.get("/leagues/{league_id}", response_model=League)
-async def get_league(league_id: str):
-    league_data = await db.leagues.find_one({"id": league_id})
+async def get_league(league_id: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    # Revalidation is answered from the live league's version, without building the document
+    version = await league_manager.version(league_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    if etag_matches(if_none_match, league_etag(version)):
+        return Response(status_code=304, headers={"ETag": league_etag(version), "Cache-Control": "no-cache"})
+    
+    league_data = await league_manager.get(league_id)
     if not league_data:
         raise HTTPException(status_code=404, detail="League not found")
-    return League(**league_data)
+    response.headers["ETag"] = league_etag(league_data["version"])
+    response.headers["Cache-Control"] = "no-cache"
+    return league_data
 
 @api_router.get("/leagues", response_model=List[League])
 async def get_leagues():
-    leagues = await db.leagues.find().to_list(100)
-    return [League(**league) for league in leagues]
+    with span("storage_read"):
+        leagues = await repository.list(100)
+    with span("hydrate"):
+        return [League(**league) for league in leagues]
 
 @api_router.post("/leagues/{league_id}/draft", response_model=League)
 async def add_draft_pick(league_id: str, pick_data: DraftPickCreate):
-    # Get league
-    league_data = await db.leagues.find_one({"id": league_id})
+    league_data = await commit_draft_pick(league_id, pick_data)
     if not league_data:
         raise HTTPException(status_code=404, detail="League not found")
-    
-    league = League(**league_data)
-    
-    # Find team
-    team_index = None
-    for i, team in enumerate(league.teams):
-        if team.id == pick_data.team_id:
-            team_index = i
-            break
-    
-    if team_index is None:
-        raise HTTPException(status_code=404, detail="Team not found")
-    
-    team = league.teams[team_index]
-    
-    # Validate pick
-    if pick_data.amount > team.remaining:
-        raise HTTPException(status_code=400, detail="Insufficient budget")
-    
-    # Create player and draft pick
-    player = Player(**pick_data.player.dict())
-    draft_pick = DraftPick(
-        player=player,
-        team_id=pick_data.team_id,
-        amount=pick_data.amount
-    )
-    
-    # Update team
-    team.roster.append(draft_pick)
-    team.spent += pick_data.amount
-    team = calculate_team_metrics(team, league.position_requirements, league.roster_size)
-    
-    # Update league
-    league.teams[team_index] = team
-    league.all_picks.append(draft_pick)
-    
-    # Save to database
-    await db.leagues.replace_one({"id": league_id}, league.dict())
-    
-    return league
+    return league_data
 
 @api_router.delete("/leagues/{league_id}/picks/{pick_id}")
 async def undo_pick(league_id: str, pick_id: str):
-    # Get league
-    league_data = await db.leagues.find_one({"id": league_id})
+    league_data = await league_manager.execute(league_id, lambda state: apply_undo_pick(state, pick_id))
     if not league_data:
         raise HTTPException(status_code=404, detail="League not found")
+    return {"message": "Pick undone successfully"}
+
+@api_router.get("/leagues/{league_id}/state", response_model=League)
+async def get_league_state(league_id: str, at_pick: int):
+    """The league as it stood after the first `at_pick` entries (picks and undos) of its pick history"""
+    state = await league_manager.state(league_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    if not 0 <= at_pick <= state.log_length:
+        raise HTTPException(status_code=400, detail=f"at_pick must be between 0 and {state.log_length}")
+    if at_pick == state.log_length:
+        return state.to_document()
     
-    league = League(**league_data)
-    
-    # Find and remove pick from league
-    pick_to_remove = None
-    for i, pick in enumerate(league.all_picks):
-        if pick.id == pick_id:
-            pick_to_remove = pick
-            league.all_picks.pop(i)
-            break
-    
-    if not pick_to_remove:
-        raise HTTPException(status_code=404, detail="Pick not found")
+    # Nearest checkpoint at or before the pick, plus the few events after it, once queued history is written
+    await derived_writes.flush()
+    past = await pick_history.state_at(league_id, at_pick)
+    if past is None:
+        raise HTTPException(status_code=404, detail="No pick history recorded for this league at that pick")
+    return past.to_document()
+
+# Price analytics
+def rollup_format(teams: Optional[int], budget: Optional[int]) -> str:
+    if teams is None and budget is None:
+        return ALL_FORMATS
+    if teams is None or budget is None:
+        raise HTTPException(status_code=400, detail="teams and budget must be given together")
+    return league_format(teams, budget)
+
+@api_router.get("/analytics/prices")
+async def get_price_stats(
+    player: Optional[str] = None,
+    position: Optional[str] = None,
+    pos_rank: Optional[str] = None,
+    teams: Optional[int] = None,
+    budget: Optional[int] = None,
+):
+    """Prices paid for a player (name + position) or a positional rank, in one league format or all of them"""
+    fmt = rollup_format(teams, budget)
+    if player and position:
+        key = f"player:{fmt}:{player_key(player, position)}"
+    elif pos_rank:
+        key = f"pos_rank:{fmt}:{normalize_pos_rank(pos_rank)}"
+    else:
+        raise HTTPException(status_code=400, detail="Give player and position, or pos_rank")
+    summary = (await price_rollups.fetch([key]))[key]
+    return {"format": fmt, "player": player, "position": position, "pos_rank": pos_rank, **summary}
+
+@api_router.get("/analytics/curves/{by}")
+async def get_price_curve(by: str, teams: Optional[int] = None, budget: Optional[int] = None):
+    """Price by adp or etr_rank, in buckets of one 12-team round"""
+    if by not in ("adp", "etr_rank"):
+        raise HTTPException(status_code=404, detail="Curves are by adp or etr_rank")
+    fmt = rollup_format(teams, budget)
+    keys = [f"{by}:{fmt}:{bucket}" for bucket in range(CURVE_BUCKETS)]
+    summaries = await price_rollups.fetch(keys)
+    points = [
+        {"from": bucket * CURVE_BUCKET + 1, "to": (bucket + 1) * CURVE_BUCKET, **summaries[key]}
+        for bucket, key in enumerate(keys)
+    ]
+    return {"by": by, "format": fmt, "points": points}
+
+# Price model values
+@api_router.get("/leagues/{league_id}/values")
+async def get_player_values(league_id: str, position: str = "", limit: int = 500):
+    """Model prices of the players still available in a league, highest first"""
+    model = get_price_model()
+    if model is None:
+        raise HTTPException(status_code=503, detail="No price model trained yet (run `python pricing.py`)")
+    league = await league_manager.get(league_id)
+    if not league:
+        raise HTTPException(status_code=404, detail="League not found")
+    catalog = await get_catalog()
     
-    # Find team and remove pick
-    for team_index, team in enumerate(league.teams):
-        if team.id == pick_to_remove.team_id:
-            for j, roster_pick in enumerate(team.roster):
-                if roster_pick.id == pick_id:
-                    team.roster.pop(j)
-                    team.spent -= pick_to_remove.amount
-                    team = calculate_team_metrics(team, league.position_requirements, league.roster_size)
-                    league.teams[team_index] = team
-                    break
-            break
+    with span("logic"):
+        prices = model.score(catalog, league)
+        tiers = tier_cache.get(catalog, model, league["total_teams"], league["budget_per_team"], league["roster_size"])
+        drafted = {player_key(pick["player"]["name"], pick["player"]["position"]) for pick in league["all_picks"]}
+        players = []
+        for index in prices.argsort(kind="stable")[::-1]:
+            player = catalog.players[index]
+            if position and player["position"] != position:
+                continue
+            if player_key(player["name"], player["position"]) in drafted:
+                continue
+            players.append({**player, "value": int(prices[index]), "tier": int(tiers.tiers[index])})
+            if len(players) >= limit:
+                break
+    return {"league_id": league_id, "catalog_version": catalog.version, "picks_made": len(league["all_picks"]), "players": players}
+
+# Exports
+EXPORTS = {"picks": (pick_rows, PICK_COLUMNS), "rosters": (roster_rows, ROSTER_COLUMNS)}
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '100'))
+
+def check_export(kind: str, export_format: str) -> None:
+    if kind not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{kind}' (expected one of: {', '.join(EXPORTS)})")
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+def export_response(batches, kind: str, export_format: str, filename: str) -> StreamingResponse:
+    rows, columns = EXPORTS[kind]
+    return StreamingResponse(
+        stream_export(batches, rows, export_format, columns),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
+
+@api_router.get("/leagues/{league_id}/export/{kind}")
+async def export_league(league_id: str, kind: str, export_format: str = Query("csv", alias="format")):
+    """A league's picks or team rosters as CSV or JSON Lines"""
+    check_export(kind, export_format)
+    league = await league_manager.get(league_id)
+    if not league:
+        raise HTTPException(status_code=404, detail="League not found")
     
-    # Save to database
-    await db.leagues.replace_one({"id": league_id}, league.dict())
+    async def single_batch():
+        yield [league]
     
+    return export_response(single_batch(), kind, export_format, f"{kind}-{league_id}")
+
+@api_router.get("/export/{kind}", dependencies=[Depends(require_admin)])
+async def export_all_leagues(kind: str, export_format: str = Query("csv", alias="format")):
+    """Every league's picks or rosters, streamed from a storage cursor one batch of leagues at a time"""
+    check_export(kind, export_format)
+    batches = repository.iter_batches(EXPORT_BATCH_SIZE, EXPORT_FIELDS)
+    return export_response(batches, kind, export_format, f"{kind}-all-leagues")
+
+async def live_fork(league_id: str, fork_id: str):
+    """Parent's live state and the fork; use both before the next await"""
+    parent = await league_manager.state(league_id)
+    if parent is None:
+        league_forks.forget_league(league_id)
+        raise HTTPException(status_code=404, detail="League not found")
+    return parent, league_forks.get(league_id, fork_id)
+
+@api_router.post("/leagues/{league_id}/forks")
+async def create_fork(league_id: str, fork_data: ForkCreate):
+    """Fork the league after its first `at_pick` picks for a what-if or mock draft"""
+    parent = await league_manager.state(league_id)
+    if parent is None:
+        raise HTTPException(status_code=404, detail="League not found")
+    return league_forks.create(parent, fork_data.at_pick, fork_data.name).summary()
+
+@api_router.get("/leagues/{league_id}/forks")
+async def get_forks(league_id: str):
+    return [fork.summary() for fork in league_forks.list(league_id)]
+
+@api_router.get("/leagues/{league_id}/forks/{fork_id}", response_model=League)
+async def get_fork(league_id: str, fork_id: str):
+    parent, fork = await live_fork(league_id, fork_id)
+    return fork.merged(parent).to_document()
+
+@api_router.post("/leagues/{league_id}/forks/{fork_id}/draft", response_model=League)
+async def add_fork_pick(league_id: str, fork_id: str, pick_data: DraftPickCreate):
+    parent, fork = await live_fork(league_id, fork_id)
+    state = fork.merged(parent)
+    apply_draft_pick(state, pick_data)
+    # What-if picks never reach the price rollups
+    state.pick_rollup_format[-1] = None
+    fork.picks.append(state.pick_document(len(state.pick_amount) - 1))
+    state.version = len(fork.picks)
+    return state.to_document()
+
+@api_router.delete("/leagues/{league_id}/forks/{fork_id}/picks/{pick_id}")
+async def undo_fork_pick(league_id: str, fork_id: str, pick_id: str):
+    parent, fork = await live_fork(league_id, fork_id)
+    fork.undo(parent, pick_id)
     return {"message": "Pick undone successfully"}
 
+@api_router.delete("/leagues/{league_id}/forks/{fork_id}")
+async def discard_fork(league_id: str, fork_id: str):
+    if not league_forks.discard(league_id, fork_id):
+        raise HTTPException(status_code=404, detail="Fork not found")
+    return {"message": "Fork discarded"}
+
+@api_router.post("/leagues/{league_id}/auction")
+async def start_auction(league_id: str, settings: AuctionStart):
+    """Start the live auction clock for a league"""
+    league_data = await league_manager.get(league_id)
+    if not league_data:
+        raise HTTPException(status_code=404, detail="League not found")
+    auction_engine.start(league_data, settings.bid_seconds)
+    return auction_engine.state(league_id)
+
+@api_router.get("/leagues/{league_id}/auction")
+async def get_auction(league_id: str):
+    return auction_engine.state(league_id)
+
+@api_router.delete("/leagues/{league_id}/auction")
+async def stop_auction(league_id: str):
+    if not auction_engine.stop(league_id):
+        raise HTTPException(status_code=404, detail="No auction running for this league")
+    return {"message": "Auction stopped"}
+
+@api_router.post("/leagues/{league_id}/auction/nominate")
+async def nominate_player(league_id: str, nomination: Nomination):
+    """Nominate a player with an opening bid; only the team whose turn it is may nominate"""
+    auction_engine.nominate(league_id, nomination.team_id, nomination.player.dict(), nomination.amount)
+    return auction_engine.state(league_id)
+
+@api_router.post("/leagues/{league_id}/auction/bids")
+async def place_bid(league_id: str, bid: Bid):
+    """Live bid, applied in server receive order; losing bids are rejected in memory without a write"""
+    receipt = auction_engine.bid(league_id, bid.team_id, bid.amount, bid.lot)
+    if not receipt["accepted"]:
+        return JSONResponse(status_code=BID_REJECTIONS[receipt["reason"]], content=receipt)
+    return receipt
+
 @api_router.post("/demo-league", response_model=League)
 async def create_demo_league():
     # Create the "Pipelayer Pro Bowl" demo league
@@ -272,289 +753,225 @@ async def create_demo_league():
     )
     
     # Delete existing demo league if it exists
-    await db.leagues.delete_many({"name": "Pipelayer Pro Bowl"})
+    await repository.delete_by_name("Pipelayer Pro Bowl")
+    league_manager.forget_name("Pipelayer Pro Bowl")
+    await event_bus.publish(LEAGUE_CHANNEL, {"type": "delete_name", "name": "Pipelayer Pro Bowl"})
     
-    await db.leagues.insert_one(league.dict())
+    document = league.dict()
+    with span("storage_write"):
+        await repository.insert(document)
+    league_manager.adopt(document)
+    await record_history(document)
     return league
 
 @api_router.put("/leagues/{league_id}/settings")
 async def update_league_settings(league_id: str, settings: LeagueCreate):
     """Update league settings"""
-    try:
-        league_data = await db.leagues.find_one({"id": league_id})
-        if not league_data:
-            raise HTTPException(status_code=404, detail="League not found")
-        
-        league = League(**league_data)
-        
-        # Update basic settings
-        league.name = settings.name
-        league.total_teams = settings.total_teams
-        league.budget_per_team = settings.budget_per_team
-        league.roster_size = settings.roster_size
-        league.position_requirements = settings.position_requirements
-        
-        # Update team budgets and recalculate metrics if budget changed
-        if league.budget_per_team != league_data['budget_per_team']:
-            for i, team in enumerate(league.teams):
-                # Adjust remaining budget proportionally
-                old_budget = league_data['budget_per_team']
-                spent_ratio = team.spent / old_budget if old_budget > 0 else 0
-                team.budget = settings.budget_per_team
-                team.remaining = team.budget - team.spent
-                team = calculate_team_metrics(team, league.position_requirements, league.roster_size)
-                league.teams[i] = team
-        
-        # Adjust number of teams if changed
-        current_team_count = len(league.teams)
-        if settings.total_teams > current_team_count:
-            # Add new teams
-            for i in range(current_team_count, settings.total_teams):
-                new_team = Team(
-                    name=f"Team {i + 1}",
-                    budget=settings.budget_per_team,
-                    remaining=settings.budget_per_team,
-                    roster_spots=settings.position_requirements.copy()
-                )
-                new_team = calculate_team_metrics(new_team, settings.position_requirements, settings.roster_size)
-                league.teams.append(new_team)
-        elif settings.total_teams < current_team_count:
-            # Remove teams (only if they have no players)
-            teams_to_remove = []
-            for i in range(settings.total_teams, current_team_count):
-                if len(league.teams[i].roster) == 0:
-                    teams_to_remove.append(i)
-                else:
-                    raise HTTPException(status_code=400, detail=f"Cannot remove Team {i+1} - they have drafted players")
-            
-            # Remove teams in reverse order to maintain indices
-            for i in reversed(teams_to_remove):
-                league.teams.pop(i)
-        
-        # Save updated league
-        await db.leagues.replace_one({"id": league_id}, league.dict())
-        return league
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error updating league settings: {str(e)}")
+    league_data = await league_manager.execute(
+        league_id, lambda state: apply_model_change(state, lambda league: apply_league_settings(league, settings))
+    )
+    if not league_data:
+        raise HTTPException(status_code=404, detail="League not found")
+    return league_data
 
 @api_router.put("/leagues/{league_id}/teams/{team_id}")
 async def update_team(league_id: str, team_id: str, team_data: dict):
     """Update team details"""
+    league_data = await league_manager.execute(
+        league_id, lambda state: apply_model_change(state, lambda league: apply_team_update(league, team_id, team_data))
+    )
+    if not league_data:
+        raise HTTPException(status_code=404, detail="League not found")
+    return league_data
+
+# Player catalog
+@api_router.get("/players/catalog")
+async def get_player_catalog(request: Request):
+    """Full player catalog in compact columnar form, revalidated by ETag"""
+    catalog = await get_catalog()
+    headers = {"ETag": catalog.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    
+    if etag_matches(request.headers.get("if-none-match"), catalog.etag):
+        return Response(status_code=304, headers=headers)
+    
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=catalog.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=catalog.body, media_type="application/json", headers=headers)
+
+@api_router.post("/admin/catalog/reload", dependencies=[Depends(require_admin)])
+async def reload_player_catalog(file: Optional[UploadFile] = File(None), path: str = "", url: str = ""):
+    """Swap in fresh rankings from an uploaded CSV, a file in CATALOG_DIR or an allow-listed URL"""
     try:
-        league_data = await db.leagues.find_one({"id": league_id})
-        if not league_data:
-            raise HTTPException(status_code=404, detail="League not found")
-        
-        league = League(**league_data)
-        
-        # Find and update team
-        team_found = False
-        for i, team in enumerate(league.teams):
-            if team.id == team_id:
-                if 'name' in team_data:
-                    team.name = team_data['name']
-                league.teams[i] = team
-                team_found = True
-                break
-        
-        if not team_found:
-            raise HTTPException(status_code=404, detail="Team not found")
-        
-        # Save updated league
-        await db.leagues.replace_one({"id": league_id}, league.dict())
-        return league
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error updating team: {str(e)}")
+        csv_text = (await file.read()).decode("utf-8") if file else None
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Uploaded rankings are not UTF-8")
+    try:
+        catalog = await reload_catalog(csv_text=csv_text, path=path or None, url=url or None)
+    except CatalogLoadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await announce_catalog(catalog)
+    return {"version": catalog.version, "count": len(catalog.players), "source": catalog.source}
+
+@api_router.post("/admin/catalog/merge", dependencies=[Depends(require_admin)])
+async def merge_player_catalog(merge: Union[CatalogMerge, List[RankingSource]]):
+    """Merge several ranking files from CATALOG_DIR into a consensus catalog and swap it in.
+
+    The body is the list of sources, or {"sources": [...], "aliases": {...}} to merge names spelled
+    differently across sources.
+    """
+    if isinstance(merge, list):
+        merge = CatalogMerge(sources=merge)
+    try:
+        sources = [source.copy(update={"path": str(catalog_path(source.path))}) for source in merge.sources]
+        catalog, stats = await run_in_threadpool(build_merged_catalog, sources, merge.aliases)
+    except CatalogLoadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await swap_catalog(catalog)
+    await announce_catalog(catalog)
+    return {
+        "version": catalog.version,
+        "count": len(catalog.players),
+        "source": catalog.source,
+        "rows": stats.rows,
+        "skipped_rows": stats.skipped_rows,
+        "rows_per_second": round(stats.rows_per_second),
+    }
+
+@api_router.get("/admin/price-model", dependencies=[Depends(require_admin)])
+async def get_price_model_summary():
+    model = get_price_model()
+    if model is None:
+        raise HTTPException(status_code=404, detail="No price model trained yet")
+    return model.summary()
+
+@api_router.post("/admin/price-model/reload", dependencies=[Depends(require_admin)])
+async def reload_player_price_model():
+    """Pick up coefficients the training command wrote to PRICE_MODEL_PATH"""
+    model = await run_in_threadpool(reload_price_model, PRICE_MODEL_PATH)
+    if model is None:
+        raise HTTPException(status_code=404, detail="No price model trained yet")
+    return model.summary()
+
+@api_router.get("/admin/search-cache", dependencies=[Depends(require_admin)])
+async def get_search_cache_stats():
+    """Search LRU hit/miss counters for sizing SEARCH_CACHE_SIZE"""
+    return search_cache.stats()
+
+@api_router.get("/admin/event-bus", dependencies=[Depends(require_admin)])
+async def get_event_bus_stats():
+    """Invalidation bus counters and live-league invalidations"""
+    return {**event_bus.stats(), "leagues": league_manager.stats()}
 
-# Sample NFL players data
 @api_router.get("/players/search")
 async def search_players(q: str = "", position: str = "", limit: int = 500):
     """Search players by name, position, or team - now using real CSV data"""
     try:
-        # Load CSV data from the public URL
-        csv_url = "https://customer-assets.emergentagent.com/job_draft-wizard-2/artifacts/3gaj8jfg_ETR_New_Rankings_Redraft_PPR.csv"
-        
-        # Add headers to avoid blocking
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(csv_url, headers=headers, timeout=30)
-        response.raise_for_status()  # Raise exception for bad status codes
-        
-        # Remove BOM if present and create StringIO
-        csv_text = response.text
-        if csv_text.startswith('\ufeff'):
-            csv_text = csv_text[1:]
-        csv_data = StringIO(csv_text)
-        
-        players = []
-        csv_reader = csv.DictReader(csv_data)
-        
-        for row in csv_reader:
-            # Clean and parse the data
-            try:
-                # Handle potential BOM in first column name
-                name_key = "Name" if "Name" in row else list(row.keys())[0]
-                
-                player = {
-                    "name": row[name_key].strip('"'),
-                    "position": row["Position"].strip('"'),
-                    "nfl_team": row["Team"].strip('"'),
-                    "etr_rank": int(row["ETR Rank"].strip('"')) if row["ETR Rank"].strip('"').isdigit() else 999,
-                    "adp": float(row["ADP"].strip('"')) if row["ADP"].strip('"').replace('.','').isdigit() else 999.0,
-                    "pos_rank": row["Pos Rank ETR"].strip('"')
-                }
-                
-                # Only add valid players
-                if player["name"] and player["position"]:
-                    players.append(player)
-                    
-            except (ValueError, KeyError) as e:
-                # Skip malformed rows but continue processing
-                continue
-        
-        logger.info(f"Successfully loaded {len(players)} players from CSV")
-        
-        # Filter players based on search criteria
-        filtered_players = []
-        search_query = q.lower() if q else ""
-        
-        # For single letter searches, prioritize players whose FIRST NAME starts with that letter
-        if len(search_query) == 1:
-            first_name_matches = []
-            other_matches = []
-            
-            for player in players:
-                position_match = not position or player["position"] == position
-                if not position_match:
-                    continue
-                    
-                name_parts = player["name"].lower().split()
-                first_name = name_parts[0] if name_parts else ""
-                
-                # Check if first name starts with search letter
-                if first_name.startswith(search_query):
-                    first_name_matches.append(player)
-                elif search_query in player["name"].lower() or search_query in player["nfl_team"].lower():
-                    other_matches.append(player)
-            
-            # Sort first name matches by ETR rank, then add other matches
-            first_name_matches.sort(key=lambda x: x["etr_rank"] if x["etr_rank"] != 999 else 999)
-            other_matches.sort(key=lambda x: x["etr_rank"] if x["etr_rank"] != 999 else 999)
-            
-            filtered_players = first_name_matches + other_matches
-        else:
-            # For multi-character searches, use normal logic
-            for player in players:
-                name_match = search_query in player["name"].lower() if search_query else True
-                team_match = search_query in player["nfl_team"].lower() if search_query else True
-                position_match = not position or player["position"] == position
-                
-                if (name_match or team_match) and position_match:
-                    filtered_players.append(player)
-                    
-                if len(filtered_players) >= limit:
-                    break
-            
-            # Sort by ETR rank
-            filtered_players.sort(key=lambda x: x["etr_rank"] if x["etr_rank"] != 999 else 999)
-        
-        return filtered_players[:limit]
-        
-    except requests.RequestException as e:
-        logger.error(f"Failed to load CSV from URL: {str(e)}")
-        # Enhanced fallback data with more players
-        sample_players = [
-            {"name": "Ja'Marr Chase", "position": "WR", "nfl_team": "CIN", "etr_rank": 1, "adp": 1.0, "pos_rank": "WR01"},
-            {"name": "Bijan Robinson", "position": "RB", "nfl_team": "ATL", "etr_rank": 2, "adp": 2.8, "pos_rank": "RB01"},
-            {"name": "CeeDee Lamb", "position": "WR", "nfl_team": "DAL", "etr_rank": 3, "adp": 5.2, "pos_rank": "WR02"},
-            {"name": "Saquon Barkley", "position": "RB", "nfl_team": "PHI", "etr_rank": 4, "adp": 2.8, "pos_rank": "RB02"},
-            {"name": "Justin Jefferson", "position": "WR", "nfl_team": "MIN", "etr_rank": 5, "adp": 4.6, "pos_rank": "WR03"},
-            {"name": "Jahmyr Gibbs", "position": "RB", "nfl_team": "DET", "etr_rank": 6, "adp": 4.6, "pos_rank": "RB03"},
-            {"name": "Christian McCaffrey", "position": "RB", "nfl_team": "SF", "etr_rank": 7, "adp": 9.4, "pos_rank": "RB04"},
-            {"name": "Puka Nacua", "position": "WR", "nfl_team": "LA", "etr_rank": 8, "adp": 9.0, "pos_rank": "WR04"},
-            {"name": "Amon-Ra St. Brown", "position": "WR", "nfl_team": "DET", "etr_rank": 9, "adp": 8.8, "pos_rank": "WR05"},
-            {"name": "Malik Nabers", "position": "WR", "nfl_team": "NYG", "etr_rank": 10, "adp": 9.2, "pos_rank": "WR06"},
-            {"name": "Nico Collins", "position": "WR", "nfl_team": "HOU", "etr_rank": 11, "adp": 14.4, "pos_rank": "WR07"},
-            {"name": "De'Von Achane", "position": "RB", "nfl_team": "MIA", "etr_rank": 12, "adp": 13.0, "pos_rank": "RB05"},
-            {"name": "Ashton Jeanty", "position": "RB", "nfl_team": "LV", "etr_rank": 13, "adp": 10.2, "pos_rank": "RB06"},
-            {"name": "Brian Thomas Jr.", "position": "WR", "nfl_team": "JAX", "etr_rank": 14, "adp": 14.6, "pos_rank": "WR08"},
-            {"name": "Brock Bowers", "position": "TE", "nfl_team": "LV", "etr_rank": 15, "adp": 18.6, "pos_rank": "TE01"},
-            {"name": "A.J. Brown", "position": "WR", "nfl_team": "PHI", "etr_rank": 16, "adp": 17.4, "pos_rank": "WR09"},
-            {"name": "Drake London", "position": "WR", "nfl_team": "ATL", "etr_rank": 17, "adp": 20.0, "pos_rank": "WR10"},
-            {"name": "Derrick Henry", "position": "RB", "nfl_team": "BAL", "etr_rank": 18, "adp": 11.4, "pos_rank": "RB07"},
-            {"name": "Chase Brown", "position": "RB", "nfl_team": "CIN", "etr_rank": 19, "adp": 27.4, "pos_rank": "RB08"},
-            {"name": "Bucky Irving", "position": "RB", "nfl_team": "TB", "etr_rank": 20, "adp": 21.6, "pos_rank": "RB09"},
-            {"name": "Ladd McConkey", "position": "WR", "nfl_team": "LAC", "etr_rank": 21, "adp": 24.8, "pos_rank": "WR11"},
-            {"name": "Tyreek Hill", "position": "WR", "nfl_team": "MIA", "etr_rank": 22, "adp": 28.2, "pos_rank": "WR12"},
-            {"name": "Trey McBride", "position": "TE", "nfl_team": "ARI", "etr_rank": 23, "adp": 26.0, "pos_rank": "TE02"},
-            {"name": "Josh Jacobs", "position": "RB", "nfl_team": "GB", "etr_rank": 24, "adp": 17.0, "pos_rank": "RB10"},
-            {"name": "Tee Higgins", "position": "WR", "nfl_team": "CIN", "etr_rank": 25, "adp": 31.0, "pos_rank": "WR13"},
-            {"name": "Jonathan Taylor", "position": "RB", "nfl_team": "IND", "etr_rank": 26, "adp": 20.2, "pos_rank": "RB11"},
-            {"name": "Breece Hall", "position": "RB", "nfl_team": "NYJ", "etr_rank": 27, "adp": 34.2, "pos_rank": "RB12"},
-            {"name": "Omarion Hampton", "position": "RB", "nfl_team": "LAC", "etr_rank": 28, "adp": 43.6, "pos_rank": "RB13"},
-            {"name": "Jaxon Smith-Njigba", "position": "WR", "nfl_team": "SEA", "etr_rank": 29, "adp": 33.4, "pos_rank": "WR14"},
-            {"name": "Davante Adams", "position": "WR", "nfl_team": "LA", "etr_rank": 30, "adp": 37.2, "pos_rank": "WR15"},
-            {"name": "Kyren Williams", "position": "RB", "nfl_team": "LA", "etr_rank": 31, "adp": 24.2, "pos_rank": "RB14"},
-            {"name": "George Kittle", "position": "TE", "nfl_team": "SF", "etr_rank": 32, "adp": 38.0, "pos_rank": "TE03"},
-            {"name": "Garrett Wilson", "position": "WR", "nfl_team": "NYJ", "etr_rank": 33, "adp": 35.6, "pos_rank": "WR16"},
-            {"name": "James Cook", "position": "RB", "nfl_team": "BUF", "etr_rank": 34, "adp": 31.8, "pos_rank": "RB15"},
-            {"name": "DJ Moore", "position": "WR", "nfl_team": "CHI", "etr_rank": 35, "adp": 48.6, "pos_rank": "WR17"},
-            {"name": "Xavier Worthy", "position": "WR", "nfl_team": "KC", "etr_rank": 36, "adp": 57.4, "pos_rank": "WR18"},
-            {"name": "Tet McMillan", "position": "WR", "nfl_team": "CAR", "etr_rank": 37, "adp": 67.2, "pos_rank": "WR19"},
-            {"name": "Devonta Smith", "position": "WR", "nfl_team": "PHI", "etr_rank": 38, "adp": 57.0, "pos_rank": "WR20"},
-            {"name": "Marvin Harrison Jr.", "position": "WR", "nfl_team": "ARI", "etr_rank": 39, "adp": 40.6, "pos_rank": "WR21"},
-            {"name": "Josh Allen", "position": "QB", "nfl_team": "BUF", "etr_rank": 40, "adp": 23.6, "pos_rank": "QB01"},
-            {"name": "Lamar Jackson", "position": "QB", "nfl_team": "BAL", "etr_rank": 41, "adp": 22.8, "pos_rank": "QB02"},
-            {"name": "Kenneth Walker III", "position": "RB", "nfl_team": "SEA", "etr_rank": 42, "adp": 38.2, "pos_rank": "RB16"},
-            {"name": "Terry McLaurin", "position": "WR", "nfl_team": "WAS", "etr_rank": 43, "adp": 37.6, "pos_rank": "WR22"},
-            {"name": "Alvin Kamara", "position": "RB", "nfl_team": "NO", "etr_rank": 44, "adp": 38.8, "pos_rank": "RB17"},
-            {"name": "Mike Evans", "position": "WR", "nfl_team": "TB", "etr_rank": 45, "adp": 40.2, "pos_rank": "WR23"},
-            {"name": "Courtland Sutton", "position": "WR", "nfl_team": "DEN", "etr_rank": 46, "adp": 53.6, "pos_rank": "WR24"},
-            {"name": "Zay Flowers", "position": "WR", "nfl_team": "BAL", "etr_rank": 47, "adp": 61.8, "pos_rank": "WR25"},
-            {"name": "Jayden Daniels", "position": "QB", "nfl_team": "WAS", "etr_rank": 48, "adp": 31.0, "pos_rank": "QB03"},
-            {"name": "Jaylen Waddle", "position": "WR", "nfl_team": "MIA", "etr_rank": 49, "adp": 74.8, "pos_rank": "WR26"},
-            {"name": "Chuba Hubbard", "position": "RB", "nfl_team": "CAR", "etr_rank": 50, "adp": 45.6, "pos_rank": "RB18"},
-            {"name": "Joe Burrow", "position": "QB", "nfl_team": "CIN", "etr_rank": 72, "adp": 36.4, "pos_rank": "QB05"},
-            {"name": "Patrick Mahomes", "position": "QB", "nfl_team": "KC", "etr_rank": 87, "adp": 54.6, "pos_rank": "QB07"},
-            {"name": "Brock Purdy", "position": "QB", "nfl_team": "SF", "etr_rank": 91, "adp": 105.6, "pos_rank": "QB08"},
-            {"name": "Baker Mayfield", "position": "QB", "nfl_team": "TB", "etr_rank": 93, "adp": 66.0, "pos_rank": "QB09"},
-            {"name": "Caleb Williams", "position": "QB", "nfl_team": "CHI", "etr_rank": 98, "adp": 115.0, "pos_rank": "QB10"},
-            {"name": "Sam LaPorta", "position": "TE", "nfl_team": "DET", "etr_rank": 62, "adp": 51.6, "pos_rank": "TE04"},
-            {"name": "T.J. Hockenson", "position": "TE", "nfl_team": "MIN", "etr_rank": 78, "adp": 62.0, "pos_rank": "TE05"},
-            {"name": "Travis Kelce", "position": "TE", "nfl_team": "KC", "etr_rank": 79, "adp": 62.8, "pos_rank": "TE06"},
-            {"name": "Mark Andrews", "position": "TE", "nfl_team": "BAL", "etr_rank": 95, "adp": 75.8, "pos_rank": "TE07"},
-            {"name": "Brandon Aubrey", "position": "K", "nfl_team": "DAL", "etr_rank": 151, "adp": 111.2, "pos_rank": "K01"},
-            {"name": "Matt Gay", "position": "K", "nfl_team": "WAS", "etr_rank": 157, "adp": 193.8, "pos_rank": "K02"},
-            {"name": "Will Reichard", "position": "K", "nfl_team": "MIN", "etr_rank": 160, "adp": 235.3, "pos_rank": "K03"},
-            {"name": "Younghoe Koo", "position": "K", "nfl_team": "ATL", "etr_rank": 166, "adp": 191.6, "pos_rank": "K04"},
-            {"name": "Cameron Dicker", "position": "K", "nfl_team": "LAC", "etr_rank": 172, "adp": 125.4, "pos_rank": "K05"},
-            {"name": "DEN DST", "position": "DST", "nfl_team": "DEN", "etr_rank": 150, "adp": 114.0, "pos_rank": "DST01"},
-            {"name": "SF DST", "position": "DST", "nfl_team": "SF", "etr_rank": 164, "adp": 170.6, "pos_rank": "DST02"},
-            {"name": "BAL DST", "position": "DST", "nfl_team": "BAL", "etr_rank": 165, "adp": 135.6, "pos_rank": "DST03"},
-            {"name": "PIT DST", "position": "DST", "nfl_team": "PIT", "etr_rank": 168, "adp": 135.0, "pos_rank": "DST04"},
-            {"name": "HOU DST", "position": "DST", "nfl_team": "HOU", "etr_rank": 169, "adp": 153.0, "pos_rank": "DST05"}
-        ]
-        
-        # Filter fallback data
-        filtered_players = []
-        for player in sample_players:
-            if (not q or q.lower() in player["name"].lower() or q.lower() in player["nfl_team"].lower()) and \
-               (not position or player["position"] == position):
-                filtered_players.append(player)
-        
-        return filtered_players[:limit]
+        catalog = await get_catalog()
+        tiers = tier_cache.get(catalog, get_price_model())
+        return Response(content=search_json(catalog, q, position, limit, tiers), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Unexpected error in player search: {str(e)}")
         return []
 
+@api_router.get("/players/tiers")
+async def get_player_tiers(position: str = "", teams: int = 12, budget: int = 200, roster_size: int = 16):
+    """Tier breaks of every position, over model prices for the league format (or ETR rank before a model is trained)"""
+    catalog = await get_catalog()
+    return tier_cache.get(catalog, get_price_model(), teams, budget, roster_size).summary(position)
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of request, storage, catalog and league metrics"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/admin/idempotency", dependencies=[Depends(require_admin)])
+async def get_idempotency_stats():
+    return idempotency_store.stats()
+
+@api_router.get("/admin/forks", dependencies=[Depends(require_admin)])
+async def get_fork_stats():
+    return league_forks.stats()
+
+@api_router.get("/admin/tracing", dependencies=[Depends(require_admin)])
+async def get_tracing_settings():
+    return tracer.settings()
+
+@api_router.put("/admin/tracing", dependencies=[Depends(require_admin)])
+async def update_tracing_settings(settings: TracingSettings):
+    """Turn tracing of every request and sampled profiling on or off without a restart"""
+    if settings.trace_all is not None:
+        tracer.trace_all = settings.trace_all
+    if settings.sample_every is not None:
+        tracer.sample_every = settings.sample_every
+    logger.info(f"Tracing settings changed: trace_all={tracer.trace_all} sample_every={tracer.sample_every}")
+    return tracer.settings()
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Startup warmup: storage, indexes, catalog and value tables for common formats, then /readyz turns 200
+WARMUP_FORMATS = [
+    tuple(int(part) for part in fmt.split("x"))  # teams x budget x roster size
+    for fmt in os.environ.get('WARMUP_FORMATS', '12x200x16,14x300x16,10x200x16').split(",") if fmt
+]
+
+async def ensure_indexes() -> None:
+    """Indexes for leagues, pick history and price rollups"""
+    await repository.ensure_indexes()
+    await pick_history.ensure_indexes()
+    await price_rollups.ensure_indexes()
+
+async def warm_value_tables() -> None:
+    """Load the price model and build tier tables and the default search page before the first user asks"""
+    catalog = await get_catalog()
+    model = await run_in_threadpool(get_price_model)
+    for teams, budget, roster_size in WARMUP_FORMATS:
+        tier_cache.get(catalog, model, teams, budget, roster_size)
+    search_json(catalog, tiers=tier_cache.get(catalog, model))
+
+warmup = Warmup(
+    [
+        ("storage", repository.ping),
+        ("indexes", ensure_indexes),
+        ("catalog", get_catalog),
+        ("value_tables", warm_value_tables),
+    ],
+    retry_seconds=float(os.environ.get('WARMUP_RETRY_SECONDS', '5')),
+    # Opt-in: WARMUP_GC_FREEZE=1 gc.freeze()s the warmed heap to shorten full collections
+    freeze_gc=os.environ.get('WARMUP_GC_FREEZE', '0') == '1',
+)
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the event loop is serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: 200 only once warmup has finished (and until shutdown starts)"""
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+# Retried mutations carrying the same Idempotency-Key get the original response
+idempotency_store = IdempotencyStore(
+    ttl=float(os.environ.get('IDEMPOTENCY_TTL', '600')),
+    max_keys_per_league=int(os.environ.get('IDEMPOTENCY_MAX_KEYS', '256')),
+)
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+app.add_middleware(MetricsMiddleware, router=app.router)
+
+# Server-Timing spans for requests sending X-Trace (or all of them), and 1-in-N cProfile sampling
+tracer = Tracer(
+    os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')),
+    sample_every=int(os.environ.get('PROFILE_SAMPLE_EVERY', '0')),
+    trace_all=os.environ.get('TRACE_ALL_REQUESTS', '') == '1',
+)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -570,6 +987,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    await repository.start()
+    await event_bus.start()
+    warmup.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await warmup.close()
+    await event_bus.close()
+    await auction_engine.close()
+    await league_manager.close()
+    await derived_writes.flush()
+    await repository.close()
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""League storage: repository interface with MongoDB and in-memory engines"""
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+class LeagueRepository(ABC):
+    """Stores league documents (the `League.dict()` shape) by league id.
+
+    Documents handed to `insert`/`replace` become owned by the repository and
+    documents returned by `get`/`list` must be treated as read-only: routes
+    hydrate a fresh `League` from them and write back a new `.dict()`.
+    """
+
+    @abstractmethod
+    async def get(self, league_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def iter_batches(self, batch_size: int = 100, fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Every league, `batch_size` documents at a time, without loading them all at once.
+
+        `fields` (dotted paths) is a projection hint; engines that hold whole
+        documents anyway may return more.
+        """
+
+    @abstractmethod
+    async def insert(self, league: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    async def replace(self, league_id: str, league: Dict[str, Any], upsert: bool = False) -> None:
+        ...
+
+    async def replace_if_version(self, league_id: str, league: Dict[str, Any], version: int) -> bool:
+        """Replace a league only if the stored copy is still at `version`; False if another writer got there first.
+
+        Engines serving a single process may check and write in two steps;
+        shared engines override this with an atomic compare-and-set.
+        """
+        current = await self.get(league_id)
+        if current is None or current.get("version", 0) != version:
+            return False
+        await self.replace(league_id, league)
+        return True
+
+    async def insert_many(self, leagues: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Insert several new documents, carrying on past failures; returns {league id: error} for those that failed"""
+        failures = {}
+        for league in leagues:
+            try:
+                await self.insert(league)
+            except Exception as e:
+                failures[league["id"]] = str(e)
+        return failures
+
+    async def replace_many(self, leagues: List[Dict[str, Any]]) -> None:
+        """Upsert several documents; engines override this with a batched write"""
+        for league in leagues:
+            await self.replace(league["id"], league, upsert=True)
+
+    @abstractmethod
+    async def delete(self, league_id: str) -> int:
+        ...
+
+    @abstractmethod
+    async def delete_by_name(self, name: str) -> int:
+        ...
+
+    async def start(self) -> None:
+        """Called once the event loop is running, before traffic is served"""
+
+    async def ping(self) -> None:
+        """Raise if the storage backend is unreachable"""
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the engine's queries rely on (idempotent)"""
+
+    async def close(self) -> None:
+        pass
+
+
+class MongoLeagueRepository(LeagueRepository):
+    def __init__(self, mongo_url: str, db_name: str, **client_kwargs):
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.client = AsyncIOMotorClient(mongo_url, **client_kwargs)
+        self.db = self.client[db_name]
+        self.collection = self.db.leagues
+
+    async def get(self, league_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": league_id}, {"_id": 0})
+
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.collection.find({}, {"_id": 0}).to_list(limit)
+
+    async def iter_batches(self, batch_size: int = 100, fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else {"_id": 0}
+        cursor = self.collection.find({}, projection).batch_size(batch_size)
+        batch = []
+        async for league in cursor:
+            batch.append(league)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def insert(self, league: Dict[str, Any]) -> None:
+        await self.collection.insert_one(league)
+
+    async def replace(self, league_id: str, league: Dict[str, Any], upsert: bool = False) -> None:
+        await self.collection.replace_one({"id": league_id}, league, upsert=upsert)
+
+    async def replace_if_version(self, league_id: str, league: Dict[str, Any], version: int) -> bool:
+        # Documents written before versioning have no version field; they count as version 0
+        stored_version = version if version else {"$in": [0, None]}
+        result = await self.collection.replace_one({"id": league_id, "version": stored_version}, league)
+        return result.matched_count == 1
+
+    async def insert_many(self, leagues: List[Dict[str, Any]]) -> Dict[str, str]:
+        from pymongo.errors import BulkWriteError
+
+        if not leagues:
+            return {}
+        try:
+            await self.collection.insert_many(leagues, ordered=False)
+        except BulkWriteError as e:
+            return {leagues[error["index"]]["id"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+        return {}
+
+    async def replace_many(self, leagues: List[Dict[str, Any]]) -> None:
+        from pymongo import ReplaceOne
+
+        if leagues:
+            await self.collection.bulk_write(
+                [ReplaceOne({"id": league["id"]}, league, upsert=True) for league in leagues],
+                ordered=False,
+            )
+
+    async def delete(self, league_id: str) -> int:
+        result = await self.collection.delete_one({"id": league_id})
+        return result.deleted_count
+
+    async def delete_by_name(self, name: str) -> int:
+        result = await self.collection.delete_many({"name": name})
+        return result.deleted_count
+
+    async def ping(self) -> None:
+        await self.db.command("ping")
+
+    async def ensure_indexes(self) -> None:
+        from pymongo.errors import OperationFailure
+
+        try:
+            await self.collection.create_index("id", unique=True)
+            await self.collection.create_index("name")
+        except OperationFailure as e:
+            # Queries still work without them, only slower; don't hold the worker back
+            logger.error(f"Could not create league indexes: {str(e)}")
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class InMemoryLeagueRepository(LeagueRepository):
+    """Dict-backed engine for tests, load tests and Mongo-free deployments.
+
+    With `snapshot_path` set, the leagues are loaded from that JSON file on
+    startup and written back to it every `snapshot_interval` seconds (when
+    something changed) and on close.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, snapshot_interval: float = 30.0):
+        self._leagues: Dict[str, Dict[str, Any]] = {}
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.snapshot_interval = snapshot_interval
+        self._dirty = False
+        self._snapshot_task: Optional[asyncio.Task] = None
+        if self.snapshot_path and self.snapshot_path.exists():
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                self._leagues = {league["id"]: league for league in json.load(f)}
+            logger.info(f"Loaded {len(self._leagues)} leagues from snapshot {self.snapshot_path}")
+
+    async def get(self, league_id: str) -> Optional[Dict[str, Any]]:
+        self._start_snapshots()
+        return self._leagues.get(league_id)
+
+    async def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return list(self._leagues.values())[:limit]
+
+    async def iter_batches(self, batch_size: int = 100, fields: Optional[List[str]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        league_ids = list(self._leagues)
+        for start in range(0, len(league_ids), batch_size):
+            batch = [self._leagues.get(league_id) for league_id in league_ids[start:start + batch_size]]
+            yield [league for league in batch if league is not None]
+
+    async def insert(self, league: Dict[str, Any]) -> None:
+        self._start_snapshots()
+        self._leagues[league["id"]] = league
+        self._dirty = True
+
+    async def replace(self, league_id: str, league: Dict[str, Any], upsert: bool = False) -> None:
+        if upsert or league_id in self._leagues:
+            self._leagues[league_id] = league
+            self._dirty = True
+
+    async def delete(self, league_id: str) -> int:
+        if self._leagues.pop(league_id, None) is None:
+            return 0
+        self._dirty = True
+        return 1
+
+    async def delete_by_name(self, name: str) -> int:
+        ids = [league_id for league_id, league in self._leagues.items() if league["name"] == name]
+        for league_id in ids:
+            del self._leagues[league_id]
+        self._dirty = self._dirty or bool(ids)
+        return len(ids)
+
+    async def snapshot(self) -> None:
+        """Write every league to snapshot_path atomically"""
+        if not self.snapshot_path:
+            return
+        leagues = list(self._leagues.values())
+        self._dirty = False
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(self._write_snapshot, leagues)
+        except OSError:
+            self._dirty = True
+            raise
+        logger.info(f"Snapshotted {len(leagues)} leagues in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def _write_snapshot(self, leagues: List[Dict[str, Any]]) -> None:
+        tmp_path = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(leagues, f, default=_json_default)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _start_snapshots(self) -> None:
+        # Started lazily so the task is created inside the running event loop
+        if self.snapshot_path and self._snapshot_task is None:
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._snapshot_loop())
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self._dirty:
+                try:
+                    await self.snapshot()
+                except OSError as e:
+                    logger.error(f"League snapshot failed: {str(e)}")
+
+    async def close(self) -> None:
+        if self._snapshot_task:
+            self._snapshot_task.cancel()
+            self._snapshot_task = None
+        await self.snapshot()
+
+
+def mongo_database(repository: LeagueRepository):
+    """The Motor database behind a repository (directly or through write-behind), None for other engines"""
+    db = getattr(repository, "db", None)
+    if db is None:
+        db = getattr(getattr(repository, "backing", None), "db", None)
+    return db
+
+
+def create_repository() -> LeagueRepository:
+    """Build the engine selected by STORAGE_ENGINE (mongo by default, or memory).
+
+    Setting WRITE_BEHIND_JOURNAL_DIR puts the Mongo engine behind a
+    write-behind journal (see journal.py). Its in-memory copy is the
+    authoritative state, so it refuses to run with several workers.
+    """
+    engine = os.environ.get('STORAGE_ENGINE', 'mongo')
+    if engine == 'memory':
+        return InMemoryLeagueRepository(
+            snapshot_path=os.environ.get('SNAPSHOT_PATH'),
+            snapshot_interval=float(os.environ.get('SNAPSHOT_INTERVAL', '30')),
+        )
+    if engine == 'mongo':
+        from metrics import mongo_command_listener
+
+        repository = MongoLeagueRepository(
+            os.environ['MONGO_URL'], os.environ['DB_NAME'], event_listeners=[mongo_command_listener()]
+        )
+        if os.environ.get('WRITE_BEHIND_JOURNAL_DIR'):
+            if int(os.environ.get('WEB_CONCURRENCY', '1')) > 1:
+                raise RuntimeError("Write-behind storage (WRITE_BEHIND_JOURNAL_DIR) supports a single worker only")
+            from journal import WriteBehindLeagueRepository
+
+            return WriteBehindLeagueRepository(
+                repository,
+                os.environ['WRITE_BEHIND_JOURNAL_DIR'],
+                flush_interval=float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', '1')),
+            )
+        return repository
+    raise ValueError(f"Unknown STORAGE_ENGINE: {engine}")
@@ -0,0 +1,145 @@
+"""Player tiers: optimal 1-D clustering of each position's values, cached per catalog version and league format"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analytics import player_key
+
+logger = logging.getLogger(__name__)
+
+MAX_TIERS = int(os.environ.get('MAX_TIERS', '10'))
+# Fewest tiers whose goodness of variance fit (1 - within-tier SSE / total SS) reaches this
+TIER_GVF = float(os.environ.get('TIER_GVF', '0.98'))
+TIER_CACHE_SIZE = 64
+
+
+def segment_costs(values: np.ndarray) -> np.ndarray:
+    """cost[i, j]: squared deviation of values[i:j] from their mean (inf unless i < j)"""
+    n = len(values)
+    s1 = np.concatenate(([0.0], np.cumsum(values)))
+    s2 = np.concatenate(([0.0], np.cumsum(values * values)))
+    start = np.arange(n + 1)[:, None]
+    end = np.arange(n + 1)[None, :]
+    count = end - start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = (s2[end] - s2[start]) - (s1[end] - s1[start]) ** 2 / count
+    cost = np.maximum(cost, 0.0)
+    cost[count <= 0] = np.inf
+    return cost
+
+
+def tier_labels(values: np.ndarray, max_tiers: int = MAX_TIERS, gvf: float = TIER_GVF) -> np.ndarray:
+    """1-based tier of each of `values` (sorted best first) under the optimal (Fisher/Jenks) breaks.
+
+    The DP runs over the whole sorted array at once: with `cost` precomputed
+    from prefix sums, each extra tier is one (n+1)² min-reduction.
+    """
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+    cost = segment_costs(np.asarray(values, dtype=np.float64))
+    best = cost[0]  # best[j]: least SSE splitting values[:j] into k tiers
+    total = best[n]
+    back = []
+    tiers = 1
+    while total > 0 and 1 - best[n] / total < gvf and tiers < min(max_tiers, n):
+        candidates = best[:, None] + cost
+        back.append(candidates.argmin(axis=0))
+        best = candidates.min(axis=0)
+        tiers += 1
+
+    labels = np.empty(n, dtype=int)
+    end = n
+    for tier in range(tiers, 1, -1):
+        start = back[tier - 2][end]
+        labels[start:end] = tier
+        end = start
+    labels[:end] = 1
+    return labels
+
+
+class TierTable:
+    """Tier of every catalog player for one catalog version, value basis and league format"""
+
+    def __init__(self, catalog, values: np.ndarray, shown: np.ndarray, basis: str, key: str):
+        """Clusters `values` (higher is better); tier summaries report `shown` (prices or ranks)"""
+        started = time.perf_counter()
+        self.key = key
+        self.basis = basis
+        self.catalog_version = catalog.version
+        self.tiers = np.zeros(len(catalog.players), dtype=int)
+        self.positions: Dict[str, List[Dict[str, Any]]] = {}
+        positions = np.array([player["position"] for player in catalog.players])
+        for position in sorted(set(positions)):
+            indexes = np.flatnonzero(positions == position)
+            ordered = indexes[np.argsort(-values[indexes], kind="stable")]
+            labels = tier_labels(values[ordered])
+            self.tiers[ordered] = labels
+            self.positions[position] = []
+            for tier in range(1, int(labels.max()) + 1):
+                members = ordered[labels == tier]
+                self.positions[position].append({
+                    "tier": tier,
+                    "count": len(members),
+                    "best": round(float(shown[members[0]]), 2),
+                    "worst": round(float(shown[members[-1]]), 2),
+                    "players": [catalog.players[index]["name"] for index in members],
+                })
+        self._by_player = {
+            player_key(player["name"], player["position"]): int(tier) for player, tier in zip(catalog.players, self.tiers)
+        }
+        self.build_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    def of(self, player: Dict[str, Any]) -> Optional[int]:
+        return self._by_player.get(player_key(player["name"], player["position"]))
+
+    def summary(self, position: str = "") -> Dict[str, Any]:
+        return {
+            "basis": self.basis,
+            "catalog_version": self.catalog_version,
+            "build_ms": self.build_ms,
+            "positions": {pos: tiers for pos, tiers in self.positions.items() if not position or pos == position},
+        }
+
+
+class TierCache:
+    """Bounded LRU of tier tables keyed by (catalog version, value basis, league format)"""
+
+    def __init__(self, maxsize: int = TIER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._tables: "OrderedDict[Tuple[str, str, str], TierTable]" = OrderedDict()
+
+    def get(self, catalog, model=None, total_teams: int = 12, budget_per_team: int = 200, roster_size: int = 16) -> TierTable:
+        """Tiers over the price model's opening prices for the format, or over ETR rank without a model"""
+        if model is not None:
+            basis, league_format = f"model:{model.trained_at}", f"{total_teams}x{budget_per_team}x{roster_size}"
+        else:
+            basis, league_format = "etr_rank", ""
+        key = (catalog.version, basis, league_format)
+        table = self._tables.get(key)
+        if table is not None:
+            self._tables.move_to_end(key)
+            return table
+
+        if model is not None:
+            values = shown = model.opening_prices(catalog, total_teams, budget_per_team, roster_size)
+        else:
+            # Rank gaps matter more near the top, so cluster log ranks
+            shown = np.array([player.get("etr_rank") or 999 for player in catalog.players], dtype=np.float64)
+            values = -np.log(np.clip(shown, 1, None))
+        table = TierTable(catalog, values, shown, basis.split(":")[0], "|".join(key))
+        logger.info(f"Built {basis} tiers for catalog {catalog.version} {league_format} in {table.build_ms}ms")
+        self._tables[key] = table
+        while len(self._tables) > self.maxsize:
+            self._tables.popitem(last=False)
+        return table
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+
+tier_cache = TierCache()
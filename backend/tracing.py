@@ -0,0 +1,206 @@
+"""Opt-in request tracing (Server-Timing spans) and sampled cProfile profiling"""
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = b"x-trace"
+
+
+class Trace:
+    """Accumulated span durations of one request, in milliseconds"""
+    __slots__ = ("started", "spans", "endpoint_done")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.spans.items()]
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+def activate(trace: Optional[Trace]) -> contextvars.Token:
+    """Make `trace` the active one in this task (e.g. an actor running a traced request's command)"""
+    return _current.set(trace)
+
+
+def deactivate(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block into the active trace; a no-op when the request isn't traced"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+class TracedRoute(APIRoute):
+    """Marks when the endpoint returns, so the time until the response starts is reported as serialization"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+
+def _mark_endpoint_done(endpoint):
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            trace = _current.get()
+            if trace is not None:
+                trace.endpoint_done = time.perf_counter()
+
+    return wrapper
+
+
+class Tracer:
+    """Runtime tracing settings, plus the sampled profiler.
+
+    `trace_all` traces every request instead of only those sending
+    `X-Trace`. With `sample_every` N > 0, 1 in N requests is profiled with
+    cProfile and written to `directory` as a .pstats file (open it with
+    snakeviz, or turn it into a flamegraph with flameprof). cProfile sees
+    the whole event loop thread, so a profile also contains whatever other
+    requests ran while the sampled one was awaiting; only one request is
+    profiled at a time.
+    """
+
+    def __init__(self, directory: str, sample_every: int = 0, trace_all: bool = False, keep: int = 200):
+        self.directory = Path(directory)
+        self.sample_every = sample_every
+        self.trace_all = trace_all
+        self.keep = keep
+        self._seen = 0
+        self._active = False
+        self.written = 0
+
+    def should_sample(self) -> bool:
+        if self.sample_every <= 0 or self._active:
+            return False
+        self._seen += 1
+        return self._seen % self.sample_every == 0
+
+    def files(self) -> List[str]:
+        if not self.directory.exists():
+            return []
+        return sorted(path.name for path in self.directory.glob("*.pstats"))
+
+    def _write(self, profile: cProfile.Profile, name: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(str(self.directory / name))
+        for stale in sorted(self.directory.glob("*.pstats"))[:-self.keep]:
+            stale.unlink(missing_ok=True)
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "trace_all": self.trace_all,
+            "sample_every": self.sample_every,
+            "profile_dir": str(self.directory),
+            "profiles_written": self.written,
+            "profiles": self.files()[-20:],
+        }
+
+    async def profile(self, scope, call):
+        self._active = True
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await call()
+        finally:
+            profile.disable()
+            self._active = False
+            path = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._seen:06d}-{scope['method']}-{path}.pstats"
+            try:
+                await run_in_threadpool(self._write, profile, name)
+                self.written += 1
+            except OSError as e:
+                logger.error(f"Could not write profile {name}: {str(e)}")
+
+
+class TracingMiddleware:
+    """Traces requests that send `X-Trace: 1` (or every request when `trace_all` is on).
+
+    Traced responses carry a `Server-Timing` header with the spans recorded
+    while serving them, and a structured log line is written per request.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        tracer = self.tracer
+        traced = tracer.trace_all or dict(scope["headers"]).get(TRACE_HEADER, b"") not in (b"", b"0")
+        if not traced:
+            if tracer.should_sample():
+                return await tracer.profile(scope, lambda: self.app(scope, receive, send))
+            return await self.app(scope, receive, send)
+
+        trace = Trace()
+        token = activate(trace)
+        status = 500
+
+        async def add_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                now = time.perf_counter()
+                if trace.endpoint_done is not None:
+                    trace.add("serialize", now - trace.endpoint_done)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing((now - trace.started) * 1000).encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if tracer.should_sample():
+                await tracer.profile(scope, lambda: self.app(scope, receive, add_timing))
+            else:
+                await self.app(scope, receive, add_timing)
+        finally:
+            deactivate(token)
+            logger.info(json.dumps({
+                "event": "request_trace",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "total_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+                "spans_ms": {name: round(ms, 3) for name, ms in trace.spans.items()},
+            }))
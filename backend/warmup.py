@@ -0,0 +1,76 @@
+"""Startup warmup: run a worker's slow first-use work before it reports ready"""
+import asyncio
+import gc
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Step = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class Warmup:
+    """Runs named steps in order in the background; `ready` once every step has succeeded.
+
+    A failing step is retried every `retry_seconds` (steps that already
+    succeeded are not rerun), so a worker that starts before its database
+    is reachable becomes ready as soon as it is. `freeze_gc` is an opt-in
+    tuning knob: objects alive after warmup (catalog, indexes, value
+    tables) are moved out of the collector's view, so full collections
+    stop rescanning them, but they are never reclaimed, even once a
+    catalog reload has replaced them.
+    """
+
+    def __init__(self, steps: List[Step], retry_seconds: float = 5.0, freeze_gc: bool = False):
+        self.steps = steps
+        self.retry_seconds = retry_seconds
+        self.freeze_gc = freeze_gc
+        self.ready = False
+        self.draining = False
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._started = 0.0
+        self._seconds: Optional[float] = None
+
+    def start(self) -> None:
+        self.draining = False
+        if not self.ready and (self._task is None or self._task.done()):
+            self._started = time.perf_counter()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        for name, step in self.steps:
+            attempts = 0
+            while True:
+                attempts += 1
+                started = time.perf_counter()
+                try:
+                    await step()
+                except Exception as e:
+                    self.results[name] = {"ok": False, "attempts": attempts, "error": str(e)}
+                    logger.error(f"Warmup step {name} failed (attempt {attempts}), retrying in {self.retry_seconds}s: {str(e)}")
+                    await asyncio.sleep(self.retry_seconds)
+                    continue
+                self.results[name] = {"ok": True, "attempts": attempts, "ms": round((time.perf_counter() - started) * 1000, 1)}
+                break
+        if self.freeze_gc:
+            gc.collect()
+            gc.freeze()
+        self._seconds = time.perf_counter() - self._started
+        self.ready = True
+        logger.info(f"Warmup finished in {self._seconds:.2f}s: {self.results}")
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready and not self.draining,
+            "draining": self.draining,
+            "seconds": round(self._seconds, 3) if self._seconds is not None else None,
+            "steps": {name: self.results.get(name, {"ok": None}) for name, _ in self.steps},
+        }
+
+    async def close(self) -> None:
+        """Report not ready from here on and stop any warmup still running"""
+        self.draining = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+API load test: full auctions driven in-process
+
+Runs one complete auction per league size (default 12, 14 and 16 teams)
+concurrently against the app over ASGI (no network) on the in-memory
+storage engine, with a synthetic player catalog:
+  - an auctioneer searches for each player and drafts it, and every
+    --undo-every picks fires an undo storm (the last --undo-burst picks
+    undone concurrently, then drafted again)
+  - every owner polls the league with If-None-Match, as the UI does
+  - every owner searches the catalog now and then
+
+Prints one JSON line with p50/p95/p99 latency and throughput per endpoint.
+With --baseline, each endpoint's p95 and throughput are compared with a
+stored run and the script exits 1 when either regressed by more than
+--tolerance. Record a baseline on the machine that runs the comparison:
+
+    python benchmarks/bench_api.py --save-baseline benchmarks/baselines/bench_api.json
+    python benchmarks/bench_api.py --baseline benchmarks/baselines/bench_api.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_ENGINE", "memory")
+
+import httpx  # noqa: E402
+
+import catalog  # noqa: E402
+import server  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DEF"]
+QUERIES = ["", "pl", "player 1", "player 23", "t1", "zz"]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+def synthetic_catalog(players: int) -> catalog.PlayerCatalog:
+    lines = ['"Name","Position","Team","ETR Rank","ADP","Pos Rank ETR"']
+    for i in range(players):
+        position = POSITIONS[i % len(POSITIONS)]
+        lines.append(f'"Player {i}","{position}","T{i % 32}","{i + 1}","{i * 1.1 + 1:.1f}","{position}{i // 6 + 1:02d}"')
+    return catalog.build_catalog("\n".join(lines) + "\n", "bench")
+
+
+class Recorder:
+    """Latency samples and error counts per endpoint"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latency = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def request(self, endpoint: str, method: str, url: str, expected=(200,), **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latency[endpoint].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[endpoint] += 1
+        return response
+
+
+async def auction(recorder: Recorder, league: dict, roster_size: int, undo_every: int, undo_burst: int, players: list):
+    league_id = league["id"]
+    team_ids = [team["id"] for team in league["teams"]]
+    picks = []
+    drafted = 0
+    target = len(team_ids) * roster_size
+    while len(picks) < target:
+        player = random.choice(players)
+        await recorder.request(
+            "GET /api/players/search", "GET", "/api/players/search", params={"q": player["name"].lower()[:9], "limit": 20}
+        )
+        response = await recorder.request(
+            "POST /api/leagues/{league_id}/draft", "POST", f"/api/leagues/{league_id}/draft",
+            json={
+                "player": {key: player[key] for key in ("name", "position", "nfl_team", "etr_rank", "adp", "pos_rank")},
+                "team_id": team_ids[len(picks) % len(team_ids)],
+                "amount": random.randint(1, 3),
+            },
+        )
+        picks.append(response.json()["all_picks"][-1]["id"])
+        drafted += 1
+        if undo_every and drafted % undo_every == 0 and len(picks) < target:
+            storm, picks = picks[-undo_burst:], picks[:-undo_burst]
+            await asyncio.gather(*[
+                recorder.request(
+                    "DELETE /api/leagues/{league_id}/picks/{pick_id}", "DELETE", f"/api/leagues/{league_id}/picks/{pick_id}"
+                )
+                for pick_id in storm
+            ])
+
+
+async def owner(recorder: Recorder, league_id: str, poll_interval: float, search_every: int, done: asyncio.Event):
+    etag = None
+    polls = 0
+    while not done.is_set():
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await recorder.request(
+            "GET /api/leagues/{league_id}", "GET", f"/api/leagues/{league_id}", expected=(200, 304), headers=headers
+        )
+        etag = response.headers.get("etag", etag)
+        polls += 1
+        if search_every and polls % search_every == 0:
+            await recorder.request(
+                "GET /api/players/search", "GET", "/api/players/search", params={"q": random.choice(QUERIES), "limit": 50}
+            )
+        await asyncio.sleep(poll_interval * random.uniform(0.5, 1.5))
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    bench_catalog = synthetic_catalog(args.players)
+    catalog.set_catalog(bench_catalog)
+    players = list(bench_catalog.players)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        recorder = Recorder(client)
+        leagues = []
+        for teams in args.teams:
+            response = await recorder.request(
+                "POST /api/leagues", "POST", "/api/leagues",
+                json={"name": f"API Benchmark {teams}", "total_teams": teams, "roster_size": args.roster_size},
+            )
+            leagues.append(response.json())
+
+        done = asyncio.Event()
+        owners = [
+            asyncio.create_task(owner(recorder, league["id"], args.poll_interval, args.search_every, done))
+            for league in leagues
+            for _ in league["teams"]
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            auction(recorder, league, args.roster_size, args.undo_every, args.undo_burst, players) for league in leagues
+        ])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*owners)
+
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.latency.items()):
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": recorder.errors[endpoint],
+            "requests_per_second": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        }
+    return {
+        "benchmark": "api",
+        "league_sizes": args.teams,
+        "roster_size": args.roster_size,
+        "owners": len(owners),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(sum(len(s) for s in recorder.latency.values()) / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list:
+    """Endpoints whose p95 grew, or whose throughput fell, by more than `tolerance` against the baseline"""
+    found = []
+    for endpoint, before in baseline["endpoints"].items():
+        after = result["endpoints"].get(endpoint)
+        if after is None:
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append({"endpoint": endpoint, "metric": "p95_ms", "baseline": before["p95_ms"], "current": after["p95_ms"]})
+        if after["requests_per_second"] < before["requests_per_second"] * (1 - tolerance):
+            found.append({
+                "endpoint": endpoint, "metric": "requests_per_second",
+                "baseline": before["requests_per_second"], "current": after["requests_per_second"],
+            })
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, nargs="+", default=[12, 14, 16], help="one auction per league size")
+    parser.add_argument("--roster-size", type=int, default=16)
+    parser.add_argument("--players", type=int, default=600, help="synthetic catalog size")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between an owner's polls")
+    parser.add_argument("--search-every", type=int, default=5, help="owners search once per N polls")
+    parser.add_argument("--undo-every", type=int, default=40, help="undo storm every N picks (0 disables)")
+    parser.add_argument("--undo-burst", type=int, default=8, help="picks undone concurrently per storm")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="write this run's JSON here")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(result, indent=2) + "\n")
+    if args.baseline:
+        result["regressions"] = regressions(result, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    print(json.dumps(result))
+    if result.get("regressions") or any(e["errors"] for e in result["endpoints"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
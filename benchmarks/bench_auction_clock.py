@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Auction clock scaling benchmark
+
+Runs one live auction lot in each of many leagues at once on a single
+AuctionEngine: every league nominates at a random moment within the first
+bid window, receives a few bids (each resetting its countdown) and is
+awarded when its clock runs out. Reports how late the shared timer fired relative to each lot's exact
+deadline (fire), how long after it the pick was committed (award), and the
+award commit rate.
+
+Late fires at the tail come mostly from full garbage collections walking
+every live league; --freeze-gc moves the setup objects out of the
+collector's view (gc.freeze) to show the timer's own accuracy.
+
+    python benchmarks/bench_auction_clock.py --leagues 5000 --bid-seconds 5 --bids 5
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_ENGINE", "memory")
+
+from auction import AuctionEngine  # noqa: E402
+from league_manager import LeagueManager  # noqa: E402
+from server import DraftPickCreate, League, LeagueCreate, Team, apply_draft_pick, calculate_team_metrics  # noqa: E402
+from storage import InMemoryLeagueRepository  # noqa: E402
+
+PLAYER = {"name": "Josh Allen", "position": "QB", "nfl_team": "BUF", "etr_rank": 1, "adp": 1.5, "pos_rank": "QB1"}
+
+
+def new_document(teams: int) -> dict:
+    settings = LeagueCreate(name="Clock Benchmark", total_teams=teams)
+    return League(
+        name=settings.name, total_teams=teams, budget_per_team=settings.budget_per_team, roster_size=settings.roster_size,
+        position_requirements=settings.position_requirements,
+        teams=[
+            calculate_team_metrics(
+                Team(name=f"Team {i + 1}", budget=settings.budget_per_team, remaining=settings.budget_per_team),
+                settings.position_requirements, settings.roster_size,
+            )
+            for i in range(teams)
+        ],
+    ).dict()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+async def run(leagues: int, teams: int, bid_seconds: float, bids: int, freeze_gc: bool = False) -> dict:
+    loop = asyncio.get_running_loop()
+    repo = InMemoryLeagueRepository()
+    engine = None
+
+    async def on_commit(document):
+        engine.sync(document)
+
+    manager = LeagueManager(repo, max_active=leagues + 1, on_commit=on_commit)
+    deadlines = {}
+    fire_lateness = []
+    award_lateness = []
+
+    async def commit(league_id, team_id, player, amount):
+        pick = DraftPickCreate(player=player, team_id=team_id, amount=amount)
+        document = await manager.execute(league_id, lambda state: apply_draft_pick(state, pick))
+        award_lateness.append(loop.time() - deadlines[league_id])
+        return document
+
+    engine = AuctionEngine(commit, bid_seconds=bid_seconds)
+    expire = engine.timers.on_expire
+
+    def timed_expire(league_id):
+        fire_lateness.append(loop.time() - deadlines[league_id])
+        expire(league_id)
+
+    engine.timers.on_expire = timed_expire
+    team_ids = {}
+    for _ in range(leagues):
+        document = new_document(teams)
+        await repo.insert(document)
+        engine.start(await manager.get(document["id"]))
+        team_ids[document["id"]] = [team["id"] for team in document["teams"]]
+
+    def nominate(league_id):
+        engine.nominate(league_id, team_ids[league_id][0], PLAYER, 1)
+        deadlines[league_id] = engine.timers.deadline(league_id)
+        for amount, delay in enumerate(sorted(random.uniform(0, bid_seconds * 0.9) for _ in range(bids)), start=2):
+            loop.call_later(delay, place_bid, league_id, amount)
+
+    def place_bid(league_id, amount):
+        engine.bid(league_id, random.choice(team_ids[league_id][1:]), amount)
+        deadlines[league_id] = engine.timers.deadline(league_id)
+
+    if freeze_gc:
+        gc.collect()
+        gc.freeze()
+    started = time.perf_counter()
+    for league_id in team_ids:
+        loop.call_later(random.uniform(0, bid_seconds), nominate, league_id)
+
+    while engine.awards < leagues and time.perf_counter() - started < bid_seconds * 3 + 30:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    stats = engine.stats()
+    await engine.close()
+    await manager.close()
+    gc.unfreeze()
+
+    return {
+        "benchmark": "auction_clock",
+        "leagues": leagues,
+        "bids_per_lot": bids,
+        "bid_seconds": bid_seconds,
+        "freeze_gc": freeze_gc,
+        "awards": stats["awards"],
+        "fire_lateness_ms_p50": round(percentile(fire_lateness, 0.50) * 1000, 2),
+        "fire_lateness_ms_p99": round(percentile(fire_lateness, 0.99) * 1000, 2),
+        "fire_lateness_ms_max": round(max(fire_lateness) * 1000, 2),
+        "award_lateness_ms_p50": round(percentile(award_lateness, 0.50) * 1000, 2),
+        "award_lateness_ms_p99": round(percentile(award_lateness, 0.99) * 1000, 2),
+        "seconds": round(elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leagues", type=int, default=5000)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--bid-seconds", type=float, default=5.0)
+    parser.add_argument("--bids", type=int, default=5)
+    parser.add_argument("--freeze-gc", action="store_true")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.leagues, args.teams, args.bid_seconds, args.bids, args.freeze_gc))))
+
+
+if __name__ == "__main__":
+    main()
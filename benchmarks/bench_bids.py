@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Live bid ingestion load test
+
+Drives POST /api/leagues/{id}/auction/bids in-process (ASGI, no network)
+with every team of several leagues bidding concurrently on an open lot,
+most bids losing races to higher ones. Reports sustained bids/sec per
+league, the accept/reject split and p50/p99 latency of the validation step
+(AuctionEngine.bid) and of the whole request.
+
+    python benchmarks/bench_bids.py --leagues 20 --teams 12 --seconds 5
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_ENGINE", "memory")
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+PLAYER = {"name": "Josh Allen", "position": "QB", "nfl_team": "BUF", "etr_rank": 1, "adp": 1.5, "pos_rank": "QB1"}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+async def run(leagues: int, teams: int, seconds: float) -> dict:
+    engine = server.auction_engine
+    validation = []
+    bid = engine.bid
+
+    def timed_bid(*args):
+        started = time.perf_counter()
+        receipt = bid(*args)
+        validation.append(time.perf_counter() - started)
+        return receipt
+
+    engine.bid = timed_bid
+    request_latency = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        league_teams = {}
+        for i in range(leagues):
+            league = (await client.post("/api/leagues", json={"name": f"Bid Benchmark {i}", "total_teams": teams})).json()
+            # Long clock: the lot stays open for the whole run
+            await client.post(f"/api/leagues/{league['id']}/auction", json={"bid_seconds": seconds * 10})
+            state = (await client.post(
+                f"/api/leagues/{league['id']}/auction/nominate",
+                json={"team_id": league["teams"][0]["id"], "player": PLAYER, "amount": 1},
+            )).json()
+            league_teams[league["id"]] = ([team["id"] for team in league["teams"]], state["lot"], league["teams"][0]["max_bid"])
+
+        deadline = time.perf_counter() + seconds
+
+        async def bidder(league_id, team_id, lot, max_bid):
+            while time.perf_counter() < deadline:
+                # Bid around the current price so most bids race and lose
+                high = engine.clock(league_id).high_bid
+                amount = min(max_bid, high + random.randint(-2, 2))
+                started = time.perf_counter()
+                await client.post(f"/api/leagues/{league_id}/auction/bids", json={"team_id": team_id, "amount": amount, "lot": lot})
+                request_latency.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            bidder(league_id, team_id, lot, max_bid)
+            for league_id, (team_ids, lot, max_bid) in league_teams.items()
+            for team_id in team_ids
+        ])
+        elapsed = time.perf_counter() - started
+        for league_id in league_teams:
+            engine.stop(league_id)
+
+    engine.bid = bid
+    stats = engine.stats()
+    received = stats["bids_accepted"] + sum(stats["bids_rejected"].values())
+    return {
+        "benchmark": "bids",
+        "leagues": leagues,
+        "bidders_per_league": teams,
+        "bids": received,
+        "bids_per_second": round(received / elapsed),
+        "bids_per_second_per_league": round(received / elapsed / leagues),
+        "accepted": stats["bids_accepted"],
+        "rejected": stats["bids_rejected"],
+        "validation_us_p50": round(percentile(validation, 0.50) * 1e6, 1),
+        "validation_us_p99": round(percentile(validation, 0.99) * 1e6, 1),
+        "request_ms_p50": round(percentile(request_latency, 0.50) * 1000, 2),
+        "request_ms_p99": round(percentile(request_latency, 0.99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leagues", type=int, default=20)
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.leagues, args.teams, args.seconds))))
+
+
+if __name__ == "__main__":
+    main()
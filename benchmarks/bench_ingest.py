@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Ranking ingestion throughput benchmark
+
+Generates large synthetic ranking/projection files, streams them through
+ingest.merge_sources and reports rows/sec and peak traced memory.
+
+    python benchmarks/bench_ingest.py --rows 500000 --players 3000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from ingest import ColumnMapping, RankingSource, merge_sources  # noqa: E402
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K"]
+
+
+def write_sources(directory: Path, rows: int, players: int):
+    etr = directory / "etr.csv"
+    with open(etr, "w") as f:
+        f.write('"Name","Position","Team","ETR Rank","ADP","Pos Rank ETR"\n')
+        for i in range(players):
+            position = POSITIONS[i % len(POSITIONS)]
+            f.write(f'"Player {i}","{position}","T{i % 32}","{i + 1}","{i * 1.1 + 1:.1f}","{position}{i // 5 + 1:02d}"\n')
+
+    # Weekly projection file: many rows per player, extra columns that are never kept
+    projections = directory / "projections.csv"
+    with open(projections, "w") as f:
+        f.write("Week,Player,Pos,Team,Rank,Pts,Yds,TD\n")
+        for i in range(rows - players):
+            p = i % players
+            f.write(f"{i // players + 1},Player {p},{POSITIONS[p % len(POSITIONS)]},T{p % 32},{(p * 7) % players + 1},12.5,80,1\n")
+
+    return [
+        RankingSource(path=str(etr)),
+        RankingSource(path=str(projections), mapping=ColumnMapping(name="Player", position="Pos", team="Team", rank="Rank", adp=None)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--players", type=int, default=3_000)
+    parser.add_argument("--min-rows-per-sec", type=float, default=0, help="exit 1 when throughput is lower")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = write_sources(Path(tmp), args.rows, args.players)
+        players, stats = merge_sources(sources)
+
+        # Separate pass for memory: tracing slows the parser down several times over
+        tracemalloc.start()
+        merge_sources(sources)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = {
+        "benchmark": "ingest",
+        "rows": stats.rows,
+        "players": stats.players,
+        "seconds": round(stats.seconds, 3),
+        "rows_per_sec": round(stats.rows_per_second),
+        "peak_traced_bytes": peak,
+    }
+    print(json.dumps(result))
+    if args.min_rows_per_sec and stats.rows_per_second < args.min_rows_per_sec:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
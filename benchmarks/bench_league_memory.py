@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Live league memory benchmark
+
+Builds a fully drafted league (default 14 teams x 16 roster spots) and
+measures, with tracemalloc, the bytes one copy of it holds as:
+  - a hydrated pydantic `League`
+  - a `League.dict()` document
+  - a `CompactLeague`
+
+    python benchmarks/bench_league_memory.py --teams 14 --roster 16
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_ENGINE", "memory")
+
+from compact import CompactLeague  # noqa: E402
+from server import DraftPickCreate, League, LeagueCreate, Team, apply_draft_pick, calculate_team_metrics  # noqa: E402
+
+POSITIONS = ["QB", "RB", "WR", "TE", "K", "DST"]
+
+
+def drafted_document(teams: int, roster: int) -> dict:
+    settings = LeagueCreate(name="Memory Benchmark", total_teams=teams, budget_per_team=300, roster_size=roster)
+    league = League(
+        name=settings.name, total_teams=teams, budget_per_team=300, roster_size=roster,
+        position_requirements=settings.position_requirements,
+        teams=[
+            calculate_team_metrics(
+                Team(name=f"Team {i + 1}", budget=300, remaining=300, roster_spots=settings.position_requirements.copy()),
+                settings.position_requirements, roster,
+            )
+            for i in range(teams)
+        ],
+    )
+    state = CompactLeague.from_document(league.dict())
+    for round_number in range(roster):
+        for i, team in enumerate(league.teams):
+            overall = round_number * teams + i
+            player = {
+                "name": f"Player {overall}", "position": POSITIONS[overall % len(POSITIONS)], "nfl_team": "BUF",
+                "etr_rank": overall + 1, "adp": overall + 1.5, "pos_rank": f"QB{overall:02d}",
+            }
+            apply_draft_pick(state, DraftPickCreate(player=player, team_id=team.id, amount=1))
+    return state.to_document()
+
+
+def measure(build) -> int:
+    """Bytes still allocated by what `build` returns (temporaries it freed are not counted)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=14)
+    parser.add_argument("--roster", type=int, default=16)
+    args = parser.parse_args()
+
+    document = drafted_document(args.teams, args.roster)
+    encoded = json.dumps(document, default=str)
+    # Player records are interned process-wide; warm the table so it isn't billed to one league
+    CompactLeague.from_document(document)
+
+    result = {
+        "benchmark": "league_memory",
+        "teams": args.teams,
+        "roster_size": args.roster,
+        "picks": len(document["all_picks"]),
+        "pydantic_league_bytes": measure(lambda: League(**json.loads(encoded))),
+        "document_bytes": measure(lambda: json.loads(encoded)),
+        "compact_bytes": measure(lambda: CompactLeague.from_document(json.loads(encoded))),
+    }
+    result["compact_vs_pydantic"] = round(result["pydantic_league_bytes"] / max(1, result["compact_bytes"]), 1)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
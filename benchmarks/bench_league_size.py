@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+League memory and payload-size regression check
+
+For every total_teams x roster_size combination, stores a fully drafted
+league and serves it in-process (ASGI, in-memory storage), measuring:
+  - the BSON size of the stored document (MongoDB rejects documents over 16 MB)
+  - JSON response bytes of GET /api/leagues/{id} and POST /api/leagues/{id}/draft
+  - the tracemalloc peak while serving each of those requests
+
+Prints one JSON line. A cell whose BSON size passes --warn-bson-bytes is
+reported under "warnings" (and on stderr); any size past its --max-*
+threshold is reported under "failures" and the script exits 1.
+
+    python benchmarks/bench_league_size.py --teams 12 16 32 --roster 16 32 64
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("STORAGE_ENGINE", "memory")
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from bench_league_memory import drafted_document  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+MONGO_DOCUMENT_LIMIT = 16 * 1024 * 1024
+PICK = {"name": "Late Pick", "position": "K", "nfl_team": "BUF", "etr_rank": 999, "adp": 250.0, "pos_rank": "K40"}
+
+
+async def traced(request) -> tuple:
+    """Response of `request()` and the traced allocation peak above the starting point while it ran"""
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    response = await request()
+    return response, tracemalloc.get_traced_memory()[1] - before
+
+
+async def measure(client: httpx.AsyncClient, teams: int, roster: int) -> dict:
+    document = drafted_document(teams, roster)
+    document["roster_size"] = roster
+    await server.repository.insert(document)
+    league_id = document["id"]
+    bson_bytes = server.league_document_size(document)
+
+    league, get_peak = await traced(lambda: client.get(f"/api/leagues/{league_id}"))
+    draft, draft_peak = await traced(lambda: client.post(
+        f"/api/leagues/{league_id}/draft", json={"player": PICK, "team_id": document["teams"][0]["id"], "amount": 1}
+    ))
+    if league.status_code != 200 or draft.status_code != 200:
+        raise RuntimeError(f"{teams}x{roster}: GET {league.status_code}, draft {draft.status_code}")
+
+    server.league_manager.forget(league_id)
+    await server.repository.delete(league_id)
+    picks = len(document["all_picks"])
+    return {
+        "teams": teams,
+        "roster_size": roster,
+        "picks": picks,
+        "bson_bytes": bson_bytes,
+        "bson_fraction_of_limit": round(bson_bytes / MONGO_DOCUMENT_LIMIT, 4),
+        # Linear in picks: how many more this league could take before Mongo refuses it
+        "picks_until_limit": int((MONGO_DOCUMENT_LIMIT - bson_bytes) / (bson_bytes / picks)) if picks else None,
+        "get_json_bytes": len(league.content),
+        "get_peak_bytes": get_peak,
+        "draft_json_bytes": len(draft.content),
+        "draft_peak_bytes": draft_peak,
+    }
+
+
+async def run(teams: list, rosters: list) -> list:
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm imports and caches so the first cell isn't billed for them
+        await measure(client, 2, 1)
+        tracemalloc.start()
+        try:
+            return [await measure(client, t, r) for t in teams for r in rosters]
+        finally:
+            tracemalloc.stop()
+
+
+def check(cells: list, args) -> tuple:
+    limits = {
+        "bson_bytes": args.max_bson_bytes,
+        "get_json_bytes": args.max_json_bytes,
+        "draft_json_bytes": args.max_json_bytes,
+        "get_peak_bytes": args.max_peak_bytes,
+        "draft_peak_bytes": args.max_peak_bytes,
+    }
+    warnings, failures = [], []
+    for cell in cells:
+        name = f"{cell['teams']}x{cell['roster_size']}"
+        if cell["bson_bytes"] >= args.warn_bson_bytes:
+            warnings.append(f"{name}: BSON {cell['bson_bytes']} bytes is {cell['bson_fraction_of_limit']:.0%} of the 16 MB limit")
+        for key, limit in limits.items():
+            if limit and cell[key] > limit:
+                failures.append(f"{name}: {key} {cell[key]} > {limit}")
+    return warnings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, nargs="+", default=[12, 16, 32])
+    parser.add_argument("--roster", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--warn-bson-bytes", type=int, default=MONGO_DOCUMENT_LIMIT // 4)
+    parser.add_argument("--max-bson-bytes", type=int, default=MONGO_DOCUMENT_LIMIT // 2)
+    parser.add_argument("--max-json-bytes", type=int, default=8 * 1024 * 1024, help="0 disables")
+    parser.add_argument("--max-peak-bytes", type=int, default=0, help="0 disables")
+    args = parser.parse_args()
+
+    cells = asyncio.run(run(args.teams, args.roster))
+    warnings, failures = check(cells, args)
+    for warning in warnings:
+        print(f"WARNING {warning}", file=sys.stderr)
+    print(json.dumps({"benchmark": "league_size", "cells": cells, "warnings": warnings, "failures": failures}))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,22 @@ import { Label } from './components/ui/label';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Send a league mutation with an Idempotency-Key, retrying on timeouts/network errors, write
+// conflicts (409) and server errors. The server answers a retry with the original response,
+// so a pick is never applied twice.
+const sendIdempotent = async (method, url, data, attempts = 3) => {
+  const key = window.crypto?.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await axios({ method, url, data, headers: { 'Idempotency-Key': key }, timeout: 5000 });
+    } catch (error) {
+      const status = error.response?.status;
+      const retryable = !error.response || status === 409 || status >= 500;
+      if (!retryable || attempt >= attempts) throw error;
+    }
+  }
+};
+
 const AuctionTracker = () => {
   const [league, setLeague] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -111,12 +127,19 @@ const AuctionTracker = () => {
 
   const loadPlayerDatabase = async () => {
     try {
-      // Load ALL players from CSV (increase limit significantly)
-      const response = await axios.get(`${API}/players/search`, {
-        params: { limit: 500, q: '' } // Empty query to get all players
-      });
-      console.log('Loaded players:', response.data?.length || 0);
-      setPlayerDatabase(response.data || []);
+      // Load the whole catalog in columnar form (browser revalidates it via ETag)
+      const response = await axios.get(`${API}/players/catalog`);
+      const { columns = [], data = [], count = 0 } = response.data || {};
+      const players = [];
+      for (let i = 0; i < count; i++) {
+        const player = {};
+        columns.forEach((column, c) => {
+          player[column] = data[c][i];
+        });
+        players.push(player);
+      }
+      console.log('Loaded players:', players.length);
+      setPlayerDatabase(players);
     } catch (error) {
       console.error('Error loading player database:', error);
       // Set empty array as fallback
@@ -394,7 +417,7 @@ const AuctionTracker = () => {
     }
 
     try {
-      const response = await axios.post(`${API}/leagues/${league.id}/draft`, {
+      const response = await sendIdempotent('post', `${API}/leagues/${league.id}/draft`, {
         player: {
           name: player.name,
           position: player.position,
@@ -1132,7 +1155,7 @@ const AuctionTracker = () => {
 
   const undoPick = async (pickId) => {
     try {
-      await axios.delete(`${API}/leagues/${league.id}/picks/${pickId}`);
+      await sendIdempotent('delete', `${API}/leagues/${league.id}/picks/${pickId}`);
       // Reload league data
       const response = await axios.get(`${API}/leagues/${league.id}`);
       setLeague(response.data);
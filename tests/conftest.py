@@ -0,0 +1,67 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend runs as `uvicorn server:app` from backend/, so its modules import flat
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# Run the whole API against the in-memory storage engine
+os.environ["STORAGE_ENGINE"] = "memory"
+os.environ.pop("SNAPSHOT_PATH", None)
+# Every test client warms up a worker; don't freeze each test's garbage out of the collector
+os.environ["WARMUP_GC_FREEZE"] = "0"
+# Admin endpoints are disabled without a token; tests call them with ADMIN_HEADERS
+os.environ["ADMIN_TOKEN"] = "test-admin-token"
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin-token"}
+
+SAMPLE_CSV = (
+    '\ufeff"Name","Position","Team","ETR Rank","ADP","Pos Rank ETR"\n'
+    '"Ja\'Marr Chase","WR","CIN","1","1.0","WR01"\n'
+    '"Bijan Robinson","RB","ATL","2","2.8","RB01"\n'
+    '"Josh Allen","QB","BUF","40","23.6","QB01"\n'
+    '"Jonathan Taylor","RB","IND","26","20.2","RB11"\n'
+    '"Justin Jefferson","WR","MIN","5","4.6","WR03"\n'
+    '"Brock Bowers","TE","LV","15","18.6","TE01"\n'
+)
+
+
+@pytest.fixture
+def sample_csv():
+    return SAMPLE_CSV
+
+
+@pytest.fixture
+def catalog_module(monkeypatch):
+    """Catalog module with the rankings download stubbed to SAMPLE_CSV"""
+    import catalog
+
+    monkeypatch.setattr(catalog, "fetch_rankings_csv", lambda url=catalog.RANKINGS_CSV_URL: SAMPLE_CSV)
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(catalog, "_fallback_retry", None)
+    monkeypatch.setattr(catalog, "_refresh", None)
+    return catalog
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import catalog
+    import server
+
+    # Warmup loads the catalog; never reach for the real rankings download from tests
+    monkeypatch.setattr(catalog, "fetch_rankings_csv", lambda url=catalog.RANKINGS_CSV_URL: SAMPLE_CSV)
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def demo_league(client):
+    return client.post("/api/demo-league").json()
+
+
+def make_pick(name="Josh Allen", position="QB", team="BUF", **extra):
+    return {"name": name, "position": position, "nfl_team": team, **extra}
@@ -0,0 +1,53 @@
+"""Minimal Redis pub/sub stand-in speaking RESP, for bus tests without a Redis server"""
+import asyncio
+from collections import defaultdict
+
+from events import encode_command, read_reply
+
+
+class RedisStub:
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.connections = set()
+        self.server = None
+
+    async def start(self, port: int = 0) -> int:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await self.server.wait_closed()
+        self.subscribers.clear()
+
+    async def _serve(self, reader, writer):
+        self.connections.add(writer)
+        try:
+            while True:
+                command, *args = await read_reply(reader)
+                command = command.upper()
+                if command == b"SUBSCRIBE":
+                    for i, channel in enumerate(args):
+                        self.subscribers[channel].add(writer)
+                        # ["subscribe", channel, subscription count]
+                        writer.write(b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:%d\r\n" % (len(channel), channel, i + 1))
+                elif command == b"PUBLISH":
+                    channel, payload = args
+                    receivers = list(self.subscribers[channel])
+                    for receiver in receivers:
+                        receiver.write(encode_command("message", channel, payload))
+                    writer.write(b":%d\r\n" % len(receivers))
+                elif command == b"PING":
+                    writer.write(b"+PONG\r\n")
+                else:
+                    writer.write(b"+OK\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            for receivers in self.subscribers.values():
+                receivers.discard(writer)
+            writer.close()
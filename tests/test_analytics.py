@@ -0,0 +1,104 @@
+from analytics import normalize_pos_rank, summarize
+from tests.conftest import make_pick
+
+
+def settle(client):
+    """Wait for rollup updates queued behind the commits so far"""
+    import server
+
+    client.portal.call(server.derived_writes.flush)
+
+
+def test_rollups_follow_commits_and_undos_across_leagues(client):
+    leagues = [client.post("/api/leagues", json={"name": f"Rollup {i}", "total_teams": 14, "budget_per_team": 300}).json() for i in range(3)]
+    other_format = client.post("/api/leagues", json={"name": "Rollup 12", "total_teams": 12, "budget_per_team": 200}).json()
+
+    def draft(league, amount, **player):
+        response = client.post(f"/api/leagues/{league['id']}/draft", json={
+            "player": make_pick("Rollup Back", "RB", "DAL", pos_rank="RB5", etr_rank=30, adp=28.0, **player),
+            "team_id": league["teams"][0]["id"], "amount": amount,
+        })
+        return response.json()["all_picks"][-1]["id"]
+
+    for league, amount in zip(leagues, (40, 50, 60)):
+        draft(league, amount)
+    draft(other_format, 10)
+    undone = draft(leagues[0], 90)
+    client.delete(f"/api/leagues/{leagues[0]['id']}/picks/{undone}")
+
+    settle(client)
+    stats = client.get("/api/analytics/prices", params={"pos_rank": "RB05", "teams": 14, "budget": 300}).json()
+    assert (stats["count"], stats["mean"], stats["min"], stats["max"], stats["p50"]) == (3, 50.0, 40, 60, 50)
+    across = client.get("/api/analytics/prices", params={"player": "rollup back", "position": "rb"}).json()
+    assert across["count"] == 4 and across["mean"] == 40.0
+
+    curve = client.get("/api/analytics/curves/etr_rank", params={"teams": 14, "budget": 300}).json()["points"]
+    assert curve[2]["from"] == 25 and curve[2]["count"] == 3
+    assert curve[0]["count"] == 0
+
+    assert client.get("/api/analytics/prices", params={"pos_rank": "RB05", "teams": 14}).status_code == 400
+    assert client.get("/api/analytics/curves/price").status_code == 404
+
+
+def test_summary_quantiles_and_pos_rank_normalization():
+    summary = summarize(4, 10 + 20 + 30 + 40, 100 + 400 + 900 + 1600, {10: 1, 20: 1, 30: 1, 40: 1, 99: 0})
+    assert (summary["min"], summary["max"], summary["p25"], summary["p50"], summary["p90"]) == (10, 40, 10, 20, 40)
+    assert summary["stddev"] == 11.18
+    assert normalize_pos_rank("rb5") == normalize_pos_rank("RB 05") == "RB05"
+
+
+def test_undo_takes_a_pick_out_of_the_rollups_it_was_counted_in(client):
+    import asyncio
+
+    import server
+
+    league = client.post("/api/leagues", json={"name": "Rollup Undo", "total_teams": 14, "budget_per_team": 300}).json()
+    url = f"/api/leagues/{league['id']}"
+
+    def draft(amount):
+        player = make_pick("Undo Back", "RB", "DAL", pos_rank="RB7")
+        return client.post(f"{url}/draft", json={"player": player, "team_id": league["teams"][0]["id"], "amount": amount}).json()
+
+    def count(teams, budget):
+        settle(client)
+        return client.get("/api/analytics/prices", params={"pos_rank": "RB07", "teams": teams, "budget": budget}).json()["count"]
+
+    counted = draft(20)["all_picks"][-1]
+    assert counted["rollup_format"] == "14x300"
+    # Changing the format afterwards doesn't move where the pick was counted
+    settings = {"name": "Rollup Undo", "total_teams": 14, "budget_per_team": 200}
+    assert client.put(f"{url}/settings", json=settings).status_code == 200
+    client.delete(f"{url}/picks/{counted['id']}")
+    assert (count(14, 300), count(14, 200)) == (0, 0)
+
+    # A pick from before rollups were kept was never counted, so undoing it subtracts nothing
+    draft(30)
+    stored = asyncio.run(server.repository.get(league["id"]))
+    legacy = {**stored, "version": stored["version"] + 1, "all_picks": [{**stored["all_picks"][0], "rollup_format": None}]}
+    asyncio.run(server.repository.replace(league["id"], legacy))
+    server.league_manager.invalidate(league["id"], legacy["version"])
+    client.delete(f"{url}/picks/{legacy['all_picks'][0]['id']}")
+    assert count(14, 200) == 1
+
+
+def test_picks_are_acknowledged_before_rollups_update(client, demo_league, monkeypatch):
+    import asyncio
+    import threading
+
+    import server
+
+    release = threading.Event()
+    observe = server.price_rollups.observe
+
+    async def slow_observe(keys, amount, weight):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        await observe(keys, amount, weight)
+
+    monkeypatch.setattr(server.price_rollups, "observe", slow_observe)
+    player = make_pick("Lagging Back", "RB", "DAL", pos_rank="RB9")
+    response = client.post(f"/api/leagues/{demo_league['id']}/draft", json={"player": player, "team_id": demo_league["teams"][0]["id"], "amount": 7})
+    assert response.status_code == 200
+    release.set()
+    settle(client)
+    assert client.get("/api/analytics/prices", params={"pos_rank": "RB09"}).json()["count"] == 1
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from auction import AuctionEngine, TimerQueue
+from league_manager import LeagueManager
+from server import DraftPickCreate, League, apply_draft_pick
+from storage import InMemoryLeagueRepository
+from tests.conftest import make_pick
+
+
+def test_timer_queue_expires_in_deadline_order_with_reschedules_and_cancels():
+    async def scenario():
+        expired = []
+        timers = TimerQueue(expired.append)
+        now = asyncio.get_running_loop().time()
+        for i in range(200):
+            timers.schedule(f"league-{i}", now + 0.001 * (200 - i))
+        timers.schedule("league-199", now + 0.3)  # pushed back by a late bid
+        timers.cancel("league-0")
+        await asyncio.sleep(0.35)
+        return expired, timers
+
+    expired, timers = asyncio.run(scenario())
+    assert expired[-1] == "league-199"
+    assert expired[:-1] == [f"league-{i}" for i in range(198, 0, -1)]
+    assert len(timers) == 0 and timers.fired == 199
+
+
+def new_auction_league(roster_size=2):
+    league = League(
+        name="Auction League", total_teams=3, budget_per_team=50, roster_size=roster_size,
+        position_requirements={"QB": 1},
+        teams=[{"name": f"Team {i + 1}", "budget": 50, "remaining": 50} for i in range(3)],
+    )
+    return league.dict()
+
+
+def test_auction_awards_high_bid_and_rotates_past_full_rosters():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_auction_league(roster_size=1)
+        await repo.insert(document)
+        engine = None
+
+        async def on_commit(committed, event):
+            engine.sync(committed)
+
+        manager = LeagueManager(repo, on_commit=on_commit)
+
+        async def commit(league_id, team_id, player, amount):
+            pick = DraftPickCreate(player=player, team_id=team_id, amount=amount)
+            return await manager.execute(league_id, lambda state: apply_draft_pick(state, pick))
+
+        engine = AuctionEngine(commit, bid_seconds=0.05)
+        teams = [team["id"] for team in document["teams"]]
+        engine.start(await manager.get(document["id"]))
+
+        with pytest.raises(HTTPException):
+            engine.nominate(document["id"], teams[1], make_pick(), 1)  # not their turn
+        engine.nominate(document["id"], teams[0], make_pick(), 1)
+        assert engine.bid(document["id"], teams[1], 5)["accepted"]
+        assert engine.bid(document["id"], teams[2], 5)["reason"] == "outbid"
+        await asyncio.sleep(0.15)
+        first = engine.state(document["id"])
+
+        # Team 2's only roster spot is filled by a manual pick, so the rotation skips it
+        await commit(document["id"], teams[2], make_pick(name="Lamar Jackson"), 3)
+        skipped = engine.state(document["id"])
+
+        stored = await repo.get(document["id"])
+        await engine.close()
+        await manager.close()
+        return teams, first, skipped, stored
+
+    teams, first, skipped, stored = asyncio.run(scenario())
+    assert first["last_result"]["team_id"] == teams[1] and first["last_result"]["amount"] == 5
+    assert first["nominating_team_id"] == teams[2]
+    assert skipped["nominating_team_id"] == teams[0]
+    assert [(p["team_id"], p["amount"]) for p in stored["all_picks"]] == [(teams[1], 5), (teams[2], 3)]
+
+
+def test_auction_endpoints_validate_against_max_bid(client, demo_league):
+    league_id = demo_league["id"]
+    team_id = demo_league["teams"][0]["id"]
+    assert client.get(f"/api/leagues/{league_id}/auction").status_code == 404
+
+    state = client.post(f"/api/leagues/{league_id}/auction", json={"bid_seconds": 60}).json()
+    assert state["status"] == "nominating" and state["nominating_team_id"] == team_id
+
+    max_bid = demo_league["teams"][0]["max_bid"]
+    over = client.post(f"/api/leagues/{league_id}/auction/nominate", json={"team_id": team_id, "player": make_pick(), "amount": max_bid + 1})
+    assert over.status_code == 400 and over.json()["detail"] == "over_max_bid"
+    free = client.post(f"/api/leagues/{league_id}/auction/nominate", json={"team_id": team_id, "player": make_pick(), "amount": 0})
+    assert free.status_code == 400 and free.json()["detail"] == "below_minimum"
+
+    state = client.post(f"/api/leagues/{league_id}/auction/nominate", json={"team_id": team_id, "player": make_pick(), "amount": 2}).json()
+    assert state["status"] == "bidding" and state["high_bidder"] == team_id and 0 < state["seconds_remaining"] <= 60
+    assert client.delete(f"/api/leagues/{league_id}/auction").status_code == 200
+    assert client.delete(f"/api/leagues/{league_id}/auction").status_code == 404
+
+
+def test_bids_are_sequenced_and_losing_bids_rejected_without_writes(client, demo_league):
+    league_id = demo_league["id"]
+    teams = [team["id"] for team in demo_league["teams"]]
+    client.post(f"/api/leagues/{league_id}/auction", json={"bid_seconds": 60})
+    lot = client.post(f"/api/leagues/{league_id}/auction/nominate", json={"team_id": teams[0], "player": make_pick(), "amount": 1}).json()["lot"]
+    version = client.get(f"/api/leagues/{league_id}").json()["version"]
+
+    bids = [(teams[1], 10, lot), (teams[2], 8, lot), (teams[3], 500, lot), (teams[2], 12, lot - 1), ("nobody", 20, lot), (teams[2], 11, None)]
+    responses = [client.post(f"/api/leagues/{league_id}/auction/bids", json={"team_id": t, "amount": a, "lot": l}) for t, a, l in bids]
+    receipts = [response.json() for response in responses]
+
+    assert [r["sequence"] for r in receipts] == [2, 3, 4, 5, 6, 7]
+    assert [r["reason"] for r in receipts] == [None, "outbid", "over_max_bid", "stale_lot", "unknown_team", None]
+    assert [response.status_code for response in responses] == [200, 409, 400, 409, 404, 200]
+    assert receipts[-1]["high_bid"] == 11 and receipts[-1]["high_bidder"] == teams[2]
+    # Nothing is stored until the clock runs out
+    assert client.get(f"/api/leagues/{league_id}").json()["version"] == version
+    client.delete(f"/api/leagues/{league_id}/auction")
@@ -0,0 +1,162 @@
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+import server
+from catalog import PlayerCatalog, parse_rankings_csv
+from tests.conftest import ADMIN_HEADERS
+
+
+def test_parse_rankings_csv_strips_bom_and_quotes(sample_csv):
+    players = parse_rankings_csv(sample_csv)
+    assert len(players) == 6
+    assert players[0] == {
+        "name": "Ja'Marr Chase", "position": "WR", "nfl_team": "CIN",
+        "etr_rank": 1, "adp": 1.0, "pos_rank": "WR01",
+    }
+
+
+def test_single_letter_search_prefers_first_names(sample_csv):
+    catalog = PlayerCatalog(parse_rankings_csv(sample_csv))
+    names = [p["name"] for p in catalog.search("j", limit=10)]
+    assert names[:4] == ["Ja'Marr Chase", "Justin Jefferson", "Jonathan Taylor", "Josh Allen"]
+
+
+def test_catalog_version_is_content_hash(sample_csv):
+    players = parse_rankings_csv(sample_csv)
+    assert PlayerCatalog(players).version == PlayerCatalog(list(players)).version
+    assert PlayerCatalog(players).version != PlayerCatalog(players[1:]).version
+
+
+def test_catalog_endpoint_columnar_and_304(catalog_module):
+    client = TestClient(server.app)
+    response = client.get("/api/players/catalog", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 6
+    columns = dict(zip(body["columns"], body["data"]))
+    assert columns["name"][2] == "Josh Allen"
+    assert columns["etr_rank"][2] == 40
+
+    etag = response.headers["etag"]
+    cached = client.get("/api/players/catalog", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_catalog_endpoint_serves_precompressed_body(catalog_module):
+    client = TestClient(server.app)
+    response = client.get("/api/players/catalog", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    catalog = catalog_module._catalog
+    assert json.loads(gzip.decompress(catalog.gzip_body)) == response.json()
+
+
+def test_admin_reload_swaps_catalog_atomically(catalog_module, sample_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_DIR", str(tmp_path))
+    client = TestClient(server.app)
+    old_version = client.get("/api/players/catalog").json()["version"]
+    held = catalog_module._catalog
+
+    rankings = tmp_path / "rankings.csv"
+    rankings.write_text(sample_csv + '"Puka Nacua","WR","LA","8","9.0","WR04"\n', encoding="utf-8")
+    response = client.post("/api/admin/catalog/reload", params={"path": "rankings.csv"}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json()["count"] == 7
+    assert response.json()["version"] != old_version
+
+    # Searches already holding the previous snapshot keep a consistent view
+    assert [p["name"] for p in held.search("puka")] == []
+    assert [p["name"] for p in client.get("/api/players/search", params={"q": "puka"}).json()] == ["Puka Nacua"]
+
+
+def test_admin_reload_upload_and_bad_source(catalog_module, sample_csv, tmp_path, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    client = TestClient(server.app)
+    files = {"file": ("rankings.csv", sample_csv.encode(), "text/csv")}
+    assert client.post("/api/admin/catalog/reload", files=files).status_code == 403
+
+    response = client.post("/api/admin/catalog/reload", files=files, headers={"X-Admin-Token": "secret"})
+    assert response.json()["source"] == "upload"
+    version = response.json()["version"]
+
+    # Files only from CATALOG_DIR, URLs only from the allow-list, and no OS error text in the response
+    monkeypatch.setattr(catalog_module, "CATALOG_DIR", str(tmp_path))
+    for params in ({"path": "/etc/passwd"}, {"path": "../rankings.csv"}, {"path": "missing.csv"}, {"url": "http://169.254.169.254/"}):
+        response = client.post("/api/admin/catalog/reload", params=params, headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 400
+        assert "No such file" not in response.json()["detail"]
+    assert catalog_module._catalog.version == version
+
+    # Without a configured token admin endpoints are closed
+    monkeypatch.delenv("ADMIN_TOKEN")
+    assert client.post("/api/admin/catalog/reload", files=files, headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.get("/api/admin/tracing").status_code == 403
+
+
+def test_search_cache_hits_and_invalidates_on_new_version(catalog_module, sample_csv):
+    cache = catalog_module.SearchCache(maxsize=2)
+    catalog_module.search_cache, original = cache, catalog_module.search_cache
+    try:
+        client = TestClient(server.app)
+        first = client.get("/api/players/search", params={"q": "Jo", "limit": 5}).json()
+        again = client.get("/api/players/search", params={"q": " jo ", "limit": 5}).json()
+        assert first == again
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        client.get("/api/players/search", params={"q": "b"})
+        client.get("/api/players/search", params={"q": "c"})
+        assert cache.stats()["size"] == 2
+
+        catalog_module.set_catalog(PlayerCatalog(parse_rankings_csv(sample_csv)[:2]))
+        assert cache.stats()["size"] == 0
+        assert client.get("/api/players/search", params={"q": "jo"}).json() == []
+    finally:
+        catalog_module.search_cache = original
+
+
+def test_stale_fallback_keeps_serving_while_the_download_retries(catalog_module, sample_csv, monkeypatch):
+    import asyncio
+    import threading
+
+    release = threading.Event()
+
+    def slow_download(url=catalog_module.RANKINGS_CSV_URL):
+        release.wait(5)
+        return sample_csv
+
+    async def scenario():
+        fallback = PlayerCatalog(list(catalog_module.FALLBACK_PLAYERS), source="fallback")
+        fallback.loaded_at -= catalog_module.FALLBACK_RETRY_SECONDS + 1
+        catalog_module.set_catalog(fallback)
+        monkeypatch.setattr(catalog_module, "fetch_rankings_csv", slow_download)
+        # The retry is in flight but searches don't wait for it
+        served = await asyncio.wait_for(catalog_module.get_catalog(), timeout=1)
+        assert await catalog_module.get_catalog() is served
+        release.set()
+        await catalog_module._fallback_retry
+        return served, await catalog_module.get_catalog()
+
+    served, replaced = asyncio.run(scenario())
+    assert served.source == "fallback"
+    assert replaced.source == "csv" and len(replaced.players) == 6
+
+
+def test_resync_rereads_the_catalog_from_its_source(catalog_module, sample_csv, tmp_path, monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(catalog_module, "CATALOG_DIR", str(tmp_path))
+    rankings = tmp_path / "rankings.csv"
+    rankings.write_text(sample_csv, encoding="utf-8")
+
+    async def scenario():
+        await catalog_module.reload_catalog(path="rankings.csv")
+        # Another worker reloaded the same file while this one was disconnected from the bus
+        rankings.write_text(sample_csv + '"Puka Nacua","WR","LA","8","9.0","WR04"\n', encoding="utf-8")
+        await server.on_catalog_event({"type": "resync"})
+        await catalog_module._refresh
+        return catalog_module._catalog
+
+    catalog = asyncio.run(scenario())
+    assert catalog.source == "file:rankings.csv" and len(catalog.players) == 7
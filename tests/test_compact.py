@@ -0,0 +1,55 @@
+from compact import CompactLeague
+from server import DraftPickCreate, apply_draft_pick, apply_undo_pick
+from tests.conftest import make_pick
+
+
+def test_round_trip_matches_public_document(client, demo_league):
+    league_id = demo_league["id"]
+    for i, team in enumerate(demo_league["teams"][:3]):
+        client.post(f"/api/leagues/{league_id}/draft", json={
+            "player": make_pick(name=f"Player {i}", etr_rank=i + 1, adp=1.5, pos_rank="QB01"),
+            "team_id": team["id"], "amount": 10 + i,
+        })
+    document = client.get(f"/api/leagues/{league_id}").json()
+
+    state = CompactLeague.from_document(document)
+    rebuilt = state.to_document()
+    rebuilt["created_at"] = document["created_at"]
+    for pick in rebuilt["all_picks"]:
+        pick["timestamp"] = pick["timestamp"].isoformat()
+
+    assert rebuilt == document
+
+
+def test_pick_and_undo_keep_metrics_in_step(demo_league):
+    state = CompactLeague.from_document(demo_league)
+    team_id = demo_league["teams"][2]["id"]
+    apply_draft_pick(state, DraftPickCreate(player=make_pick(), team_id=team_id, amount=45))
+    team = state.to_document()["teams"][2]
+    assert (team["spent"], team["remaining"], team["max_bid"], len(team["roster"])) == (45, 255, 241, 1)
+
+    apply_undo_pick(state, state.to_document()["all_picks"][0]["id"])
+    team = state.to_document()["teams"][2]
+    assert (team["spent"], team["max_bid"], team["roster"]) == (0, 285, [])
+
+
+def test_players_are_interned_across_leagues(demo_league):
+    first = CompactLeague.from_document(demo_league)
+    second = CompactLeague.from_document(demo_league)
+    for state in (first, second):
+        state.add_pick(0, make_pick(etr_rank=40), 50)
+    assert first.pick_player[0] is second.pick_player[0]
+
+
+def test_interned_players_are_released_with_the_last_league_holding_them(demo_league):
+    import gc
+
+    import compact
+
+    state = CompactLeague.from_document(demo_league)
+    state.add_pick(0, make_pick("Released Player"), 5)
+    key = ("Released Player", "QB", "BUF", None, None, None)
+    assert key in compact._players
+    del state
+    gc.collect()
+    assert key not in compact._players
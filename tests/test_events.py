@@ -0,0 +1,104 @@
+import asyncio
+
+from catalog import CATALOG_COLUMNS, PlayerCatalog, catalog_from_body
+from events import InProcessBus, RedisBus
+from league_manager import LeagueManager
+from server import apply_draft_pick
+from storage import InMemoryLeagueRepository
+from tests.redis_stub import RedisStub
+from tests.test_league_manager import new_league, pick
+
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_in_process_bus_skips_own_messages():
+    async def scenario():
+        bus = InProcessBus(worker_id="a")
+        received = []
+
+        async def handler(message):
+            received.append(message)
+
+        bus.subscribe("leagues", handler)
+        await bus.publish("leagues", {"league_id": "x"})
+        await bus.publish("leagues", {"league_id": "y", "origin": "b"})
+        return received
+
+    assert asyncio.run(scenario()) == [{"league_id": "y", "origin": "b"}]
+
+
+def test_redis_bus_delivers_between_workers_and_resyncs_after_reconnect():
+    async def scenario():
+        stub = RedisStub()
+        port = await stub.start()
+        url = f"redis://127.0.0.1:{port}"
+        first, second = RedisBus(url, reconnect_delay=0.05, worker_id="a"), RedisBus(url, reconnect_delay=0.05, worker_id="b")
+        received = {"a": [], "b": []}
+        for bus in (first, second):
+            async def handler(message, name=bus.worker_id):
+                received[name].append(message)
+            bus.subscribe("leagues", handler)
+            await bus.start()
+
+        await first.publish("leagues", {"type": "commit", "league_id": "x", "version": 3})
+        await wait_for(lambda: received["b"])
+
+        # Server restart: subscribers reconnect and are told they may have missed events
+        await stub.stop()
+        await stub.start(port)
+        await wait_for(lambda: {"type": "resync"} in received["a"] and {"type": "resync"} in received["b"])
+        await second.publish("leagues", {"type": "commit", "league_id": "y", "version": 1})
+        await wait_for(lambda: len(received["a"]) == 2)
+
+        await first.close()
+        await second.close()
+        await stub.stop()
+        return received
+
+    received = asyncio.run(scenario())
+    assert received["b"] == [{"type": "commit", "league_id": "x", "version": 3, "origin": "a"}, {"type": "resync"}]
+    assert received["a"] == [{"type": "resync"}, {"type": "commit", "league_id": "y", "version": 1, "origin": "b"}]
+
+
+def test_remote_commit_invalidates_only_older_local_copy():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_league()
+        await repo.insert(document)
+        announced = []
+
+        async def announce(document, event):
+            announced.append((document["id"], document["version"]))
+
+        # Two workers sharing one store
+        writer, reader = LeagueManager(repo, on_commit=announce), LeagueManager(repo)
+        assert (await reader.get(document["id"]))["version"] == 0
+        await writer.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 5)))
+
+        reader.invalidate(document["id"], 0)
+        stale = await reader.get(document["id"])
+        reader.invalidate(*announced[-1])
+        fresh = await reader.get(document["id"])
+        stats = reader.stats()
+        await writer.close()
+        await reader.close()
+        return announced, stale, fresh, stats
+
+    announced, stale, fresh, stats = asyncio.run(scenario())
+    assert announced[-1][1] == 1
+    assert stale["all_picks"] == [] and stats["invalidations"] == 1
+    assert fresh["version"] == 1 and len(fresh["all_picks"]) == 1
+
+
+def test_catalog_round_trips_through_its_body(sample_csv):
+    from catalog import parse_rankings_csv
+
+    catalog = PlayerCatalog(parse_rankings_csv(sample_csv), source="upload")
+    copy = catalog_from_body(catalog.body, "remote")
+    assert copy.version == catalog.version
+    assert [[p[c] for c in CATALOG_COLUMNS] for p in copy.players] == [[p[c] for c in CATALOG_COLUMNS] for p in catalog.players]
@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+
+from tests.conftest import ADMIN_HEADERS, make_pick
+
+
+def test_league_exports_stream_picks_and_rosters(client, demo_league):
+    league_id = demo_league["id"]
+    teams = demo_league["teams"]
+    client.post(f"/api/leagues/{league_id}/draft", json={"player": make_pick(pos_rank="QB01"), "team_id": teams[0]["id"], "amount": 40})
+    client.post(f"/api/leagues/{league_id}/draft", json={"player": make_pick("Bijan Robinson", "RB", "ATL"), "team_id": teams[1]["id"], "amount": 55})
+
+    response = client.get(f"/api/leagues/{league_id}/export/picks")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["pick_number"], r["player_name"], r["team_name"], r["amount"], r["pos_rank"]) for r in rows] == [
+        ("1", "Josh Allen", teams[0]["name"], "40", "QB01"),
+        ("2", "Bijan Robinson", teams[1]["name"], "55", ""),
+    ]
+
+    response = client.get(f"/api/leagues/{league_id}/export/rosters", params={"format": "jsonl"})
+    rosters = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rosters) == len(teams)
+    assert rosters[0]["spent"] == 40 and rosters[0]["roster"] == [{"name": "Josh Allen", "position": "QB", "amount": 40}]
+
+    assert client.get(f"/api/leagues/{league_id}/export/picks", params={"format": "xml"}).status_code == 400
+    assert client.get(f"/api/leagues/{league_id}/export/bids").status_code == 404
+
+
+def test_bulk_export_covers_every_league(client, demo_league):
+    other = client.post("/api/leagues", json={"name": "Export League", "total_teams": 10}).json()
+    client.post(f"/api/leagues/{other['id']}/draft", json={"player": make_pick(), "team_id": other["teams"][0]["id"], "amount": 3})
+
+    response = client.get("/api/export/rosters", params={"format": "csv"}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    by_league = {}
+    for row in rows:
+        by_league.setdefault(row["league_id"], []).append(row)
+    assert len(by_league[demo_league["id"]]) == len(demo_league["teams"])
+    assert len(by_league[other["id"]]) == 10
+    assert by_league[other["id"]][0]["roster"] == "Josh Allen (QB) $3"
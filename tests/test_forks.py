@@ -0,0 +1,84 @@
+from compact import CompactLeague
+from forks import ForkStore
+from tests.conftest import make_pick
+
+
+def draft(client, league_id, team_id, name, amount):
+    response = client.post(f"/api/leagues/{league_id}/draft", json={"player": make_pick(name), "team_id": team_id, "amount": amount})
+    assert response.status_code == 200
+    return response.json()["all_picks"][-1]["id"]
+
+
+def test_fork_shares_parent_prefix_and_keeps_it_when_parent_rewrites(client, demo_league):
+    league_id = demo_league["id"]
+    team_id = demo_league["teams"][0]["id"]
+    first = draft(client, league_id, team_id, "Josh Allen", 30)
+    draft(client, league_id, team_id, "Lamar Jackson", 20)
+
+    fork = client.post(f"/api/leagues/{league_id}/forks", json={"at_pick": 1}).json()
+    assert fork["fork_point"] == 1 and fork["shares_parent"]
+    forks_url = f"/api/leagues/{league_id}/forks/{fork['id']}"
+
+    what_if = client.post(f"{forks_url}/draft", json={"player": make_pick("Christian McCaffrey", "RB", "SF"), "team_id": team_id, "amount": 62})
+    assert what_if.status_code == 200
+    board = what_if.json()
+    assert [p["player"]["name"] for p in board["all_picks"]] == ["Josh Allen", "Christian McCaffrey"]
+    assert board["teams"][0]["spent"] == 92
+
+    # The parent is untouched and its later picks don't leak into the fork
+    draft(client, league_id, team_id, "Jalen Hurts", 5)
+    parent = client.get(f"/api/leagues/{league_id}").json()
+    assert [p["player"]["name"] for p in parent["all_picks"]] == ["Josh Allen", "Lamar Jackson", "Jalen Hurts"]
+    assert len(client.get(forks_url).json()["all_picks"]) == 2
+
+    assert client.delete(f"{forks_url}/picks/{first}").status_code == 400
+
+    # Undoing a shared pick in the parent copies the prefix into the fork first
+    client.delete(f"/api/leagues/{league_id}/picks/{first}")
+    assert [p["player"]["name"] for p in client.get(forks_url).json()["all_picks"]] == ["Josh Allen", "Christian McCaffrey"]
+    assert client.get(f"/api/leagues/{league_id}/forks").json()[0]["shares_parent"] is False
+
+    assert client.delete(forks_url).status_code == 200
+    assert client.get(forks_url).status_code == 404
+
+
+def test_store_collects_idle_and_excess_forks(monkeypatch):
+    import forks
+
+    parent = CompactLeague.from_document({
+        "id": "league", "name": "League", "total_teams": 1, "budget_per_team": 200, "roster_size": 16,
+        "position_requirements": {}, "created_at": "2024-08-01T00:00:00", "all_picks": [],
+        "teams": [{"id": "team", "name": "Team", "budget": 200, "spent": 0}],
+    })
+    store = ForkStore(ttl=60, max_forks_per_league=2)
+    oldest = store.create(parent)
+    store.create(parent)
+    store.create(parent)
+    assert oldest not in store.list("league") and len(store.list("league")) == 2
+
+    now = forks.time.monotonic()
+    monkeypatch.setattr(forks.time, "monotonic", lambda: now + 61)
+    assert store.list("league") == []
+    assert store.stats()["collected"] == 3
+
+
+def test_fork_keeps_its_prefix_when_another_worker_rewrites_the_parent(client, demo_league):
+    import asyncio
+
+    import server
+
+    league_id = demo_league["id"]
+    team_id = demo_league["teams"][0]["id"]
+    draft(client, league_id, team_id, "Josh Allen", 30)
+    fork = client.post(f"/api/leagues/{league_id}/forks", json={}).json()
+    forks_url = f"/api/leagues/{league_id}/forks/{fork['id']}"
+
+    # Another worker undoes the pick and announces the new version
+    stored = client.get(f"/api/leagues/{league_id}").json()
+    rewritten = {**stored, "all_picks": [], "version": stored["version"] + 1}
+    rewritten["teams"] = [{**team, "spent": 0, "roster": []} for team in stored["teams"]]
+    asyncio.run(server.repository.replace(league_id, rewritten))
+    server.league_manager.invalidate(league_id, rewritten["version"])
+
+    assert client.get(f"/api/leagues/{league_id}").json()["all_picks"] == []
+    assert [p["player"]["name"] for p in client.get(forks_url).json()["all_picks"]] == ["Josh Allen"]
@@ -0,0 +1,84 @@
+from tests.conftest import make_pick
+
+
+def board(league):
+    return [p["id"] for p in league["all_picks"]], [(t["spent"], t["max_bid"], t["remaining_spots"]) for t in league["teams"]]
+
+
+def test_state_at_pick_matches_the_board_at_that_time(client, demo_league):
+    league_id = demo_league["id"]
+    url = f"/api/leagues/{league_id}"
+    teams = [team["id"] for team in demo_league["teams"]]
+    boards = [board(client.get(url).json())]
+
+    # Long enough to cross two checkpoints, with undos and a settings change on the way
+    for i in range(40):
+        if i % 9 == 8:
+            last = client.get(url).json()["all_picks"][-1]["id"]
+            client.delete(f"{url}/picks/{last}")
+        else:
+            client.post(f"{url}/draft", json={"player": make_pick(f"Player {i}"), "team_id": teams[i % len(teams)], "amount": 1 + i % 4})
+        if i == 20:
+            league = client.get(url).json()
+            settings = {key: league[key] for key in ("name", "total_teams", "roster_size", "position_requirements")}
+            assert client.put(f"{url}/settings", json={**settings, "budget_per_team": 250}).status_code == 200
+        boards.append(board(client.get(url).json()))
+
+    assert client.get(url).json()["log_length"] == 40
+    for at_pick in (0, 1, 15, 16, 17, 21, 22, 33, 39, 40):
+        response = client.get(f"{url}/state", params={"at_pick": at_pick})
+        assert response.status_code == 200
+        assert board(response.json()) == boards[at_pick], at_pick
+
+    assert client.get(f"{url}/state", params={"at_pick": 41}).status_code == 400
+
+
+def test_history_is_logged_before_the_pick_is_acknowledged_and_closes_gaps(client, demo_league, monkeypatch):
+    import server
+
+    league_id = demo_league["id"]
+    url = f"/api/leagues/{league_id}"
+    teams = [team["id"] for team in demo_league["teams"]]
+    boards = []
+    append = server.pick_history.append
+
+    async def flaky_append(league_id, seq, event):
+        if seq == 3:
+            raise ConnectionError("history store unavailable")
+        await append(league_id, seq, event)
+
+    monkeypatch.setattr(server.pick_history, "append", flaky_append)
+    for i in range(5):
+        league = client.post(f"{url}/draft", json={"player": make_pick(f"Player {i}"), "team_id": teams[i % len(teams)], "amount": 2}).json()
+        boards.append(board(league))
+        # Readable as soon as the pick is acknowledged
+        assert board(client.get(f"{url}/state", params={"at_pick": i + 1}).json()) == boards[i]
+    # The lost event was replaced by a checkpoint, so every later pick still replays
+    for at_pick in range(1, 6):
+        assert board(client.get(f"{url}/state", params={"at_pick": at_pick}).json()) == boards[at_pick - 1]
+
+
+def test_picks_are_acknowledged_without_waiting_for_the_history_write(client, demo_league, monkeypatch):
+    import asyncio
+    import threading
+
+    import server
+
+    url = f"/api/leagues/{demo_league['id']}"
+    release = threading.Event()
+    append = server.pick_history.append
+
+    async def slow_append(league_id, seq, event):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        await append(league_id, seq, event)
+
+    monkeypatch.setattr(server.pick_history, "append", slow_append)
+    for i in range(2):
+        response = client.post(f"{url}/draft", json={"player": make_pick(f"Player {i}"), "team_id": demo_league["teams"][0]["id"], "amount": 2})
+        assert response.status_code == 200
+    assert server.derived_writes.stats()["pending"] >= 1
+
+    release.set()
+    # Reading history waits for the queued writes
+    assert [p["player"]["name"] for p in client.get(f"{url}/state", params={"at_pick": 1}).json()["all_picks"]] == ["Player 0"]
@@ -0,0 +1,76 @@
+import asyncio
+
+from idempotency import IdempotencyStore
+from tests.conftest import make_pick
+
+
+def test_retried_pick_returns_original_response_without_drafting_twice(client, demo_league):
+    url = f"/api/leagues/{demo_league['id']}/draft"
+    pick = {"player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 25}
+    headers = {"Idempotency-Key": "pick-1"}
+
+    first = client.post(url, json=pick, headers=headers)
+    retry = client.post(url, json=pick, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+
+    league = client.get(f"/api/leagues/{demo_league['id']}").json()
+    assert len(league["all_picks"]) == 1
+    assert league["teams"][0]["spent"] == 25
+
+    # Without a key every request is applied
+    client.post(url, json=pick)
+    assert len(client.get(f"/api/leagues/{demo_league['id']}").json()["all_picks"]) == 2
+
+
+def test_reused_key_with_different_body_is_rejected(client, demo_league):
+    url = f"/api/leagues/{demo_league['id']}/draft"
+    team_id = demo_league["teams"][0]["id"]
+    headers = {"Idempotency-Key": "pick-2"}
+    client.post(url, json={"player": make_pick(), "team_id": team_id, "amount": 5}, headers=headers)
+
+    response = client.post(url, json={"player": make_pick(), "team_id": team_id, "amount": 6}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_store_shares_in_flight_claims_and_expires_keys():
+    async def scenario():
+        store = IdempotencyStore(ttl=0.05, max_keys_per_league=2)
+        entry, owner = store.claim("league", "a", "f")
+        retry, retry_owner = store.claim("league", "a", "f")
+        assert owner and not retry_owner and retry is entry
+
+        # Per-league bound drops the oldest key
+        store.claim("league", "b", "f")
+        store.claim("league", "c", "f")
+        assert store.claim("league", "a", "f")[1]
+
+        await asyncio.sleep(0.06)
+        assert store.claim("league", "b", "f")[1]
+        # Other leagues have their own key space
+        assert store.claim("other", "b", "f")[1]
+
+    asyncio.run(scenario())
+
+
+def test_conflict_is_not_replayed_to_the_retry(client, demo_league, monkeypatch):
+    import server
+    from league_manager import VersionConflict
+
+    commit = server.commit_draft_pick
+    calls = []
+
+    async def conflict_once(league_id, pick_data):
+        calls.append(league_id)
+        if len(calls) == 1:
+            raise VersionConflict("League kept changing in another worker; try again")
+        return await commit(league_id, pick_data)
+
+    monkeypatch.setattr(server, "commit_draft_pick", conflict_once)
+    url = f"/api/leagues/{demo_league['id']}/draft"
+    pick = {"player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 25}
+    headers = {"Idempotency-Key": "pick-conflict"}
+    assert client.post(url, json=pick, headers=headers).status_code == 409
+    retry = client.post(url, json=pick, headers=headers)
+    assert retry.status_code == 200 and "idempotent-replayed" not in retry.headers
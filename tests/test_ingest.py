@@ -0,0 +1,73 @@
+from fastapi.testclient import TestClient
+
+import server
+from ingest import ColumnMapping, RankingSource, merge_sources, player_key
+from tests.conftest import ADMIN_HEADERS
+
+
+def test_player_key_resolves_name_variants():
+    assert player_key("Marvin Harrison Jr.", "WR", "ARI") == player_key("Marvin Harrison", "WR", "ARI")
+    assert player_key("Amon-Ra St. Brown", "WR", "DET") == player_key("Amon Ra St Brown", "WR", "DET")
+    assert player_key("DEN DST", "DST", "DEN") == player_key("Denver Broncos", "DST", "DEN")
+
+
+def test_merge_produces_consensus_columns(tmp_path, sample_csv):
+    etr = tmp_path / "etr.csv"
+    etr.write_text(sample_csv, encoding="utf-8")
+    adp = tmp_path / "adp.csv"
+    adp.write_text(
+        "Player,POS,Team,AVG\n"
+        "Bijan Robinson,RB1,ATL,1.2\n"
+        "Ja'Marr Chase,WR1,CIN,3.0\n"
+        "Josh Allen,QB1,BUF,20.0\n"
+        "Puka Nacua,WR4,LA,9.0\n",
+        encoding="utf-8",
+    )
+    projections = tmp_path / "proj.csv"
+    projections.write_text(
+        "Rk,Player,Pos,Tm\n1,Bijan Robinson,RB,ATL\n2,Ja'Marr Chase,WR,CIN\n",
+        encoding="utf-8",
+    )
+
+    players, stats = merge_sources([
+        RankingSource(path=str(etr)),
+        RankingSource(path=str(adp), mapping="fantasypros_adp"),
+        RankingSource(path=str(projections), mapping=ColumnMapping(name="Player", position="Pos", team="Tm", rank="Rk", adp=None)),
+    ])
+
+    assert stats.rows == 12
+    by_name = {p["name"]: p for p in players}
+    assert len(players) == 7
+    # Chase ranks (1 + 2) / 2, Bijan (2 + 1) / 2: tie broken by name
+    assert [p["name"] for p in players[:2]] == ["Bijan Robinson", "Ja'Marr Chase"]
+    assert by_name["Ja'Marr Chase"]["adp"] == 2.0
+    assert by_name["Josh Allen"]["pos_rank"] == "QB01"
+    # Only ranked by ADP, so it sorts after every ranked player
+    assert players[-1]["name"] == "Puka Nacua"
+    assert players[-1]["etr_rank"] == 7
+
+
+def test_merge_endpoint_swaps_catalog(catalog_module, tmp_path, sample_csv, monkeypatch):
+    monkeypatch.setattr(catalog_module, "CATALOG_DIR", str(tmp_path))
+    etr = tmp_path / "etr.csv"
+    etr.write_text(sample_csv, encoding="utf-8")
+    client = TestClient(server.app)
+
+    response = client.post("/api/admin/catalog/merge", json=[{"path": "etr.csv"}], headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert response.json()["count"] == 6
+    assert catalog_module._catalog.source == "merge"
+
+    response = client.post("/api/admin/catalog/merge", json=[{"path": "etr.csv", "mapping": "nope"}], headers=ADMIN_HEADERS)
+    assert response.status_code == 400
+
+    # Aliases fold a source's spelling into the canonical name; undecodable files are a 400, not a 500
+    misspelled = tmp_path / "misspelled.csv"
+    misspelled.write_text(sample_csv.replace("Bijan Robinson", "Bijan Robinsen"), encoding="utf-8")
+    merge = {"sources": [{"path": "etr.csv"}, {"path": "misspelled.csv"}], "aliases": {"Bijan Robinsen": "Bijan Robinson"}}
+    response = client.post("/api/admin/catalog/merge", json=merge, headers=ADMIN_HEADERS)
+    assert response.status_code == 200 and response.json()["count"] == 6
+
+    (tmp_path / "latin1.csv").write_bytes(sample_csv.lstrip("\ufeff").replace("Ja'Marr", "Já'Marr").encode("latin-1"))
+    response = client.post("/api/admin/catalog/merge", json=[{"path": "latin1.csv"}], headers=ADMIN_HEADERS)
+    assert response.status_code == 400
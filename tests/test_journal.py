@@ -0,0 +1,182 @@
+import asyncio
+
+from journal import WriteBehindLeagueRepository
+from storage import InMemoryLeagueRepository
+
+
+class CountingRepository(InMemoryLeagueRepository):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    async def replace_many(self, leagues):
+        self.batches.append([league["id"] for league in leagues])
+        await super().replace_many(leagues)
+
+
+def league(league_id, name="League", picks=0):
+    return {"id": league_id, "name": name, "all_picks": list(range(picks))}
+
+
+def test_writes_are_journaled_then_coalesced_into_one_flush(tmp_path):
+    backing = CountingRepository()
+
+    async def scenario():
+        repo = WriteBehindLeagueRepository(backing, str(tmp_path), flush_interval=3600)
+        await repo.start()
+        await repo.insert(league("a"))
+        for picks in range(1, 11):
+            await repo.replace("a", league("a", picks=picks))
+        assert await backing.get("a") is None
+        assert len((await repo.get("a"))["all_picks"]) == 10
+
+        await repo.flush()
+        assert backing.batches == [["a"]]
+        assert len((await backing.get("a"))["all_picks"]) == 10
+        assert [p.name for p in tmp_path.glob("segment-*.log")] == ["segment-2.log"]
+        await repo.close()
+
+    asyncio.run(scenario())
+
+
+def test_unflushed_writes_survive_a_crash(tmp_path):
+    async def crash():
+        repo = WriteBehindLeagueRepository(InMemoryLeagueRepository(), str(tmp_path), flush_interval=3600)
+        await repo.start()
+        await repo.insert(league("a", name="Demo"))
+        await repo.replace("a", league("a", name="Demo", picks=3))
+        await repo.delete_by_name("Demo")
+        await repo.insert(league("b", name="Demo", picks=1))
+        # No flush, no close: the process dies here
+        repo._flush_task.cancel()
+        repo.journal.close()
+
+    async def restart():
+        backing = InMemoryLeagueRepository()
+        await backing.insert(league("a", name="Demo"))
+        repo = WriteBehindLeagueRepository(backing, str(tmp_path), flush_interval=3600)
+        await repo.start()
+        result = (await backing.get("a"), await backing.get("b"))
+        await repo.close()
+        return result
+
+    asyncio.run(crash())
+    a, b = asyncio.run(restart())
+    assert a is None
+    assert b["all_picks"] == [0]
+
+
+def test_concurrent_appends_share_fsyncs(tmp_path):
+    async def scenario():
+        repo = WriteBehindLeagueRepository(InMemoryLeagueRepository(), str(tmp_path), flush_interval=3600)
+        await repo.start()
+        await asyncio.gather(*[repo.insert(league(str(i))) for i in range(50)])
+        stats = (repo.journal.appends, repo.journal.syncs)
+        await repo.close()
+        return stats
+
+    appends, syncs = asyncio.run(scenario())
+    assert appends == 50
+    assert syncs < 50
+
+
+class FailingRepository(InMemoryLeagueRepository):
+    """replace_many waits until released, then fails while `failing` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.failing = True
+        self.entered = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def replace_many(self, leagues):
+        self.entered.set()
+        await self.release.wait()
+        if self.failing:
+            raise ConnectionError("backing store down")
+        await super().replace_many(leagues)
+
+
+def test_failed_flush_keeps_leagues_evicted_meanwhile(tmp_path):
+    async def scenario():
+        backing = FailingRepository()
+        repo = WriteBehindLeagueRepository(backing, str(tmp_path), flush_interval=3600, max_cached=1)
+        await repo.start()
+        await repo.insert(league("a", picks=2))
+        await repo.insert(league("b", picks=3))
+
+        flush = asyncio.create_task(repo.flush())
+        await backing.entered.wait()
+        # Over the cache limit while a and b are in flight: they must not be dropped
+        await repo.insert(league("c"))
+        backing.release.set()
+        try:
+            await flush
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("flush should have failed")
+
+        assert len((await repo.get("a"))["all_picks"]) == 2
+        assert sorted(league["id"] for league in await repo.list()) == ["a", "b", "c"]
+        assert list(tmp_path.glob("segment-*.log"))
+
+        backing.failing = False
+        await repo.flush()
+        assert [len((await backing.get(i))["all_picks"]) for i in "abc"] == [2, 3, 0]
+        await repo.close()
+
+    asyncio.run(scenario())
+
+
+def test_pending_name_delete_hides_uncached_leagues(tmp_path):
+    async def scenario():
+        backing = InMemoryLeagueRepository()
+        await backing.insert(league("old", name="Demo"))
+        repo = WriteBehindLeagueRepository(backing, str(tmp_path), flush_interval=3600)
+        await repo.start()
+        await repo.delete_by_name("Demo")
+        assert await repo.get("old") is None
+        assert await repo.list() == []
+
+        await repo.flush()
+        assert await backing.get("old") is None
+        await repo.close()
+
+    asyncio.run(scenario())
+
+
+def test_appends_fail_instead_of_hanging_when_the_journal_is_closed(tmp_path):
+    from journal import Journal
+
+    async def scenario():
+        journal = Journal(str(tmp_path), on_commit=lambda record: None)
+        try:
+            await journal.append({"op": "put"})
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("append before open should fail")
+
+        journal.open_segment()
+        pending = asyncio.gather(*[journal.append({"op": "put", "id": str(i)}) for i in range(3)], return_exceptions=True)
+        await asyncio.sleep(0)
+        journal.close()
+        return await asyncio.wait_for(pending, 1)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, Exception) for result in results)
+
+
+def test_write_behind_refuses_several_workers(tmp_path, monkeypatch):
+    import pytest
+
+    from storage import create_repository
+
+    monkeypatch.setenv("STORAGE_ENGINE", "mongo")
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost:27017")
+    monkeypatch.setenv("DB_NAME", "test")
+    monkeypatch.setenv("WRITE_BEHIND_JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(RuntimeError, match="single worker"):
+        create_repository()
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from league_manager import ActorStopped, LeagueManager
+from server import DraftPickCreate, League, LeagueCreate, apply_draft_pick, apply_league_settings
+from storage import InMemoryLeagueRepository
+from tests.conftest import make_pick
+
+
+def new_league(**settings):
+    league = League(
+        name="Actor League", total_teams=2, budget_per_team=200, roster_size=16,
+        position_requirements={"QB": 1},
+        teams=[{"name": f"Team {i + 1}", "budget": 200, "remaining": 200} for i in range(2)],
+    )
+    return league.dict()
+
+
+def pick(document, amount, name="Josh Allen"):
+    return DraftPickCreate(player=make_pick(name=name), team_id=document["teams"][0]["id"], amount=amount)
+
+
+def test_concurrent_commands_apply_in_order_without_lost_updates():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_league()
+        await repo.insert(document)
+        manager = LeagueManager(repo)
+        data = [pick(document, 1, name=f"Player {i}") for i in range(20)]
+        await asyncio.gather(*[manager.execute(document["id"], lambda state, p=p: apply_draft_pick(state, p)) for p in data])
+        stored = await repo.get(document["id"])
+        await manager.close()
+        return stored, manager.stats()
+
+    stored, stats = asyncio.run(scenario())
+    assert [p["player"]["name"] for p in stored["all_picks"]] == [f"Player {i}" for i in range(20)]
+    assert stored["teams"][0]["spent"] == 20
+    assert stats["loads"] == 1
+
+
+def test_rejected_command_rolls_back_partial_changes():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_league()
+        await repo.insert(document)
+        manager = LeagueManager(repo)
+        await manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 10)))
+        # Dropping to zero teams fails after name/budget were already changed on the live model
+        settings = LeagueCreate(name="Renamed", total_teams=0, budget_per_team=100)
+        with pytest.raises(HTTPException):
+            await manager.execute(document["id"], lambda state: state.update_model(League, lambda league: apply_league_settings(league, settings)))
+        live = await manager.get(document["id"])
+        await manager.close()
+        return live
+
+    live = asyncio.run(scenario())
+    assert live["name"] == "Actor League"
+    assert live["budget_per_team"] == 200
+
+
+def test_idle_leagues_are_evicted_least_recently_used_first():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        manager = LeagueManager(repo, max_active=2)
+        documents = [new_league() for _ in range(3)]
+        for document in documents:
+            await repo.insert(document)
+        for document in documents:
+            await manager.get(document["id"])
+        active = list(manager._actors)
+        # Evicted leagues reload transparently from storage
+        reloaded = await manager.get(documents[0]["id"])
+        await manager.close()
+        return documents, active, reloaded, manager.stats()
+
+    documents, active, reloaded, stats = asyncio.run(scenario())
+    assert active == [documents[1]["id"], documents[2]["id"]]
+    assert reloaded["id"] == documents[0]["id"]
+    assert stats["evictions"] == 2
+
+
+class FlakyRepository(InMemoryLeagueRepository):
+    """Reads and writes fail while `down` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    async def get(self, league_id):
+        if self.down:
+            raise ConnectionError("storage down")
+        return await super().get(league_id)
+
+    async def replace(self, league_id, league, upsert=False):
+        if self.down:
+            raise ConnectionError("storage down")
+        await super().replace(league_id, league, upsert)
+
+
+def test_actor_survives_a_failed_write_and_failed_reload():
+    async def scenario():
+        repo = FlakyRepository()
+        document = new_league()
+        await repo.insert(document)
+        manager = LeagueManager(repo)
+        await manager.get(document["id"])
+
+        repo.down = True
+        # The second command is queued behind the failing write and its failed reload
+        failed = await asyncio.wait_for(asyncio.gather(
+            manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 10))),
+            manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 20))),
+            return_exceptions=True,
+        ), 1)
+        assert all(isinstance(result, ConnectionError) for result in failed)
+        repo.down = False
+        # The unstored pick is gone and the same actor keeps taking commands
+        await manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 3)))
+        stored = await repo.get(document["id"])
+        await manager.close()
+        return stored
+
+    stored = asyncio.run(scenario())
+    assert [p["amount"] for p in stored["all_picks"]] == [3]
+
+
+def test_stopping_an_actor_fails_its_queued_commands():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_league()
+        await repo.insert(document)
+        manager = LeagueManager(repo)
+        await manager.get(document["id"])
+        queued = [
+            asyncio.ensure_future(manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 1))))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        manager.forget_name("Actor League")
+        return await asyncio.wait_for(asyncio.gather(*queued, return_exceptions=True), 1)
+
+    results = asyncio.run(scenario())
+    assert any(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.parametrize("blocked_in", ["storage_write", "commit_hook"])
+def test_stopping_an_actor_fails_the_command_it_is_running(blocked_in):
+    class SlowRepository(InMemoryLeagueRepository):
+        async def replace_if_version(self, league_id, league, version):
+            if blocked_in == "storage_write":
+                await asyncio.sleep(60)
+            return await super().replace_if_version(league_id, league, version)
+
+    async def on_commit(document, event):
+        await asyncio.sleep(60)
+
+    async def scenario():
+        repo = SlowRepository()
+        document = new_league()
+        await repo.insert(document)
+        manager = LeagueManager(repo, on_commit=on_commit)
+        running = asyncio.ensure_future(manager.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 1))))
+        await asyncio.sleep(0.01)
+        await manager.close()
+        return await asyncio.wait_for(asyncio.gather(running, return_exceptions=True), 1)
+
+    (result,) = asyncio.run(scenario())
+    assert isinstance(result, ActorStopped)
+
+
+def test_concurrent_workers_retry_on_the_newer_version_instead_of_overwriting():
+    async def scenario():
+        repo = InMemoryLeagueRepository()
+        document = new_league()
+        await repo.insert(document)
+        # Two workers holding the same league live, neither hearing about the other's writes
+        first, second = LeagueManager(repo), LeagueManager(repo)
+        await first.get(document["id"])
+        await second.get(document["id"])
+        await first.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 10, name="Player 1")))
+        live = await second.execute(document["id"], lambda state: apply_draft_pick(state, pick(document, 20, name="Player 2")))
+        stored = await repo.get(document["id"])
+        await first.close()
+        await second.close()
+        return live, stored
+
+    live, stored = asyncio.run(scenario())
+    assert [p["player"]["name"] for p in stored["all_picks"]] == ["Player 1", "Player 2"]
+    assert stored["teams"][0]["spent"] == 30
+    assert live["version"] == stored["version"] == 2
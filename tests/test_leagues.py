@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from tests.conftest import make_pick
+from storage import InMemoryLeagueRepository
+
+
+def test_create_and_get_league(client):
+    league = client.post("/api/leagues", json={"name": "Test", "total_teams": 10, "roster_size": 15}).json()
+    assert len(league["teams"]) == 10
+    assert league["teams"][0]["max_bid"] == 200 - 14
+
+    fetched = client.get(f"/api/leagues/{league['id']}").json()
+    assert fetched["id"] == league["id"]
+    assert client.get("/api/leagues/missing").status_code == 404
+
+
+def test_draft_pick_and_undo_update_team_metrics(client, demo_league):
+    league_id = demo_league["id"]
+    team_id = demo_league["teams"][0]["id"]
+
+    league = client.post(f"/api/leagues/{league_id}/draft", json={
+        "player": make_pick(), "team_id": team_id, "amount": 60,
+    }).json()
+    team = league["teams"][0]
+    assert (team["spent"], team["remaining"], team["max_bid"], team["remaining_spots"]) == (60, 240, 226, 15)
+
+    pick_id = league["all_picks"][0]["id"]
+    assert client.delete(f"/api/leagues/{league_id}/picks/{pick_id}").status_code == 200
+    team = client.get(f"/api/leagues/{league_id}").json()["teams"][0]
+    assert (team["spent"], team["max_bid"]) == (0, 285)
+
+
+def test_get_league_revalidates_with_version_etag(client, demo_league):
+    url = f"/api/leagues/{demo_league['id']}"
+    first = client.get(url)
+    etag = first.headers["etag"]
+    assert etag == f'W/"{first.json()["version"]}"'
+
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.content == b""
+
+    client.post(f"{url}/draft", json={"player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 5})
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_draft_pick_rejects_over_budget(client, demo_league):
+    response = client.post(f"/api/leagues/{demo_league['id']}/draft", json={
+        "player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 301,
+    })
+    assert response.status_code == 400
+
+
+def test_settings_update_adds_teams(client, demo_league):
+    response = client.put(f"/api/leagues/{demo_league['id']}/settings", json={
+        "name": "Renamed", "total_teams": 16, "budget_per_team": 300, "roster_size": 16,
+    })
+    assert response.status_code == 200
+    assert len(response.json()["teams"]) == 16
+
+
+def test_league_updates_keep_their_error_statuses(client, demo_league, monkeypatch):
+    import server
+
+    url = f"/api/leagues/{demo_league['id']}"
+    assert client.put(f"{url}/teams/missing", json={"name": "Nobody"}).status_code == 404
+
+    async def always_stale(league_id, league, version):
+        return False
+
+    monkeypatch.setattr(server.repository, "replace_if_version", always_stale)
+    settings = {"name": "Renamed", "total_teams": 14, "budget_per_team": 300}
+    assert client.put(f"{url}/settings", json=settings).status_code == 409
+
+
+def test_demo_league_replaces_previous_demo(client, demo_league):
+    client.post("/api/demo-league")
+    names = [league["name"] for league in client.get("/api/leagues").json()]
+    assert names.count("Pipelayer Pro Bowl") == 1
+
+
+def test_in_memory_snapshot_round_trip(tmp_path, client, demo_league):
+    snapshot = tmp_path / "leagues.json"
+
+    async def scenario():
+        repo = InMemoryLeagueRepository(snapshot_path=str(snapshot))
+        await repo.insert(client.get(f"/api/leagues/{demo_league['id']}").json())
+        await repo.close()
+        return InMemoryLeagueRepository(snapshot_path=str(snapshot))
+
+    restored = asyncio.run(scenario())
+    assert json.loads(snapshot.read_text())[0]["id"] == demo_league["id"]
+    assert asyncio.run(restored.get(demo_league["id"]))["name"] == "Pipelayer Pro Bowl"
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from metrics import Histogram, mongo_command_listener, mongo_command_seconds, render
+from tests.conftest import make_pick
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_render_seconds", "Test histogram", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/x")
+
+    lines = [line for line in render().splitlines() if line.startswith("test_render_seconds")]
+    assert lines == [
+        'test_render_seconds_bucket{route="/x",le="0.1"} 1',
+        'test_render_seconds_bucket{route="/x",le="1.0"} 2',
+        'test_render_seconds_bucket{route="/x",le="+Inf"} 3',
+        'test_render_seconds_sum{route="/x"} 5.55',
+        'test_render_seconds_count{route="/x"} 3',
+    ]
+
+
+def test_metrics_endpoint_reports_routes_and_pick_commits(client, demo_league):
+    league_id = demo_league["id"]
+    client.get(f"/api/leagues/{league_id}")
+    client.post(f"/api/leagues/{league_id}/draft", json={"player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 5})
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    body = response.text
+    # Labelled by route template, not by the league id in the path
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/leagues/{league_id}",status="200"}' in body
+    assert league_id not in body
+    assert "pick_commit_duration_seconds_count" in body
+    assert 'cache_hit_ratio{cache="search"}' in body
+    assert 'http_requests_in_flight{method="GET"} 1' in body  # the scrape itself
+
+
+def test_mongo_listener_records_commands_by_collection():
+    listener = mongo_command_listener()
+    before = mongo_command_seconds.count("leagues", "find")
+    listener.started(SimpleNamespace(command={"find": "leagues"}, command_name="find", connection_id=("db", 1), request_id=7))
+    listener.succeeded(SimpleNamespace(command_name="find", connection_id=("db", 1), request_id=7, duration_micros=1500))
+    assert mongo_command_seconds.count("leagues", "find") == before + 1
@@ -0,0 +1,44 @@
+import asyncio
+
+from tests.conftest import make_pick
+
+
+def test_training_recovers_prices_and_scores_the_catalog(client, catalog_module, monkeypatch, tmp_path):
+    import pricing
+    from storage import InMemoryLeagueRepository
+
+    # Synthetic history: price falls off with positional rank, QBs go for half
+    repository = InMemoryLeagueRepository()
+    for n in range(5):
+        picks = []
+        for rank in range(1, 13):
+            for position in ("RB", "QB"):
+                price = round(60 / rank ** 0.8 * (0.5 if position == "QB" else 1))
+                player = make_pick(f"{position} {rank}", position, "FA", pos_rank=f"{position}{rank:02d}", etr_rank=rank * 4, adp=rank * 4.0)
+                picks.append({"player": player, "amount": max(1, price)})
+        asyncio.run(repository.insert({"id": str(n), "total_teams": 12, "budget_per_team": 200, "roster_size": 16, "all_picks": picks}))
+
+    model = asyncio.run(pricing.train(repository, batch_size=2))
+    assert (model.picks, model.leagues) == (120, 5)
+    assert model.rmse < 0.2
+    model.save(str(tmp_path / "model.json"))
+    loaded = pricing.PriceModel.load(str(tmp_path / "model.json"))
+    assert loaded.coefficients == model.coefficients
+
+    monkeypatch.setattr(pricing, "_model", None)
+    monkeypatch.setattr(pricing, "_model_loaded", True)
+    league = client.post("/api/leagues", json={"name": "Values League"}).json()
+    assert client.get(f"/api/leagues/{league['id']}/values").status_code == 503
+
+    monkeypatch.setattr(pricing, "_model", loaded)
+    client.post(f"/api/leagues/{league['id']}/draft", json={"player": make_pick(), "team_id": league["teams"][0]["id"], "amount": 30})
+    response = client.get(f"/api/leagues/{league['id']}/values")
+    assert response.status_code == 200
+    players = response.json()["players"]
+    assert "Josh Allen" not in [player["name"] for player in players]
+    values = {player["name"]: player["value"] for player in players}
+    assert values["Bijan Robinson"] > values["Jonathan Taylor"] >= 1
+    assert [player["value"] for player in players] == sorted(values.values(), reverse=True)
+    assert players[0]["tier"] == 1
+
+    assert client.get(f"/api/leagues/{league['id']}/values", params={"position": "RB", "limit": 1}).json()["players"][0]["name"] == "Bijan Robinson"
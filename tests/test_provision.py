@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from tests.conftest import ADMIN_HEADERS, make_pick
+
+
+def test_bulk_provisioning_streams_one_result_per_league(client, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "PROVISION_BATCH_SIZE", 7)
+    template = {"name": "Cup {n}", "total_teams": 10, "budget_per_team": 250, "roster_size": 15}
+    response = client.post("/api/leagues/bulk", json={"template": template, "count": 20, "first_number": 5}, headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results, summary = lines[:-1], lines[-1]
+    assert [r["index"] for r in results] == list(range(20))
+    assert [r["name"] for r in results[:2]] == ["Cup 5", "Cup 6"] and all(r["ok"] for r in results)
+    assert summary["done"] and (summary["created"], summary["failed"]) == (20, 0)
+
+    league = client.get(f"/api/leagues/{results[-1]['id']}").json()
+    assert league["name"] == "Cup 24"
+    assert len({team["id"] for team in league["teams"]}) == 10
+    assert league["teams"][0]["max_bid"] == 236 and league["teams"][0]["remaining_spots"] == 15
+
+    url = f"/api/leagues/{results[3]['id']}"
+    assert client.post(f"{url}/draft", json={"player": make_pick(), "team_id": league["teams"][0]["id"], "amount": 5}).status_code == 404
+    team_id = client.get(url).json()["teams"][2]["id"]
+    assert client.post(f"{url}/draft", json={"player": make_pick(), "team_id": team_id, "amount": 5}).status_code == 200
+    assert client.get(f"/api/leagues/{results[4]['id']}").json()["all_picks"] == []
+    assert client.get(f"{url}/state", params={"at_pick": 0}).json()["all_picks"] == []
+
+
+@pytest.mark.parametrize("count", [0, 100000])
+def test_bulk_provisioning_bounds_count(client, count):
+    response = client.post("/api/leagues/bulk", json={"template": {"name": "Cup"}, "count": count}, headers=ADMIN_HEADERS)
+    assert response.status_code == 422
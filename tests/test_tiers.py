@@ -0,0 +1,32 @@
+import itertools
+
+import numpy as np
+
+from tiers import tier_labels
+
+
+def test_tier_breaks_are_the_optimal_partition():
+    values = np.array([50, 48, 47, 30, 29, 28, 10, 9, 8.5, 2, 1, 1], dtype=float)
+    labels = tier_labels(values, max_tiers=4, gvf=1.0)
+    assert labels.tolist() == [1, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4]
+
+    def sse(breaks):
+        parts = np.split(values, breaks)
+        return sum(((part - part.mean()) ** 2).sum() for part in parts)
+
+    found = sse(np.flatnonzero(np.diff(labels)) + 1)
+    assert found == min(sse(list(breaks)) for breaks in itertools.combinations(range(1, len(values)), 3))
+    assert tier_labels(np.full(5, 3.0)).tolist() == [1] * 5
+
+
+def test_search_and_tier_endpoints_return_tiers(client, catalog_module):
+    response = client.get("/api/players/tiers", params={"position": "RB"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["basis"] in ("etr_rank", "model")
+    rb_tiers = body["positions"]["RB"]
+    assert [name for tier in rb_tiers for name in tier["players"]] == ["Bijan Robinson", "Jonathan Taylor"]
+
+    results = client.get("/api/players/search", params={"q": "bijan"}).json()
+    assert results[0]["tier"] == 1
+    assert all("tier" in player for player in client.get("/api/players/search").json())
@@ -0,0 +1,46 @@
+import pstats
+
+from tests.conftest import ADMIN_HEADERS, make_pick
+
+
+def server_timing(response):
+    return dict(
+        (part.split(";dur=")[0].strip(), float(part.split(";dur=")[1])) for part in response.headers["server-timing"].split(",")
+    )
+
+
+def test_traced_pick_reports_spans_and_untraced_requests_do_not(client, demo_league):
+    url = f"/api/leagues/{demo_league['id']}/draft"
+    pick = {"player": make_pick(), "team_id": demo_league["teams"][0]["id"], "amount": 5}
+
+    response = client.post(url, json=pick, headers={"X-Trace": "1"})
+    assert response.status_code == 200
+    timings = server_timing(response)
+    # The command runs on the league's actor task but is still attributed to this request
+    assert {"logic", "document", "storage_write", "serialize", "total"} <= set(timings)
+    assert timings["total"] >= timings["storage_write"]
+
+    assert "server-timing" not in client.post(url, json=pick).headers
+    assert "server-timing" not in client.get(f"/api/leagues/{demo_league['id']}", headers={"X-Trace": "0"}).headers
+
+
+def test_profiling_is_toggled_at_runtime(client, tmp_path, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server.tracer, "directory", tmp_path)
+    monkeypatch.setattr(server.tracer, "sample_every", 0)
+    client.get("/api/leagues")
+    assert list(tmp_path.glob("*.pstats")) == []
+
+    settings = client.put("/api/admin/tracing", json={"sample_every": 2}, headers=ADMIN_HEADERS).json()
+    assert settings["sample_every"] == 2
+    for _ in range(4):
+        client.get("/api/leagues")
+    profiles = sorted(tmp_path.glob("*.pstats"))
+    # Every second request from the toggle on
+    assert len(profiles) == 2
+    assert pstats.Stats(str(profiles[0])).total_calls > 0
+
+    client.put("/api/admin/tracing", json={"sample_every": 0}, headers=ADMIN_HEADERS)
+    client.get("/api/leagues")
+    assert len(list(tmp_path.glob("*.pstats"))) == 2
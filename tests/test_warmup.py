@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from warmup import Warmup
+
+
+def test_readyz_turns_ready_after_warmup(catalog_module, client):
+    assert client.get("/healthz").json() == {"status": "ok"}
+    deadline = time.monotonic() + 5
+    while (response := client.get("/readyz")).status_code != 200:
+        assert response.status_code == 503 and not response.json()["ready"]
+        assert time.monotonic() < deadline, response.json()
+        time.sleep(0.01)
+    status = response.json()
+    assert status["ready"] and all(step["ok"] for step in status["steps"].values())
+    assert list(status["steps"]) == ["storage", "indexes", "catalog", "value_tables"]
+
+
+def test_failed_step_is_retried_without_rerunning_earlier_ones():
+    calls = []
+
+    async def storage():
+        calls.append("storage")
+
+    async def flaky():
+        calls.append("flaky")
+        if calls.count("flaky") < 3:
+            raise ConnectionError("not yet")
+
+    async def run():
+        warmup = Warmup([("storage", storage), ("flaky", flaky)], retry_seconds=0, freeze_gc=False)
+        warmup.start()
+        while not warmup.ready:
+            assert not warmup.status()["ready"]
+            await asyncio.sleep(0)
+        await warmup.close()
+        return warmup.status()
+
+    status = asyncio.run(run())
+    assert calls == ["storage", "flaky", "flaky", "flaky"]
+    assert status["steps"]["flaky"]["attempts"] == 3
+    assert not status["ready"] and status["draining"]
+
+
+def test_startup_leaves_index_creation_to_warmup(catalog_module, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+
+    async def unreachable():
+        raise ConnectionError("no database")
+
+    monkeypatch.setattr(server.pick_history, "ensure_indexes", unreachable)
+    monkeypatch.setattr(server, "warmup", Warmup(server.warmup.steps, retry_seconds=60, freeze_gc=False))
+    # Starting the worker makes no database calls, so it comes up and only readiness waits
+    with TestClient(server.app) as client:
+        assert client.get("/healthz").status_code == 200
+        deadline = time.monotonic() + 5
+        while (status := client.get("/readyz").json())["steps"]["indexes"]["ok"] is None:
+            assert time.monotonic() < deadline, status
+            time.sleep(0.01)
+        assert status["steps"]["indexes"] == {"ok": False, "attempts": 1, "error": "no database"}
+        assert not status["ready"]